@@ -0,0 +1,50 @@
+"""Setlist positions and per-entry overrides on collection_songs
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+POSITION_GAP = 1024
+
+
+def upgrade() -> None:
+    op.add_column('collection_songs', sa.Column('position', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('collection_songs', sa.Column('transpose', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('collection_songs', sa.Column('capo', sa.Integer(), nullable=True))
+
+    # Existing entries keep their insertion order (by song id), spaced by the gap
+    op.execute(
+        f"""
+        UPDATE collection_songs AS cs
+        SET position = ranked.rank * {POSITION_GAP}
+        FROM (
+            SELECT collection_id, song_id,
+                   row_number() OVER (PARTITION BY collection_id ORDER BY song_id) AS rank
+            FROM collection_songs
+        ) AS ranked
+        WHERE cs.collection_id = ranked.collection_id AND cs.song_id = ranked.song_id
+        """
+    )
+    op.create_index(
+        'ix_collection_songs_collection_position',
+        'collection_songs',
+        ['collection_id', 'position'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_collection_songs_collection_position', table_name='collection_songs')
+    op.drop_column('collection_songs', 'capo')
+    op.drop_column('collection_songs', 'transpose')
+    op.drop_column('collection_songs', 'position')
@@ -0,0 +1,78 @@
+"""Composite and partial indexes matching service query shapes
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+# Redundant with the primary key
+ID_INDEXES = {
+    'users': 'ix_users_id',
+    'songs': 'ix_songs_id',
+    'collections': 'ix_collections_id',
+    'custom_chords': 'ix_custom_chords_id',
+    'ratings': 'ix_ratings_id',
+}
+
+
+def upgrade() -> None:
+    for table, index in ID_INDEXES.items():
+        op.drop_index(index, table_name=table)
+
+    # Songs: public listing and popularity ranking
+    op.create_index(
+        'ix_songs_public', 'songs', ['id'],
+        postgresql_where=sa.text('is_public'),
+    )
+    op.create_index(
+        'ix_songs_public_popularity', 'songs',
+        [sa.text('view_count DESC'), sa.text('average_rating DESC')],
+        postgresql_where=sa.text('is_public'),
+    )
+
+    # Ratings: user lookups are served by unique_user_song_rating (user_id, song_id);
+    # song lookups filter on verification and aggregate the score
+    op.drop_index('ix_ratings_user_id', table_name='ratings')
+    op.drop_index('ix_ratings_song_id', table_name='ratings')
+    op.create_index('ix_ratings_song_verified', 'ratings', ['song_id', 'is_verified', 'score'])
+
+    # Custom chords: (user, name) lookups and verified chords by usage
+    op.drop_index('ix_custom_chords_user_id', table_name='custom_chords')
+    op.create_index('ix_custom_chords_user_name', 'custom_chords', ['user_id', 'name'])
+    op.create_index(
+        'ix_custom_chords_verified_usage', 'custom_chords',
+        [sa.text('usage_count DESC')],
+        postgresql_where=sa.text('is_verified'),
+    )
+
+    # Collections: public listing; collection_songs: removal of a song everywhere
+    op.create_index(
+        'ix_collections_public', 'collections', ['id'],
+        postgresql_where=sa.text('is_public'),
+    )
+    op.create_index('ix_collection_songs_song_id', 'collection_songs', ['song_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_collection_songs_song_id', table_name='collection_songs')
+    op.drop_index('ix_collections_public', table_name='collections')
+    op.drop_index('ix_custom_chords_verified_usage', table_name='custom_chords')
+    op.drop_index('ix_custom_chords_user_name', table_name='custom_chords')
+    op.create_index('ix_custom_chords_user_id', 'custom_chords', ['user_id'])
+    op.drop_index('ix_ratings_song_verified', table_name='ratings')
+    op.create_index('ix_ratings_song_id', 'ratings', ['song_id'])
+    op.create_index('ix_ratings_user_id', 'ratings', ['user_id'])
+    op.drop_index('ix_songs_public_popularity', table_name='songs')
+    op.drop_index('ix_songs_public', table_name='songs')
+
+    for table, index in ID_INDEXES.items():
+        op.create_index(index, table, ['id'])
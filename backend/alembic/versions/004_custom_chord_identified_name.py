@@ -0,0 +1,24 @@
+"""Chord name identified from custom chord fret positions
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Filled for existing rows by POST /chords/identify-backfill
+    op.add_column('custom_chords', sa.Column('identified_name', sa.String(length=50), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('custom_chords', 'identified_name')
@@ -0,0 +1,129 @@
+"""Chord name lookup index
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+# Frozen copy of the name key logic at this revision (see
+# app.services.chord.name_keys and app.utils.music_theory.chord_lookup_key)
+NAME_KEY_LENGTH = 50
+ENHARMONIC_MAP = {'Db': 'C#', 'Eb': 'D#', 'Gb': 'F#', 'Ab': 'G#', 'Bb': 'A#'}
+QUALITY_ALIASES = {
+    '': 'major', 'maj': 'major', 'M': 'major',
+    'm': 'minor', 'min': 'minor', '-': 'minor',
+    'dim': 'dim', 'o': 'dim',
+    'aug': 'aug', '+': 'aug',
+    '7': '7', 'dom7': '7',
+    'maj7': 'maj7', 'M7': 'maj7', 'M9': 'maj9',
+    'm7': 'm7', 'min7': 'm7', '-7': 'm7',
+    'dim7': 'dim7', 'o7': 'dim7',
+    'sus': 'sus4', 'sus2': 'sus2', 'sus4': 'sus4',
+    'add9': 'add9', '6': '6', 'm6': 'm6', '5': '5',
+    '9': '9', 'm9': 'm9', 'maj9': 'maj9',
+    '7sus4': '7sus4', '7sus': '7sus4',
+    'm7b5': 'm7b5', 'm7-5': 'm7b5',
+}
+QUALITY_SUFFIXES = {'major': '', 'minor': 'm'}
+ROOT_RE = re.compile(r'^([A-G]#?)')
+
+custom_chords = sa.table(
+    'custom_chords',
+    sa.column('id', sa.Integer()),
+    sa.column('name', sa.String()),
+    sa.column('alternative_names', sa.JSON()),
+    sa.column('identified_name', sa.String()),
+)
+chord_names = sa.table(
+    'chord_names',
+    sa.column('name_key', sa.String()),
+    sa.column('chord_id', sa.Integer()),
+)
+
+
+def _normalize(chord: str) -> str:
+    for flat, sharp in ENHARMONIC_MAP.items():
+        chord = chord.replace(flat, sharp)
+    return chord
+
+
+def _lookup_key(name: str) -> str:
+    text = name.strip()
+    if text:
+        text = text[0].upper() + text[1:]
+    text = _normalize(text)
+    chord, _, bass = text.partition('/')
+    root = ROOT_RE.match(chord)
+    if root:
+        quality = chord[root.end():]
+        pattern = QUALITY_ALIASES.get(quality)
+        text = root.group(1) + (QUALITY_SUFFIXES.get(pattern, pattern) if pattern else quality)
+        if bass.strip():
+            text += '/' + bass.strip()
+    return text.lower()
+
+
+def _name_keys(name, alternative_names, identified_name):
+    names = [name, identified_name, *(alternative_names or [])]
+    keys = {_lookup_key(name)[:NAME_KEY_LENGTH] for name in names if isinstance(name, str)}
+    keys.discard('')
+    return keys
+
+
+def upgrade() -> None:
+    op.create_table(
+        'chord_names',
+        sa.Column(
+            'name_key',
+            sa.String(length=50).with_variant(sa.String(length=50, collation='C'), 'postgresql'),
+            nullable=False,
+        ),
+        sa.Column('chord_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['chord_id'], ['custom_chords.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('name_key', 'chord_id'),
+    )
+    op.create_index('ix_chord_names_chord_id', 'chord_names', ['chord_id'], unique=False)
+
+    # Index existing chords now, as search_by_name reads only this table
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        chords = bind.execute(
+            sa.select(
+                custom_chords.c.id,
+                custom_chords.c.name,
+                custom_chords.c.alternative_names,
+                custom_chords.c.identified_name,
+            )
+            .where(custom_chords.c.id > last_id)
+            .order_by(custom_chords.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not chords:
+            break
+        last_id = chords[-1].id
+        rows = [
+            {'name_key': key, 'chord_id': chord.id}
+            for chord in chords
+            for key in _name_keys(chord.name, chord.alternative_names, chord.identified_name)
+        ]
+        if rows:
+            bind.execute(sa.insert(chord_names), rows)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_chord_names_chord_id', table_name='chord_names')
+    op.drop_table('chord_names')
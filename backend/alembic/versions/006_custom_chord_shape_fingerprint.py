@@ -0,0 +1,82 @@
+"""Custom chord shape fingerprints and canonical links
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+# Frozen copy of the fingerprint format at this revision (see
+# app.utils.chord_identification.shape_fingerprint); all stored chords
+# use standard tuning
+STANDARD_TUNING = 'E-A-D-G-B-E'
+
+custom_chords = sa.table(
+    'custom_chords',
+    sa.column('id', sa.Integer()),
+    sa.column('fret_positions', sa.JSON()),
+    sa.column('starting_fret', sa.Integer()),
+    sa.column('shape_fingerprint', sa.String()),
+)
+
+
+def _shape_fingerprint(frets, starting_fret) -> str:
+    offset = (starting_fret or 1) - 1
+    absolute = [fret + offset if fret > 0 else fret for fret in frets]
+    return STANDARD_TUNING + ':' + ','.join(map(str, absolute))
+
+
+def upgrade() -> None:
+    # Fingerprints are filled below; duplicates are then folded by
+    # POST /chords/merge-duplicates
+    op.add_column('custom_chords', sa.Column('shape_fingerprint', sa.String(length=80), nullable=True))
+    op.add_column('custom_chords', sa.Column('canonical_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'fk_custom_chords_canonical_id', 'custom_chords', 'custom_chords',
+        ['canonical_id'], ['id'], ondelete='SET NULL',
+    )
+    op.create_index(
+        'ix_custom_chords_shape', 'custom_chords', ['shape_fingerprint'],
+        postgresql_where=sa.text('canonical_id IS NULL'),
+    )
+
+    bind = op.get_bind()
+    stmt = sa.update(custom_chords).where(custom_chords.c.id == sa.bindparam('b_id')).values(
+        shape_fingerprint=sa.bindparam('b_fingerprint')
+    )
+    last_id = 0
+    while True:
+        batch = bind.execute(
+            sa.select(custom_chords.c.id, custom_chords.c.fret_positions, custom_chords.c.starting_fret)
+            .where(custom_chords.c.id > last_id)
+            .order_by(custom_chords.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not batch:
+            break
+        last_id = batch[-1].id
+        updates = [
+            {
+                'b_id': chord.id,
+                'b_fingerprint': _shape_fingerprint(chord.fret_positions, chord.starting_fret),
+            }
+            for chord in batch
+        ]
+        bind.execute(stmt, updates)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_custom_chords_shape', table_name='custom_chords')
+    op.drop_constraint('fk_custom_chords_canonical_id', 'custom_chords', type_='foreignkey')
+    op.drop_column('custom_chords', 'canonical_id')
+    op.drop_column('custom_chords', 'shape_fingerprint')
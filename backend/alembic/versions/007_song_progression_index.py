@@ -0,0 +1,148 @@
+"""Song progression n-gram index
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+# Frozen copy of the n-gram logic at this revision (see
+# app.utils.music_theory.extract_sheet_chords and app.utils.progressions)
+NGRAM_SIZE = 4
+MAX_NGRAMS = 256
+CHROMATIC_SCALE = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+ENHARMONIC_MAP = {'Db': 'C#', 'Eb': 'D#', 'Gb': 'F#', 'Ab': 'G#', 'Bb': 'A#'}
+QUALITY_ALIASES = {
+    '': 'major', 'maj': 'major', 'M': 'major',
+    'm': 'minor', 'min': 'minor', '-': 'minor',
+    'dim': 'dim', 'o': 'dim',
+    'aug': 'aug', '+': 'aug',
+    '7': '7', 'dom7': '7',
+    'maj7': 'maj7', 'M7': 'maj7', 'M9': 'maj9',
+    'm7': 'm7', 'min7': 'm7', '-7': 'm7',
+    'dim7': 'dim7', 'o7': 'dim7',
+    'sus': 'sus4', 'sus2': 'sus2', 'sus4': 'sus4',
+    'add9': 'add9', '6': '6', 'm6': 'm6', '5': '5',
+    '9': '9', 'm9': 'm9', 'maj9': 'maj9',
+    '7sus4': '7sus4', '7sus': '7sus4',
+    'm7b5': 'm7b5', 'm7-5': 'm7b5',
+}
+CHORD_NAME_RE = re.compile(
+    r'[A-G][#b]?(?:maj|min|m|dim|aug|sus|add|[0-9]|[#b+\-()])*(?:/[A-G][#b]?)?'
+)
+INLINE_CHORD_RE = re.compile(r'\[([^\]\s]+)\]')
+ROOT_RE = re.compile(r'^([A-G]#?)')
+QUALITY_CLASSES = {
+    'major': 'M', '7': 'M', 'maj7': 'M', '6': 'M', 'add9': 'M', '9': 'M', 'maj9': 'M',
+    'minor': 'm', 'm7': 'm', 'm6': 'm', 'm9': 'm',
+    'dim': 'd', 'dim7': 'd', 'm7b5': 'd',
+    'aug': 'a',
+    'sus2': 's', 'sus4': 's', '7sus4': 's',
+    '5': '5',
+}
+
+songs = sa.table(
+    'songs',
+    sa.column('id', sa.Integer()),
+    sa.column('lyrics_and_chords', sa.Text()),
+)
+song_ngrams = sa.table(
+    'song_ngrams',
+    sa.column('ngram', sa.String()),
+    sa.column('song_id', sa.Integer()),
+)
+
+
+def _sheet_chords(text: str):
+    chords = []
+    for line in text.split('\n'):
+        tokens = line.split()
+        if tokens and all(CHORD_NAME_RE.fullmatch(token) for token in tokens):
+            chords.extend(tokens)
+        else:
+            chords.extend(INLINE_CHORD_RE.findall(line))
+    return chords
+
+
+def _parse(chord: str):
+    """``(root pitch class, CHORD_PATTERNS key)`` of a chord, or None."""
+    for flat, sharp in ENHARMONIC_MAP.items():
+        chord = chord.replace(flat, sharp)
+    chord = chord.strip().split('/', 1)[0]
+    root = ROOT_RE.match(chord)
+    if not root or root.group(1) not in CHROMATIC_SCALE:
+        return None
+    pattern = QUALITY_ALIASES.get(chord[root.end():])
+    if pattern is None:
+        return None
+    return CHROMATIC_SCALE.index(root.group(1)), pattern
+
+
+def _progression_ngrams(chords):
+    tokens = []
+    for chord in chords:
+        parsed = _parse(chord)
+        if parsed is None:
+            continue
+        token = (parsed[0], QUALITY_CLASSES[parsed[1]])
+        if not tokens or tokens[-1] != token:
+            tokens.append(token)
+    ngrams = set()
+    for start in range(len(tokens) - NGRAM_SIZE + 1):
+        window = tokens[start:start + NGRAM_SIZE]
+        parts = [window[0][1]]
+        for (previous_root, _), (root, quality) in zip(window, window[1:]):
+            parts.append(format((root - previous_root) % 12, 'x') + quality)
+        ngrams.add(''.join(parts))
+        if len(ngrams) >= MAX_NGRAMS:
+            break
+    return ngrams
+
+
+def upgrade() -> None:
+    op.create_table(
+        'song_ngrams',
+        sa.Column('ngram', sa.String(length=16), nullable=False),
+        sa.Column('song_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['song_id'], ['songs.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('ngram', 'song_id'),
+    )
+    op.create_index('ix_song_ngrams_song_id', 'song_ngrams', ['song_id'], unique=False)
+
+    # Index existing songs now, as similarity search reads only this table
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        batch = bind.execute(
+            sa.select(songs.c.id, songs.c.lyrics_and_chords)
+            .where(songs.c.id > last_id)
+            .order_by(songs.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not batch:
+            break
+        last_id = batch[-1].id
+        rows = [
+            {'ngram': ngram, 'song_id': song.id}
+            for song in batch
+            for ngram in _progression_ngrams(_sheet_chords(song.lyrics_and_chords))
+        ]
+        if rows:
+            bind.execute(sa.insert(song_ngrams), rows)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_song_ngrams_song_id', table_name='song_ngrams')
+    op.drop_table('song_ngrams')
@@ -0,0 +1,144 @@
+"""Song chord vocabulary bitmaps
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+# Frozen copy of the vocabulary logic at this revision (see
+# app.utils.music_theory.extract_sheet_chords and app.utils.vocabulary)
+CHROMATIC_SCALE = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+ENHARMONIC_MAP = {'Db': 'C#', 'Eb': 'D#', 'Gb': 'F#', 'Ab': 'G#', 'Bb': 'A#'}
+QUALITY_ALIASES = {
+    '': 'major', 'maj': 'major', 'M': 'major',
+    'm': 'minor', 'min': 'minor', '-': 'minor',
+    'dim': 'dim', 'o': 'dim',
+    'aug': 'aug', '+': 'aug',
+    '7': '7', 'dom7': '7',
+    'maj7': 'maj7', 'M7': 'maj7', 'M9': 'maj9',
+    'm7': 'm7', 'min7': 'm7', '-7': 'm7',
+    'dim7': 'dim7', 'o7': 'dim7',
+    'sus': 'sus4', 'sus2': 'sus2', 'sus4': 'sus4',
+    'add9': 'add9', '6': '6', 'm6': 'm6', '5': '5',
+    '9': '9', 'm9': 'm9', 'maj9': 'maj9',
+    '7sus4': '7sus4', '7sus': '7sus4',
+    'm7b5': 'm7b5', 'm7-5': 'm7b5',
+}
+CHORD_NAME_RE = re.compile(
+    r'[A-G][#b]?(?:maj|min|m|dim|aug|sus|add|[0-9]|[#b+\-()])*(?:/[A-G][#b]?)?'
+)
+INLINE_CHORD_RE = re.compile(r'\[([^\]\s]+)\]')
+ROOT_RE = re.compile(r'^([A-G]#?)')
+VOCABULARY_CLASSES = ('major', 'minor', '7', 'm7', 'dim')
+UNREPRESENTABLE = 1 << (12 * len(VOCABULARY_CLASSES))
+PATTERN_CLASSES = {
+    'major': 'major', '6': 'major', 'add9': 'major', 'maj7': 'major', 'maj9': 'major',
+    'sus2': 'major', 'sus4': 'major', '5': 'major', 'aug': 'major',
+    'minor': 'minor', 'm6': 'minor',
+    '7': '7', '9': '7', '7sus4': '7',
+    'm7': 'm7', 'm9': 'm7',
+    'dim': 'dim', 'dim7': 'dim', 'm7b5': 'dim',
+}
+
+songs = sa.table(
+    'songs',
+    sa.column('id', sa.Integer()),
+    sa.column('lyrics_and_chords', sa.Text()),
+    sa.column('chord_vocabulary', sa.BigInteger()),
+)
+
+
+def _sheet_chords(text: str):
+    chords = []
+    for line in text.split('\n'):
+        tokens = line.split()
+        if tokens and all(CHORD_NAME_RE.fullmatch(token) for token in tokens):
+            chords.extend(tokens)
+        else:
+            chords.extend(INLINE_CHORD_RE.findall(line))
+    return chords
+
+
+def _parse(chord: str):
+    """``(root pitch class, CHORD_PATTERNS key)`` of a chord, or None."""
+    for flat, sharp in ENHARMONIC_MAP.items():
+        chord = chord.replace(flat, sharp)
+    chord = chord.strip().split('/', 1)[0]
+    root = ROOT_RE.match(chord)
+    if not root or root.group(1) not in CHROMATIC_SCALE:
+        return None
+    pattern = QUALITY_ALIASES.get(chord[root.end():])
+    if pattern is None:
+        return None
+    return CHROMATIC_SCALE.index(root.group(1)), pattern
+
+
+def _vocabulary_mask(chords) -> int:
+    mask = 0
+    for chord in chords:
+        parsed = _parse(chord)
+        if parsed is None:
+            mask |= UNREPRESENTABLE
+        else:
+            root, pattern = parsed
+            mask |= 1 << (12 * VOCABULARY_CLASSES.index(PATTERN_CLASSES[pattern]) + root)
+    return mask
+
+
+def upgrade() -> None:
+    op.add_column('songs', sa.Column('chord_vocabulary', sa.BigInteger(), nullable=True))
+    # Widen the public listing index so it covers the playable-songs test; a
+    # second (id, chord_vocabulary) index would tie with it in the planner
+    op.drop_index('ix_songs_public', table_name='songs')
+    op.create_index(
+        'ix_songs_public', 'songs', ['id', 'chord_vocabulary'],
+        postgresql_where=sa.text('is_public'),
+    )
+
+    # Compute existing songs' vocabularies now, as playable-songs search
+    # skips songs without one
+    bind = op.get_bind()
+    stmt = sa.update(songs).where(songs.c.id == sa.bindparam('b_id')).values(
+        chord_vocabulary=sa.bindparam('b_vocabulary')
+    )
+    last_id = 0
+    while True:
+        batch = bind.execute(
+            sa.select(songs.c.id, songs.c.lyrics_and_chords)
+            .where(songs.c.id > last_id)
+            .order_by(songs.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not batch:
+            break
+        last_id = batch[-1].id
+        updates = [
+            {
+                'b_id': song.id,
+                'b_vocabulary': _vocabulary_mask(_sheet_chords(song.lyrics_and_chords)),
+            }
+            for song in batch
+        ]
+        bind.execute(stmt, updates)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_songs_public', table_name='songs')
+    op.create_index(
+        'ix_songs_public', 'songs', ['id'],
+        postgresql_where=sa.text('is_public'),
+    )
+    op.drop_column('songs', 'chord_vocabulary')
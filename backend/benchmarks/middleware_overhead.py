@@ -0,0 +1,76 @@
+"""
+Measure per-request middleware overhead.
+
+Compares a bare FastAPI app, the previous stack of three BaseHTTPMiddleware
+layers plus a wildcard TrustedHostMiddleware, and the current pure-ASGI
+RequestContextMiddleware.
+
+Usage (from backend/):
+    PYTHONPATH=src python benchmarks/middleware_overhead.py [requests]
+"""
+import asyncio
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import httpx  # noqa: E402
+from fastapi import FastAPI, Request  # noqa: E402
+from fastapi.middleware.trustedhost import TrustedHostMiddleware  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+
+from app.core.middleware import RequestContextMiddleware  # noqa: E402
+
+
+class _PassThrough(BaseHTTPMiddleware):
+    """Stand-in for one of the former BaseHTTPMiddleware layers."""
+
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        response.headers["X-Layer"] = "1"
+        return response
+
+
+def build_app(variant: str) -> FastAPI:
+    """Create a minimal app with the given middleware stack."""
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    if variant == "legacy":
+        for _ in range(3):
+            app.add_middleware(_PassThrough)
+        app.add_middleware(TrustedHostMiddleware, allowed_hosts=["*"])
+    elif variant == "asgi":
+        app.add_middleware(RequestContextMiddleware)
+    return app
+
+
+async def run(variant: str, requests: int) -> float:
+    """Return mean microseconds per request for a variant."""
+    transport = httpx.ASGITransport(app=build_app(variant))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(100):  # warm-up
+            await client.get("/ping")
+        start = time.perf_counter()
+        for _ in range(requests):
+            await client.get("/ping")
+        return (time.perf_counter() - start) / requests * 1e6
+
+
+def main() -> None:
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    logging.getLogger("app").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    results = {variant: asyncio.run(run(variant, requests)) for variant in ("bare", "legacy", "asgi")}
+    for variant, micros in results.items():
+        overhead = micros - results["bare"]
+        print(f"{variant:>7}: {micros:8.1f} us/request  (+{overhead:6.1f} us middleware)")
+
+
+if __name__ == "__main__":
+    main()
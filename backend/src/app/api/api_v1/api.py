@@ -3,8 +3,15 @@ API v1 main router.
 """
 from fastapi import APIRouter
 
-from app.api.api_v1.endpoints import auth, users, songs, chords, collections, ratings
-from app.api.api_v1.endpoints.music import transpose
+from app.api.api_v1.endpoints import auth, users, songs, chords, collections, ratings, imports, exports
+from app.api.api_v1.endpoints.music import (
+    analysis,
+    diagrams,
+    progressions,
+    transpose,
+    vocabulary,
+    voicings,
+)
 
 api_router = APIRouter()
 
@@ -15,4 +22,11 @@ api_router.include_router(songs.router, prefix="/songs", tags=["songs"])
 api_router.include_router(chords.router, prefix="/chords", tags=["chords"])
 api_router.include_router(collections.router, prefix="/collections", tags=["collections"])
 api_router.include_router(ratings.router, prefix="/ratings", tags=["ratings"])
-api_router.include_router(transpose.router, prefix="/music", tags=["music"])
\ No newline at end of file
+api_router.include_router(imports.router, prefix="/imports", tags=["imports"])
+api_router.include_router(exports.router, prefix="/exports", tags=["exports"])
+api_router.include_router(transpose.router, prefix="/music", tags=["music"])
+api_router.include_router(voicings.router, prefix="/music", tags=["music"])
+api_router.include_router(diagrams.router, prefix="/music", tags=["music"])
+api_router.include_router(analysis.router, prefix="/music", tags=["music"])
+api_router.include_router(progressions.router, prefix="/music", tags=["music"])
+api_router.include_router(vocabulary.router, prefix="/music", tags=["music"])
\ No newline at end of file
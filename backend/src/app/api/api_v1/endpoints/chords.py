@@ -1,21 +1,24 @@
 """
 Custom chord management endpoints.
 """
-from typing import Any, List
+from typing import Any, Dict, List
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Body, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from app import models, schemas
-from app.api.deps import get_current_active_user, get_db
+from app.api.deps import get_current_active_user, get_current_admin_user, get_db, get_read_db
+from app.core.config import settings
+from app.schemas.bulk import BulkItemError, merge_bulk_errors, parse_bulk_items
 from app.services.chord import custom_chord_service
+from app.services.maintenance import record_chord_usage
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[schemas.CustomChord])
 def read_verified_chords(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
     current_user: models.User = Depends(get_current_active_user),
@@ -30,13 +33,14 @@ def read_verified_chords(
 @router.get("/search", response_model=List[schemas.CustomChord])
 def search_chords(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     name: str = Query(..., description="Chord name to search"),
     limit: int = Query(10, le=50, description="Number of chords to return"),
     current_user: models.User = Depends(get_current_active_user),
 ) -> Any:
     """
-    Search chords by name.
+    Search verified chords by name prefix, matching alternative names and
+    enharmonic spellings.
     """
     chords = custom_chord_service.search_by_name(db, name=name, limit=limit)
     return chords
@@ -44,7 +48,7 @@ def search_chords(
 
 @router.get("/my", response_model=List[schemas.CustomChord])
 def read_my_chords(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
     current_user: models.User = Depends(get_current_active_user),
@@ -67,6 +71,9 @@ def create_chord(
 ) -> Any:
     """
     Create new custom chord.
+
+    If the user already has a chord with the same shape, that chord is
+    returned with the new name added to its alternative names.
     """
     # Check if chord with same name already exists for this user
     existing_chord = custom_chord_service.get_by_name_and_user(
@@ -84,6 +91,119 @@ def create_chord(
     return chord
 
 
+@router.post("/bulk", response_model=schemas.BulkOperationResult)
+def create_chords_bulk(
+    *,
+    db: Session = Depends(get_db),
+    chords_in: List[Dict[str, Any]] = Body(..., max_length=settings.BULK_MAX_ITEMS),
+    current_user: models.User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Create many custom chords. Invalid or duplicate names are reported per index.
+
+    As with single creation, a shape the user already has gains the name
+    instead of a new chord, and copies of verified shapes are linked to them.
+    """
+    indexes, chords, errors = parse_bulk_items(chords_in, schemas.CustomChordCreate)
+    existing = custom_chord_service.get_names_by_user(
+        db=db, names={chord.name for chord in chords}, user_id=current_user.id
+    )
+    new_indexes, new_chords = [], []
+    for index, chord in zip(indexes, chords):
+        if chord.name in existing:
+            errors.append(
+                BulkItemError(
+                    index=index,
+                    error="A chord with this name already exists for this user",
+                )
+            )
+            continue
+        existing.add(chord.name)
+        new_indexes.append(index)
+        new_chords.append(chord)
+    result = custom_chord_service.create_many(
+        db=db, objs_in=new_chords, extra={"user_id": current_user.id}
+    )
+    return merge_bulk_errors(result, new_indexes, errors)
+
+
+@router.put("/bulk", response_model=schemas.BulkOperationResult)
+def update_chords_bulk(
+    *,
+    db: Session = Depends(get_db),
+    chords_in: List[Dict[str, Any]] = Body(..., max_length=settings.BULK_MAX_ITEMS),
+    current_user: models.User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Update many of the current user's custom chords by ID.
+    """
+    indexes, chords, errors = parse_bulk_items(chords_in, schemas.CustomChordBulkUpdate)
+    result = custom_chord_service.update_many(
+        db=db,
+        objs_in=[chord.dict(exclude_unset=True) for chord in chords],
+        scope={"user_id": current_user.id},
+    )
+    return merge_bulk_errors(result, indexes, errors)
+
+
+@router.post("/bulk-delete", response_model=schemas.BulkOperationResult)
+def delete_chords_bulk(
+    *,
+    db: Session = Depends(get_db),
+    delete_in: schemas.BulkDelete,
+    current_user: models.User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Delete many of the current user's custom chords by ID.
+    """
+    if len(delete_in.ids) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail="Too many items")
+    return custom_chord_service.remove_many(
+        db=db, ids=delete_in.ids, scope={"user_id": current_user.id}
+    )
+
+
+@router.post("/identify-backfill")
+def backfill_shape_columns(
+    *,
+    db: Session = Depends(get_db),
+    only_missing: bool = Query(False, description="Skip chords already identified"),
+    current_user: models.User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Name and fingerprint every stored chord shape from its frets. (Admin only)
+    """
+    return {
+        "updated": custom_chord_service.backfill_shape_columns(
+            db, only_missing=only_missing
+        )
+    }
+
+
+@router.post("/merge-duplicates")
+def merge_duplicate_shapes(
+    *,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Fold chords with identical shapes into one canonical chord each. (Admin only)
+    """
+    return custom_chord_service.merge_duplicate_shapes(db)
+
+
+@router.post("/rebuild-name-index")
+def rebuild_name_index(
+    *,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Rebuild the chord name search index. (Admin only)
+    """
+    return {"indexed": custom_chord_service.rebuild_name_index(db)}
+
+
 @router.put("/{chord_id}", response_model=schemas.CustomChord)
 def update_chord(
     *,
@@ -107,8 +227,9 @@ def update_chord(
 @router.get("/{chord_id}", response_model=schemas.CustomChord)
 def read_chord(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     chord_id: int,
+    background_tasks: BackgroundTasks,
     current_user: models.User = Depends(get_current_active_user),
 ) -> Any:
     """
@@ -122,9 +243,9 @@ def read_chord(
     if chord.user_id != current_user.id and not chord.is_verified:
         raise HTTPException(status_code=400, detail="Not enough permissions")
     
-    # Increment usage count for verified chords
+    # Count a use of verified chords once the response is sent
     if chord.is_verified:
-        chord = custom_chord_service.increment_usage_count(db=db, chord_id=chord_id)
+        background_tasks.add_task(record_chord_usage, [chord_id])
     
     return chord
 
@@ -3,19 +3,22 @@ Collection management endpoints.
 """
 from typing import Any, List
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from app import models, schemas
-from app.api.deps import get_current_active_user, get_db
-from app.services.collection import collection_service
+from app.api.deps import get_current_active_user, get_current_admin_user, get_db, get_read_db
+from app.core.config import settings
+from app.db.queries import query_budget
+from app.services.collection import collection_service, setlist_entry
+from app.services.song import song_service
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[schemas.Collection])
 def read_public_collections(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
     current_user: models.User = Depends(get_current_active_user),
@@ -29,7 +32,7 @@ def read_public_collections(
 
 @router.get("/my", response_model=List[schemas.Collection])
 def read_my_collections(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
     current_user: models.User = Depends(get_current_active_user),
@@ -59,6 +62,18 @@ def create_collection(
     return collection
 
 
+@router.post("/reconcile-counts")
+def reconcile_song_counts(
+    *,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Recompute drifted collection song counts. (Admin only)
+    """
+    return {"reconciled": collection_service.reconcile_song_counts(db)}
+
+
 @router.put("/{collection_id}", response_model=schemas.Collection)
 def update_collection(
     *,
@@ -80,27 +95,179 @@ def update_collection(
 
 
 @router.get("/{collection_id}", response_model=schemas.CollectionWithSongs)
+@query_budget(3)
 def read_collection(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     collection_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
     current_user: models.User = Depends(get_current_active_user),
 ) -> Any:
     """
-    Get collection by ID with songs.
+    Get collection by ID with a page of its songs.
     """
-    collection = collection_service.get_collection_with_songs(db=db, collection_id=collection_id)
-    if not collection:
+    page = collection_service.get_collection_with_songs(
+        db=db, collection_id=collection_id, skip=skip, limit=limit
+    )
+    if not page:
         raise HTTPException(status_code=404, detail="Collection not found")
+    collection, songs = page
     
     # Check permissions
     if not collection.is_public and collection.user_id != current_user.id:
         raise HTTPException(status_code=400, detail="Not enough permissions")
     
+    return {
+        **schemas.Collection.model_validate(collection).dict(),
+        "songs": [schemas.SongSummary.model_validate(song) for song in songs],
+    }
+
+
+@router.get("/{collection_id}/setlist", response_model=schemas.Setlist)
+@query_budget(3)
+def read_setlist(
+    *,
+    db: Session = Depends(get_read_db),
+    collection_id: int,
+    current_user: models.User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Get a collection's songs in setlist order, each transposed to its entry's key.
+    """
+    collection = collection_service.get(db=db, id=collection_id)
+    if not collection:
+        raise HTTPException(status_code=404, detail="Collection not found")
+    if not collection.is_public and collection.user_id != current_user.id:
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+
+    rows = collection_service.get_setlist_entries(db=db, collection_id=collection_id)
+    return {
+        **schemas.Collection.model_validate(collection).dict(),
+        "entries": [setlist_entry(row) for row in rows],
+    }
+
+
+def get_own_collection(
+    db: Session, collection_id: int, current_user: models.User
+) -> models.Collection:
+    """Load a collection the current user may modify."""
+    collection = collection_service.get(db=db, id=collection_id)
+    if not collection:
+        raise HTTPException(status_code=404, detail="Collection not found")
+    if collection.user_id != current_user.id:
+        raise HTTPException(status_code=400, detail="Not enough permissions")
     return collection
 
 
+@router.post("/{collection_id}/songs/bulk", response_model=schemas.BulkOperationResult)
+@query_budget(5)
+def add_songs_to_collection(
+    *,
+    db: Session = Depends(get_db),
+    collection_id: int,
+    songs_in: schemas.CollectionSongIds,
+    current_user: models.User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Add many songs to a collection. Songs already in it are skipped;
+    missing or inaccessible songs are reported per index.
+    """
+    if len(songs_in.song_ids) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail="Too many items")
+    collection = get_own_collection(db, collection_id, current_user)
+    accessible = song_service.get_accessible_ids(
+        db=db, ids=songs_in.song_ids, user_id=current_user.id
+    )
+    errors = [
+        schemas.BulkItemError(index=index, error="Song not found or not accessible")
+        for index, song_id in enumerate(songs_in.song_ids)
+        if song_id not in accessible
+    ]
+    added = collection_service.add_songs(
+        db=db,
+        collection=collection,
+        song_ids=[id for id in songs_in.song_ids if id in accessible],
+    )
+    return schemas.BulkOperationResult(ids=added, errors=errors)
+
+
+@router.post("/{collection_id}/songs/bulk-delete", response_model=schemas.BulkOperationResult)
+@query_budget(4)
+def remove_songs_from_collection(
+    *,
+    db: Session = Depends(get_db),
+    collection_id: int,
+    songs_in: schemas.CollectionSongIds,
+    current_user: models.User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Remove many songs from a collection. Returns the IDs that were removed.
+    """
+    if len(songs_in.song_ids) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail="Too many items")
+    collection = get_own_collection(db, collection_id, current_user)
+    removed = collection_service.remove_songs(
+        db=db, collection=collection, song_ids=songs_in.song_ids
+    )
+    return schemas.BulkOperationResult(ids=removed)
+
+
+@router.put("/{collection_id}/songs/order", response_model=schemas.CollectionSongIds)
+@query_budget(4)
+def reorder_collection_songs(
+    *,
+    db: Session = Depends(get_db),
+    collection_id: int,
+    order_in: schemas.CollectionSongIds,
+    current_user: models.User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Reorder a setlist: the given songs come first, in order; the rest follow.
+    """
+    if len(order_in.song_ids) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail="Too many items")
+    get_own_collection(db, collection_id, current_user)
+    order = collection_service.reorder_songs(
+        db=db, collection_id=collection_id, song_ids=order_in.song_ids
+    )
+    return schemas.CollectionSongIds(song_ids=order)
+
+
+@router.patch("/{collection_id}/songs/{song_id}", response_model=schemas.CollectionSongEntry)
+def update_collection_song(
+    *,
+    db: Session = Depends(get_db),
+    collection_id: int,
+    song_id: int,
+    entry_in: schemas.CollectionSongEntryUpdate,
+    current_user: models.User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Move a song within a setlist and/or set its transposition and capo.
+    """
+    get_own_collection(db, collection_id, current_user)
+    values = entry_in.dict(exclude_unset=True)
+    move = "after_song_id" in values
+    after_song_id = values.pop("after_song_id", None)
+
+    if values and not collection_service.update_entry(
+        db=db, collection_id=collection_id, song_id=song_id, values=values
+    ):
+        raise HTTPException(status_code=404, detail="Song not in collection")
+    if move and collection_service.move_song(
+        db=db, collection_id=collection_id, song_id=song_id, after_song_id=after_song_id
+    ) is None:
+        raise HTTPException(status_code=404, detail="Song not in collection")
+
+    entry = collection_service.get_entry(db=db, collection_id=collection_id, song_id=song_id)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Song not in collection")
+    return entry
+
+
 @router.post("/{collection_id}/songs/{song_id}", response_model=schemas.Collection)
+@query_budget(5)
 def add_song_to_collection(
     *,
     db: Session = Depends(get_db),
@@ -118,7 +285,6 @@ def add_song_to_collection(
         raise HTTPException(status_code=400, detail="Not enough permissions")
     
     # Check if song exists and is accessible
-    from app.services.song import song_service
     song = song_service.get(db=db, id=song_id)
     if not song:
         raise HTTPException(status_code=404, detail="Song not found")
@@ -135,6 +301,7 @@ def add_song_to_collection(
 
 
 @router.delete("/{collection_id}/songs/{song_id}", response_model=schemas.Collection)
+@query_budget(4)
 def remove_song_from_collection(
     *,
     db: Session = Depends(get_db),
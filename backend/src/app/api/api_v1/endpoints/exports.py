@@ -0,0 +1,43 @@
+"""
+Catalog export endpoints.
+"""
+from datetime import datetime
+from typing import Any, List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app import models
+from app.api.deps import get_current_admin_user
+from app.services.export import RESOURCE_TYPES, stream_export
+
+router = APIRouter()
+
+
+@router.get("/catalog")
+def export_catalog(
+    resources: List[str] = Query(
+        list(RESOURCE_TYPES), description="Resources to export"
+    ),
+    gzip: bool = Query(False, description="Gzip-compress the stream"),
+    current_user: models.User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Stream songs, collections and ratings as NDJSON. (Admin only)
+    """
+    unknown = [resource for resource in resources if resource not in RESOURCE_TYPES]
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown resources: {', '.join(unknown)}"
+        )
+
+    filename = f"mychordhub-{datetime.utcnow():%Y%m%d%H%M%S}.ndjson"
+    headers = {}
+    media_type = "application/x-ndjson"
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+    headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return StreamingResponse(
+        stream_export(resources, gzip=gzip), media_type=media_type, headers=headers
+    )
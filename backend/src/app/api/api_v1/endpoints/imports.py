@@ -0,0 +1,62 @@
+"""
+Bulk import endpoints.
+"""
+import tempfile
+from pathlib import Path
+from typing import Any
+
+from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, UploadFile
+
+from app import models, schemas
+from app.api.deps import get_current_active_user
+from app.core.config import settings
+from app.services.song_import import ImportJob, import_jobs, run_import
+
+router = APIRouter()
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+@router.post("/songs", response_model=schemas.ImportJobStatus, status_code=202)
+def import_songs(
+    *,
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(..., description="NDJSON file or zip of chord sheets"),
+    current_user: models.User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Start importing songs from an NDJSON file, a chord sheet or a zip archive.
+    """
+    # Spool the upload to disk so the import can outlive the request
+    suffix = Path(file.filename or "").suffix
+    size = 0
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as target:
+        path = Path(target.name)
+        while chunk := file.file.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > settings.IMPORT_MAX_FILE_SIZE:
+                target.close()
+                path.unlink(missing_ok=True)
+                raise HTTPException(status_code=413, detail="Import file too large")
+            target.write(chunk)
+
+    job = import_jobs.add(
+        ImportJob(filename=file.filename or "upload", owner_id=current_user.id)
+    )
+    background_tasks.add_task(run_import, job, path)
+    return job
+
+
+@router.get("/{job_id}", response_model=schemas.ImportJobStatus)
+def read_import_job(
+    *,
+    job_id: str,
+    current_user: models.User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Get progress and per-record errors of an import job.
+    """
+    job = import_jobs.get(job_id)
+    if not job or job.owner_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
@@ -0,0 +1,132 @@
+"""
+Harmonic analysis endpoints.
+"""
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, field_validator
+from sqlalchemy.orm import Session
+
+from app.api.api_v1.endpoints.music.diagrams import get_readable_song
+from app.api.deps import get_current_active_user, get_read_db
+from app.core.config import settings
+from app.db.queries import query_budget
+from app.models.user import User
+from app.services.song import song_service
+from app.utils.harmony import ProgressionAnalysis, analyze_progression, parse_key
+
+router = APIRouter()
+
+
+def check_key(v: Optional[str]) -> Optional[str]:
+    """A key name, validated; raises ValueError."""
+    if v is not None:
+        parse_key(v)
+    return v
+
+
+class AnalysisRequest(BaseModel):
+    """Request model for analysing a chord progression."""
+    chords: List[str]
+    key: Optional[str] = None
+
+    @field_validator('key')
+    @classmethod
+    def validate_key(cls, v):
+        return check_key(v)
+
+
+class SongAnalysesRequest(BaseModel):
+    """Request model for analysing several songs."""
+    song_ids: List[int]
+
+
+class AnalyzedChordResponse(BaseModel):
+    """One chord relative to the key."""
+    chord: str
+    degree: Optional[int]
+    numeral: Optional[str]
+    function: Optional[str]
+    diatonic: bool
+    borrowed_from: Optional[str]
+
+
+class CadenceResponse(BaseModel):
+    """A cadence arriving on the chord at ``index``."""
+    index: int
+    kind: str
+
+
+class AnalysisResponse(BaseModel):
+    """Response model for a progression analysis."""
+    key: Optional[str]
+    numerals: List[Optional[str]]
+    chords: List[AnalyzedChordResponse]
+    borrowed: List[int]
+    cadences: List[CadenceResponse]
+
+
+def analysis_response(analysis: ProgressionAnalysis) -> AnalysisResponse:
+    """Response model for an analysis."""
+    return AnalysisResponse(
+        key=analysis.key,
+        numerals=[chord.numeral for chord in analysis.chords],
+        chords=[AnalyzedChordResponse(**chord._asdict()) for chord in analysis.chords],
+        borrowed=analysis.borrowed,
+        cadences=[CadenceResponse(**cadence._asdict()) for cadence in analysis.cadences],
+    )
+
+
+@router.post("/analyze", response_model=AnalysisResponse)
+def analyze_chords(
+    *,
+    request: AnalysisRequest,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Roman numeral analysis of a chord progression.
+
+    The key is detected when not given.
+    """
+    return analysis_response(analyze_progression(request.chords, request.key))
+
+
+@router.get("/songs/{song_id}/analysis", response_model=AnalysisResponse)
+@query_budget(1)
+def analyze_song(
+    *,
+    db: Session = Depends(get_read_db),
+    song_id: int,
+    key: Optional[str] = Query(None, description="Analyse in this key instead of the song's"),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Roman numeral analysis of a song's chords.
+
+    Uses the song's declared key, or the detected one. Each chord line is
+    a phrase for half cadences.
+    """
+    try:
+        check_key(key)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    song = get_readable_song(db, song_id, current_user)
+    return analysis_response(song_service.get_analysis(song, key=key))
+
+
+@router.post("/songs/analysis", response_model=Dict[int, AnalysisResponse])
+@query_budget(2)
+def analyze_songs(
+    *,
+    db: Session = Depends(get_read_db),
+    request: SongAnalysesRequest,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Analyses of many songs by ID; songs that do not exist or are private
+    to someone else are left out.
+    """
+    if len(request.song_ids) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail="Too many items")
+    analyses = song_service.get_analyses(db, ids=request.song_ids, user_id=current_user.id)
+    return {song_id: analysis_response(analysis) for song_id, analysis in analyses.items()}
@@ -0,0 +1,237 @@
+"""
+Chord diagram SVG endpoints.
+"""
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_active_user, get_read_db
+from app.core.config import settings
+from app.db.queries import query_budget
+from app.models.song import Song
+from app.models.user import User
+from app.services.chord import ResolvedDiagram, custom_chord_service
+from app.services.maintenance import record_chord_usage
+from app.services.song import song_service
+from app.utils.chord_diagrams import (
+    RenderedDiagram,
+    make_spec,
+    render_diagram,
+    render_sprite_sheet,
+    spec_from_definition,
+)
+from app.utils.music_theory import extract_sheet_chords
+
+router = APIRouter()
+
+SVG_MEDIA_TYPE = "image/svg+xml"
+# Diagram URLs carry their whole content, so they never change
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Stored chords and songs can be edited: always revalidate against the ETag
+REVALIDATE = "private, no-cache"
+
+
+def svg_response(request: Request, rendered: RenderedDiagram, cache_control: str) -> Response:
+    """SVG response with a strong ETag, or 304 when the client has it."""
+    etag = f'"{rendered.etag}"'
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip() for tag in if_none_match.split(",")) or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    return Response(content=rendered.svg, media_type=SVG_MEDIA_TYPE, headers=headers)
+
+
+def parse_positions(value: Optional[str]) -> Optional[List[int]]:
+    """Positions from a query string, e.g. "x32010" or "-1,3,2,0,1,0"."""
+    if not value:
+        return None
+    try:
+        if "," in value:
+            return [int(part) for part in value.split(",")]
+        return [-1 if char in "xX" else int(char) for char in value]
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid positions: {value}")
+
+
+@router.get("/diagram.svg", response_class=Response)
+def get_diagram(
+    request: Request,
+    frets: str = Query(..., description='Frets low string first, e.g. "x32010" or "-1,3,2,0,1,0"'),
+    fingers: Optional[str] = Query(None, description="Finger numbers, 0 for none"),
+    starting_fret: int = Query(1, ge=1, le=24),
+    tuning: str = Query("standard", description="Tuning name or comma-separated notes"),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Render a chord diagram as SVG.
+    """
+    try:
+        spec = make_spec(
+            parse_positions(frets),
+            parse_positions(fingers),
+            starting_fret,
+            tuning if "," not in tuning else tuning.split(","),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return svg_response(request, render_diagram(spec), IMMUTABLE)
+
+
+@router.get("/chords/{chord_id}/diagram.svg", response_class=Response)
+def get_custom_chord_diagram(
+    *,
+    request: Request,
+    db: Session = Depends(get_read_db),
+    chord_id: int,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Render a custom chord's diagram as SVG.
+    """
+    chord = custom_chord_service.get(db=db, id=chord_id)
+    if not chord:
+        raise HTTPException(status_code=404, detail="Chord not found")
+    if chord.user_id != current_user.id and not chord.is_verified:
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+    spec = spec_from_definition(
+        {
+            "fret_positions": chord.fret_positions,
+            "finger_positions": chord.finger_positions,
+            "starting_fret": chord.starting_fret,
+        }
+    )
+    if spec is None:
+        raise HTTPException(status_code=422, detail="Chord has no valid diagram")
+    return svg_response(request, render_diagram(spec), REVALIDATE)
+
+
+class ChordDiagramsRequest(BaseModel):
+    """Request model for resolving diagrams of a chord list."""
+    chords: List[str]
+
+
+class ChordDiagramResponse(BaseModel):
+    """The diagram chosen for one chord."""
+    chord: str
+    source: Optional[str]
+    chord_id: Optional[int] = None
+    fret_positions: Optional[List[int]] = None
+    finger_positions: Optional[List[int]] = None
+    starting_fret: Optional[int] = None
+    diagram_key: Optional[str] = None
+
+
+def get_readable_song(db: Session, song_id: int, user: User) -> Song:
+    """Song the user may read, or 404 / 400."""
+    song = song_service.get(db=db, id=song_id)
+    if not song:
+        raise HTTPException(status_code=404, detail="Song not found")
+    if not song.is_public and song.owner_id != user.id:
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+    return song
+
+
+def resolve_and_count(
+    db: Session,
+    background_tasks: BackgroundTasks,
+    chords: List[str],
+    user: User,
+    definitions: Optional[dict] = None,
+) -> List[ResolvedDiagram]:
+    """Resolve diagrams and count verified chord uses after the response."""
+    resolved = custom_chord_service.resolve_diagrams(
+        db, chords=chords, user_id=user.id, definitions=definitions
+    )
+    used = [item.chord_id for item in resolved if item.is_verified]
+    if used:
+        background_tasks.add_task(record_chord_usage, used)
+    return resolved
+
+
+def diagram_responses(resolved: List[ResolvedDiagram]) -> List[ChordDiagramResponse]:
+    """Response models for resolved diagrams."""
+    return [
+        ChordDiagramResponse(
+            chord=item.chord,
+            source=item.source,
+            chord_id=item.chord_id,
+            fret_positions=list(item.spec.frets) if item.spec else None,
+            finger_positions=list(item.spec.fingers) if item.spec and item.spec.fingers else None,
+            starting_fret=item.spec.starting_fret if item.spec else None,
+            diagram_key=item.spec.key if item.spec else None,
+        )
+        for item in resolved
+    ]
+
+
+@router.post("/chord-diagrams", response_model=List[ChordDiagramResponse])
+@query_budget(1)
+def resolve_chord_diagrams(
+    *,
+    db: Session = Depends(get_read_db),
+    request: ChordDiagramsRequest,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Best diagram for every distinct chord of a list.
+
+    The user's custom chords win over verified chords, then generated
+    voicings.
+    """
+    if len(request.chords) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail="Too many items")
+    return diagram_responses(resolve_and_count(db, background_tasks, request.chords, current_user))
+
+
+@router.get("/songs/{song_id}/chord-diagrams", response_model=List[ChordDiagramResponse])
+@query_budget(2)
+def resolve_song_chord_diagrams(
+    *,
+    db: Session = Depends(get_read_db),
+    song_id: int,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Best diagram for every distinct chord of a song, in order of appearance.
+
+    The song's own chord definitions come first, then the user's custom
+    chords, verified chords and generated voicings.
+    """
+    song = get_readable_song(db, song_id, current_user)
+    resolved = resolve_and_count(
+        db,
+        background_tasks,
+        extract_sheet_chords(song.lyrics_and_chords),
+        current_user,
+        song.chord_definitions,
+    )
+    return diagram_responses(resolved)
+
+
+@router.get("/songs/{song_id}/diagrams.svg", response_class=Response)
+@query_budget(2)
+def get_song_diagram_sheet(
+    *,
+    request: Request,
+    db: Session = Depends(get_read_db),
+    song_id: int,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    All of a song's chord diagrams as one SVG sprite sheet.
+    """
+    song = get_readable_song(db, song_id, current_user)
+    resolved = resolve_and_count(
+        db,
+        background_tasks,
+        extract_sheet_chords(song.lyrics_and_chords),
+        current_user,
+        song.chord_definitions,
+    )
+    sheet = render_sprite_sheet([(item.chord, item.spec) for item in resolved if item.spec])
+    return svg_response(request, sheet, REVALIDATE)
@@ -0,0 +1,83 @@
+"""
+Chord progression similarity endpoints.
+"""
+from typing import Any, List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.api.api_v1.endpoints.music.diagrams import get_readable_song
+from app.api.deps import get_current_active_user, get_read_db
+from app.db.queries import query_budget
+from app.models.user import User
+from app.services.song import song_service
+from app.utils.music_theory import extract_sheet_chords
+from app.utils.progressions import NGRAM_SIZE
+
+router = APIRouter()
+
+
+class ProgressionSearchRequest(BaseModel):
+    """Request model for finding songs with a progression."""
+    chords: List[str]
+
+
+class SimilarSongResponse(BaseModel):
+    """A song and the share of the query progression it contains."""
+    song: schemas.SongSummary
+    score: float
+
+
+def similar_responses(matches) -> List[SimilarSongResponse]:
+    """Response models for ``song_service.find_similar`` results."""
+    return [
+        SimilarSongResponse(song=schemas.SongSummary.model_validate(song), score=round(score, 3))
+        for song, score in matches
+    ]
+
+
+@router.post("/progressions/search", response_model=List[SimilarSongResponse])
+@query_budget(2)
+def search_progression(
+    *,
+    db: Session = Depends(get_read_db),
+    request: ProgressionSearchRequest,
+    limit: int = Query(10, ge=1, le=50),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Songs containing a chord progression in any key, best matches first.
+    """
+    if len(request.chords) < NGRAM_SIZE:
+        raise HTTPException(
+            status_code=400, detail=f"Need at least {NGRAM_SIZE} chords"
+        )
+    matches = song_service.find_similar(
+        db, chords=request.chords, user_id=current_user.id, limit=limit
+    )
+    return similar_responses(matches)
+
+
+@router.get("/songs/{song_id}/similar", response_model=List[SimilarSongResponse])
+@query_budget(3)
+def get_similar_songs(
+    *,
+    db: Session = Depends(get_read_db),
+    song_id: int,
+    limit: int = Query(10, ge=1, le=50),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Songs with the same chord progressions as a song, in any key.
+    """
+    song = get_readable_song(db, song_id, current_user)
+    matches = song_service.find_similar(
+        db,
+        chords=extract_sheet_chords(song.lyrics_and_chords),
+        user_id=current_user.id,
+        exclude_id=song.id,
+        limit=limit,
+    )
+    return similar_responses(matches)
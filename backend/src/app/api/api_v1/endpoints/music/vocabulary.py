@@ -0,0 +1,85 @@
+"""
+"Playable with the chords I know" search endpoints.
+"""
+from typing import Any, List
+
+from fastapi import APIRouter, Depends, Query
+from pydantic import BaseModel, field_validator
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.api.deps import get_current_active_user, get_read_db
+from app.db.queries import query_budget
+from app.models.user import User
+from app.services.song import song_service
+
+router = APIRouter()
+
+
+class PlayableSearchRequest(BaseModel):
+    """Request model for finding songs playable with a set of chords."""
+    chords: List[str]
+    max_capo: int = 0
+    transpose: bool = False
+
+    @field_validator('max_capo')
+    @classmethod
+    def validate_max_capo(cls, v):
+        if v < 0 or v > 11:
+            raise ValueError('max_capo must be between 0 and 11')
+        return v
+
+
+class PlayableSongResponse(BaseModel):
+    """A song and how to play it with the known chords."""
+    song: schemas.SongSummary
+    capo: int = 0
+    transpose: int = 0  # semitones to transpose the song by
+
+
+def search_shifts(max_capo: int, transpose: bool) -> List[int]:
+    """
+    Semitone moves to try, best first: as written, each capo position
+    (a capo at fret c plays shapes c semitones below the song), then the
+    smallest transpositions.
+    """
+    shifts = [0] + [-capo for capo in range(1, max_capo + 1)]
+    if transpose:
+        for step in range(1, 7):
+            for shift in (step, -step):
+                if shift % 12 not in {s % 12 for s in shifts}:
+                    shifts.append(shift)
+    return shifts
+
+
+@router.post("/playable-songs", response_model=List[PlayableSongResponse])
+@query_budget(2)
+def search_playable_songs(
+    *,
+    db: Session = Depends(get_read_db),
+    request: PlayableSearchRequest,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=100),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Public songs that use only the given chords, optionally with a capo or
+    after transposing.
+
+    Extended chords count as their basic chord (Cmaj7 as C) and slash
+    basses are ignored. Each result says which capo or transposition makes
+    it playable.
+    """
+    max_capo = request.max_capo
+    shifts = search_shifts(max_capo, request.transpose)
+    matches = song_service.get_playable_songs(
+        db, chords=request.chords, shifts=shifts, skip=skip, limit=limit
+    )
+    return [
+        PlayableSongResponse(
+            song=schemas.SongSummary.model_validate(song),
+            capo=-shift if -max_capo <= shift < 0 else 0,
+            transpose=shift if shift > 0 or shift < -max_capo else 0,
+        )
+        for song, shift in matches
+    ]
@@ -0,0 +1,189 @@
+"""
+Chord voicing, identification and capo endpoints.
+"""
+from typing import Any, Dict, List, Optional, Union
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, field_validator
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_active_user, get_read_db
+from app.models.user import User
+from app.services.song import song_service
+from app.utils.chord_identification import identify_chord
+from app.utils.music_theory import extract_sheet_chords, resolve_tuning, validate_chord_name
+from app.utils.voicings import get_fretboard, rank_capo_positions
+
+router = APIRouter()
+
+
+class VoicingResponse(BaseModel):
+    """A single playable fingering."""
+    frets: List[int]
+    base_fret: int
+    fingers: int
+    barre: Optional[int]
+    difficulty: float
+
+
+class VoicingsResponse(BaseModel):
+    """Response model for chord voicings."""
+    chord: str
+    voicings: List[VoicingResponse]
+
+
+class IdentifyRequest(BaseModel):
+    """Request model for naming a chord diagram."""
+    fret_positions: List[int]
+    starting_fret: int = 1
+    tuning: Union[str, List[str]] = "standard"
+
+    @field_validator('tuning')
+    @classmethod
+    def validate_tuning(cls, v):
+        return list(resolve_tuning(v))
+
+    @field_validator('fret_positions')
+    @classmethod
+    def validate_fret_positions(cls, v):
+        if any(fret < -1 or fret > 24 for fret in v):
+            raise ValueError('Each fret position must be an integer between -1 (muted) and 24')
+        return v
+
+
+class ChordMatchResponse(BaseModel):
+    """A candidate chord name."""
+    name: str
+    root: str
+    quality: str
+    bass: str
+    score: float
+
+
+class CapoRankingRequest(BaseModel):
+    """Request model for ranking capo positions."""
+    chords: List[str]
+    tuning: Union[str, List[str]] = "standard"
+    max_capo: int = 7
+
+    @field_validator('tuning')
+    @classmethod
+    def validate_tuning(cls, v):
+        return list(resolve_tuning(v))
+
+    @field_validator('max_capo')
+    @classmethod
+    def validate_max_capo(cls, v):
+        if v < 0 or v > 12:
+            raise ValueError('max_capo must be between 0 and 12')
+        return v
+
+
+class CapoOptionResponse(BaseModel):
+    """How the chords play with the capo at one fret."""
+    capo: int
+    open_chords: int
+    total_chords: int
+    difficulty: float
+    shapes: Dict[str, str]
+
+
+def get_tuning(tuning: str) -> List[str]:
+    """Resolve a tuning name or comma-separated notes from a query string."""
+    try:
+        return list(resolve_tuning(tuning if "," not in tuning else tuning.split(",")))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def capo_options(chords: List[str], tuning: List[str], max_capo: int) -> List[CapoOptionResponse]:
+    """Ranked capo options as response models."""
+    return [
+        CapoOptionResponse(**option._asdict())
+        for option in rank_capo_positions(chords, tuning, max_capo=max_capo)
+    ]
+
+
+@router.get("/voicings", response_model=VoicingsResponse)
+def get_voicings(
+    chord: str = Query(..., description="Chord name to voice"),
+    tuning: str = Query("standard", description="Tuning name or comma-separated notes"),
+    limit: int = Query(5, ge=1, le=40),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Get the easiest guitar voicings for a chord.
+
+    Frets are absolute and low string first; -1 is a muted string.
+    """
+    if not validate_chord_name(chord):
+        raise HTTPException(status_code=400, detail=f"Invalid chord name: {chord}")
+
+    voicings = get_fretboard(get_tuning(tuning)).voicings(chord, limit=limit)
+    return VoicingsResponse(
+        chord=chord,
+        voicings=[
+            VoicingResponse(
+                frets=list(voicing.frets),
+                base_fret=voicing.base_fret,
+                fingers=voicing.fingers,
+                barre=voicing.barre,
+                difficulty=voicing.difficulty,
+            )
+            for voicing in voicings
+        ],
+    )
+
+
+@router.post("/identify", response_model=List[ChordMatchResponse])
+def identify_chord_diagram(
+    *,
+    request: IdentifyRequest,
+    limit: int = Query(5, ge=1, le=20),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Name the chord played by a fret diagram, best candidates first.
+
+    Fretted notes are relative to ``starting_fret``; -1 is a muted string.
+    """
+    if len(request.fret_positions) != len(request.tuning):
+        raise HTTPException(
+            status_code=400, detail="Need one fret position per string of the tuning"
+        )
+    matches = identify_chord(
+        request.fret_positions, request.starting_fret, request.tuning, limit=limit
+    )
+    return [ChordMatchResponse(**match._asdict()) for match in matches]
+
+
+@router.post("/capo-ranking", response_model=List[CapoOptionResponse])
+def rank_capos(
+    *,
+    request: CapoRankingRequest,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Rank capo positions by how many of the chords become easy open shapes.
+    """
+    return capo_options(request.chords, request.tuning, request.max_capo)
+
+
+@router.get("/songs/{song_id}/capo-ranking", response_model=List[CapoOptionResponse])
+def rank_song_capos(
+    *,
+    db: Session = Depends(get_read_db),
+    song_id: int,
+    tuning: str = Query("standard", description="Tuning name or comma-separated notes"),
+    max_capo: int = Query(7, ge=0, le=12),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Rank capo positions for a song's chords.
+    """
+    song = song_service.get(db=db, id=song_id)
+    if not song:
+        raise HTTPException(status_code=404, detail="Song not found")
+    if not song.is_public and song.owner_id != current_user.id:
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+    return capo_options(extract_sheet_chords(song.lyrics_and_chords), get_tuning(tuning), max_capo)
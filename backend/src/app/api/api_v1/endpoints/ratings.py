@@ -7,7 +7,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
 from app import models, schemas
-from app.api.deps import get_current_active_user, get_db
+from app.api.deps import get_current_active_user, get_db, get_read_db
 from app.services.rating import rating_service
 from app.services.song import song_service
 
@@ -16,7 +16,7 @@ router = APIRouter()
 
 @router.get("/my", response_model=List[schemas.Rating])
 def read_my_ratings(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
     current_user: models.User = Depends(get_current_active_user),
@@ -33,7 +33,7 @@ def read_my_ratings(
 @router.get("/song/{song_id}", response_model=List[schemas.Rating])
 def read_song_ratings(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     song_id: int,
     skip: int = 0,
     limit: int = 100,
@@ -58,7 +58,7 @@ def read_song_ratings(
 @router.get("/song/{song_id}/stats")
 def get_song_rating_stats(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     song_id: int,
     current_user: models.User = Depends(get_current_active_user),
 ) -> Dict[str, Any]:
@@ -133,7 +133,7 @@ def update_rating(
 @router.get("/{rating_id}", response_model=schemas.Rating)
 def read_rating(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     rating_id: int,
     current_user: models.User = Depends(get_current_active_user),
 ) -> Any:
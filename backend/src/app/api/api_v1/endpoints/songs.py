@@ -1,13 +1,16 @@
 """
 Song management endpoints.
 """
-from typing import Any, List
+from typing import Any, Dict, List
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Body, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from app import models, schemas
-from app.api.deps import get_current_active_user, get_db
+from app.api.deps import get_current_active_user, get_current_admin_user, get_db, get_read_db
+from app.core.config import settings
+from app.schemas.bulk import merge_bulk_errors, parse_bulk_items
+from app.services.maintenance import record_song_view
 from app.services.song import song_service
 
 router = APIRouter()
@@ -15,7 +18,7 @@ router = APIRouter()
 
 @router.get("/", response_model=List[schemas.Song])
 def read_songs(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
     current_user: models.User = Depends(get_current_active_user),
@@ -30,7 +33,7 @@ def read_songs(
 @router.get("/search", response_model=List[schemas.Song])
 def search_songs(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     q: str = Query(None, description="Search query"),
     artist: str = Query(None, description="Artist filter"),
     genre: str = Query(None, description="Genre filter"),
@@ -62,7 +65,7 @@ def search_songs(
 
 @router.get("/popular", response_model=List[schemas.Song])
 def get_popular_songs(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     limit: int = Query(10, le=50, description="Number of songs to return"),
     current_user: models.User = Depends(get_current_active_user),
 ) -> Any:
@@ -75,7 +78,7 @@ def get_popular_songs(
 
 @router.get("/my", response_model=List[schemas.Song])
 def read_my_songs(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
     current_user: models.User = Depends(get_current_active_user),
@@ -105,6 +108,86 @@ def create_song(
     return song
 
 
+@router.post("/bulk", response_model=schemas.BulkOperationResult)
+def create_songs_bulk(
+    *,
+    db: Session = Depends(get_db),
+    songs_in: List[Dict[str, Any]] = Body(..., max_length=settings.BULK_MAX_ITEMS),
+    current_user: models.User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Create many songs. Invalid items are reported per index; the rest are created.
+    """
+    indexes, songs, errors = parse_bulk_items(songs_in, schemas.SongCreate)
+    result = song_service.create_many(
+        db=db, objs_in=songs, extra={"owner_id": current_user.id}
+    )
+    return merge_bulk_errors(result, indexes, errors)
+
+
+@router.put("/bulk", response_model=schemas.BulkOperationResult)
+def update_songs_bulk(
+    *,
+    db: Session = Depends(get_db),
+    songs_in: List[Dict[str, Any]] = Body(..., max_length=settings.BULK_MAX_ITEMS),
+    current_user: models.User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Update many of the current user's songs by ID.
+    """
+    indexes, songs, errors = parse_bulk_items(songs_in, schemas.SongBulkUpdate)
+    result = song_service.update_many(
+        db=db,
+        objs_in=[song.dict(exclude_unset=True) for song in songs],
+        scope={"owner_id": current_user.id},
+    )
+    return merge_bulk_errors(result, indexes, errors)
+
+
+@router.post("/bulk-delete", response_model=schemas.BulkOperationResult)
+def delete_songs_bulk(
+    *,
+    db: Session = Depends(get_db),
+    delete_in: schemas.BulkDelete,
+    current_user: models.User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Delete many of the current user's songs by ID.
+    """
+    if len(delete_in.ids) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail="Too many items")
+    return song_service.remove_many(
+        db=db, ids=delete_in.ids, scope={"owner_id": current_user.id}
+    )
+
+
+@router.post("/rebuild-progression-index")
+def rebuild_progression_index(
+    *,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Rebuild the progression similarity index. (Admin only)
+    """
+    return {"indexed": song_service.rebuild_progression_index(db)}
+
+
+@router.post("/vocabulary-backfill")
+def backfill_chord_vocabularies(
+    *,
+    db: Session = Depends(get_db),
+    only_missing: bool = Query(False, description="Skip songs that already have one"),
+    current_user: models.User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Compute every song's chord vocabulary from its sheet. (Admin only)
+    """
+    return {
+        "updated": song_service.backfill_chord_vocabularies(db, only_missing=only_missing)
+    }
+
+
 @router.put("/{song_id}", response_model=schemas.Song)
 def update_song(
     *,
@@ -128,8 +211,9 @@ def update_song(
 @router.get("/{song_id}", response_model=schemas.Song)
 def read_song(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     song_id: int,
+    background_tasks: BackgroundTasks,
     current_user: models.User = Depends(get_current_active_user),
 ) -> Any:
     """
@@ -143,9 +227,9 @@ def read_song(
     if not song.is_public and song.owner_id != current_user.id:
         raise HTTPException(status_code=400, detail="Not enough permissions")
     
-    # Increment view count if it's a public song
+    # Count a view of public songs on the primary once the response is sent
     if song.is_public:
-        song = song_service.increment_view_count(db=db, song_id=song_id)
+        background_tasks.add_task(record_song_view, song_id)
     
     return song
 
@@ -7,7 +7,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
 from app import models, schemas
-from app.api.deps import get_current_active_user, get_current_admin_user, get_db
+from app.api.deps import get_current_active_user, get_current_admin_user, get_db, get_read_db
 from app.services.user import user_service
 
 router = APIRouter()
@@ -15,7 +15,7 @@ router = APIRouter()
 
 @router.get("/", response_model=List[schemas.User])
 def read_users(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
     current_user: models.User = Depends(get_current_admin_user),
@@ -67,7 +67,7 @@ def update_user_me(
 
 @router.get("/me", response_model=schemas.User)
 def read_user_me(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_active_user),
 ) -> Any:
     """
@@ -80,7 +80,7 @@ def read_user_me(
 def read_user_by_id(
     user_id: int,
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ) -> Any:
     """
     Get a specific user by id.
@@ -13,6 +13,7 @@ from app import models, schemas
 from app.core import security
 from app.core.config import settings
 from app.db.base import get_db
+from app.db.routing import RoutingSession
 from app.services.user import user_service
 
 reusable_oauth2 = OAuth2PasswordBearer(
@@ -20,6 +21,13 @@ reusable_oauth2 = OAuth2PasswordBearer(
 )
 
 
+def get_read_db(db: Session = Depends(get_db)) -> Session:
+    """Database session whose reads may be served by a replica."""
+    if isinstance(db, RoutingSession):
+        db.use_replica()
+    return db
+
+
 def get_current_user(
     db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
 ) -> models.User:
@@ -31,6 +31,15 @@ class Settings(BaseSettings):
             return v
         raise ValueError(v)
 
+    # Host header allow-list; ["*"] disables the check
+    ALLOWED_HOSTS: List[str] = ["*"]
+
+    @field_validator("ALLOWED_HOSTS", mode="before")
+    def assemble_allowed_hosts(cls, v: Union[str, List[str]]) -> Union[List[str], str]:
+        if isinstance(v, str) and not v.startswith("["):
+            return [i.strip() for i in v.split(",") if i.strip()]
+        return v
+
     # Database Settings
     POSTGRES_SERVER: str = "localhost"
     POSTGRES_USER: str = "mychordhub"
@@ -53,6 +62,40 @@ class Settings(BaseSettings):
             f"{values.get('POSTGRES_DB', 'mychordhub')}"
         )
 
+    # Read replicas (comma-separated or JSON list); empty means primary only
+    DATABASE_REPLICA_URLS: List[str] = []
+    REPLICA_STICKY_SECONDS: int = 5  # read-your-writes window after a write
+
+    @field_validator("DATABASE_REPLICA_URLS", mode="before")
+    def assemble_replica_urls(cls, v: Union[str, List[str]]) -> Union[List[str], str]:
+        if isinstance(v, str) and not v.startswith("["):
+            return [i.strip() for i in v.split(",") if i.strip()]
+        return v
+
+    # Database Pool Settings (per process; size x workers must fit max_connections)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True
+
+    # Query Instrumentation
+    QUERY_REPEAT_THRESHOLD: int = 5  # identical statements per request flagged as N+1
+    QUERY_BUDGET_ENFORCE: bool = False  # raise instead of warn when a budget is exceeded
+
+    # Maintenance Jobs
+    SONG_COUNT_RECONCILE_INTERVAL: int = 3600  # seconds; 0 disables the job
+
+    # Bulk Operations
+    BULK_CHUNK_SIZE: int = 500  # rows per transaction
+    BULK_MAX_ITEMS: int = 5000  # rows per bulk API request
+
+    # Song Import
+    IMPORT_WORKERS: int = 2  # analysis processes; 0 analyzes in-process
+    IMPORT_MAX_FILE_SIZE: int = 500 * 1024 * 1024  # 500MB
+    IMPORT_MAX_ERRORS: int = 1000  # error messages kept per job
+    IMPORT_MAX_JOBS: int = 100  # finished jobs kept for status queries
+
     # Redis Settings
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
@@ -90,6 +133,11 @@ class Settings(BaseSettings):
     # Logging
     LOG_LEVEL: str = "INFO"
     LOG_FORMAT: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    LOG_JSON: bool = True  # structured JSON lines instead of LOG_FORMAT
+    LOG_MAX_BYTES: int = 50 * 1024 * 1024  # rotate log files at 50MB
+    LOG_BACKUP_COUNT: int = 5
+    LOG_REQUEST_SAMPLE_THRESHOLD: int = 100  # request logs/second kept in full
+    LOG_REQUEST_SAMPLE_RATE: int = 10  # beyond the threshold keep 1 in N requests
 
     class Config:
         env_file = ".env"
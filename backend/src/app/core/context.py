@@ -0,0 +1,61 @@
+"""
+Per-request context shared by middleware, logging and instrumentation.
+"""
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+
+class RequestContext:
+    """State for one HTTP request, created once by the ASGI middleware."""
+
+    __slots__ = (
+        "request_id",
+        "method",
+        "path",
+        "client_ip",
+        "started",
+        "status_code",
+        "route",
+        "query_count",
+        "query_time",
+        "statements",
+    )
+
+    def __init__(self, method: str, path: str, client_ip: Optional[str] = None):
+        self.request_id = str(uuid.uuid4())
+        self.method = method
+        self.path = path
+        self.client_ip = client_ip
+        self.started = time.perf_counter()
+        self.status_code: Optional[int] = None
+        self.route: Optional[str] = None
+        self.query_count = 0
+        self.query_time = 0.0
+        self.statements: Dict[str, int] = {}
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the request started."""
+        return time.perf_counter() - self.started
+
+
+_request_context: ContextVar[Optional[RequestContext]] = ContextVar(
+    "request_context", default=None
+)
+
+
+def get_request_context() -> Optional[RequestContext]:
+    """Return the context of the request being handled, if any."""
+    return _request_context.get()
+
+
+def set_request_context(context: Optional[RequestContext]):
+    """Bind a request context to the current task; returns a reset token."""
+    return _request_context.set(context)
+
+
+def reset_request_context(token) -> None:
+    """Restore the context that was active before ``set_request_context``."""
+    _request_context.reset(token)
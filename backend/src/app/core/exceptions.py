@@ -58,4 +58,15 @@ class RateLimitException(MyChordHubException):
     """Exception for rate limit errors."""
     
     def __init__(self, message: str = "Rate limit exceeded"):
-        super().__init__(message, status_code=429)
\ No newline at end of file
+        super().__init__(message, status_code=429)
+
+
+class QueryBudgetExceeded(MyChordHubException):
+    """Exception for endpoints issuing more SQL statements than declared."""
+    
+    def __init__(self, route: str, queries: int, budget: int):
+        super().__init__(
+            f"{route} issued {queries} SQL statements (budget {budget})",
+            status_code=500,
+            details={"route": route, "queries": queries, "budget": budget},
+        )
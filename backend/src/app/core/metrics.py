@@ -0,0 +1,184 @@
+"""
+Prometheus metrics for requests, database access, caches and the music engine.
+"""
+import os
+from typing import Callable, Dict, Iterable, List
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+from prometheus_client.registry import REGISTRY, Collector
+
+# Requests
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being handled",
+    multiprocess_mode="livesum",
+)
+
+# Database
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Duration of individual SQL statements",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request",
+    "Number of SQL statements issued per HTTP request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_time_per_request_seconds",
+    "Total SQL time per HTTP request",
+    ["route"],
+)
+DB_REPEATED_STATEMENTS = Counter(
+    "db_repeated_statements_total",
+    "Requests that repeated one statement shape at least QUERY_REPEAT_THRESHOLD times",
+    ["route"],
+)
+
+# Caches
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by cache and result",
+    ["cache", "result"],
+)
+
+# Music engine
+CHORDS_PARSED = Counter("chords_parsed_total", "Chord names parsed")
+CHORDS_TRANSPOSED = Counter("chords_transposed_total", "Chords transposed")
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Count one lookup against a named cache."""
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+class FunctionCacheCollector(Collector):
+    """Export hit/miss counts of ``functools.lru_cache`` wrapped functions."""
+
+    def __init__(self):
+        self._functions: Dict[str, Callable] = {}
+
+    def register(self, name: str, function: Callable) -> None:
+        """Track a memoized function under ``name``."""
+        self._functions[name] = function
+
+    def collect(self) -> Iterable:
+        requests = CounterMetricFamily(
+            "function_cache_requests",
+            "Memoized function lookups by result",
+            labels=["cache", "result"],
+        )
+        size = GaugeMetricFamily(
+            "function_cache_entries", "Entries held by memoized functions", labels=["cache"]
+        )
+        for name, function in self._functions.items():
+            info = function.cache_info()
+            requests.add_metric([name, "hit"], info.hits)
+            requests.add_metric([name, "miss"], info.misses)
+            size.add_metric([name], info.currsize)
+        yield requests
+        yield size
+
+
+class PoolStatsCollector(Collector):
+    """Export connection pool counters kept by ``app.db.pool.PoolStats``."""
+
+    def __init__(self, stats_source: Callable[[], Iterable]):
+        self._stats_source = stats_source
+
+    def collect(self) -> Iterable:
+        gauges = {
+            "checked_out": "Connections currently checked out",
+            "idle": "Idle connections in the pool",
+            "overflow": "Connections opened beyond pool_size",
+            "wait_time_max": "Longest wait for a connection in seconds",
+            "connect_time_max": "Slowest new connection in seconds",
+        }
+        counters = {
+            "checkouts": "Connection checkouts",
+            "connections_opened": "New DBAPI connections",
+            "connections_invalidated": "Invalidated connections",
+            "pre_ping_failures": "Stale connections found by pre-ping",
+        }
+        families = {
+            key: GaugeMetricFamily(f"db_pool_{key}", doc, labels=["pool"])
+            for key, doc in gauges.items()
+        }
+        families.update(
+            {
+                key: CounterMetricFamily(f"db_pool_{key}", doc, labels=["pool"])
+                for key, doc in counters.items()
+            }
+        )
+        for stats in self._stats_source():
+            snapshot = stats.snapshot()
+            for key, family in families.items():
+                if key in snapshot:
+                    family.add_metric([snapshot["name"]], snapshot[key])
+        yield from families.values()
+
+
+# Collectors reading this process's own state, which has no multiprocess files
+PROCESS_COLLECTORS: List[Collector] = []
+
+
+def register_process_collector(collector: Collector) -> None:
+    """Export a collector of in-process state, in multiprocess mode too."""
+    PROCESS_COLLECTORS.append(collector)
+    REGISTRY.register(collector)
+
+
+function_caches = FunctionCacheCollector()
+register_process_collector(function_caches)
+
+
+def render_metrics() -> bytes:
+    """
+    Render metrics, aggregating across workers in multiprocess mode.
+
+    Process collectors are added to the aggregated registry as they are, so
+    their samples describe the worker that served the scrape.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+        for collector in PROCESS_COLLECTORS:
+            registry.register(collector)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+__all__ = [
+    "CONTENT_TYPE_LATEST",
+    "REGISTRY",
+    "CACHE_REQUESTS",
+    "CHORDS_PARSED",
+    "CHORDS_TRANSPOSED",
+    "DB_QUERIES_PER_REQUEST",
+    "DB_QUERY_DURATION",
+    "DB_REPEATED_STATEMENTS",
+    "DB_TIME_PER_REQUEST",
+    "REQUESTS_IN_FLIGHT",
+    "REQUEST_LATENCY",
+    "PoolStatsCollector",
+    "function_caches",
+    "record_cache",
+    "register_process_collector",
+    "render_metrics",
+]
@@ -1,127 +1,190 @@
 """
 Custom middleware for the application.
-"""
-import time
-import uuid
-from typing import Callable
 
-from fastapi import Request, Response
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+Implemented as pure ASGI middleware: ``BaseHTTPMiddleware`` runs every request
+through an extra task and a wrapped response stream, which costs time per
+request and breaks streaming responses.
+"""
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from app.core.exceptions import MyChordHubException
+from app.core.config import settings
+from app.core.context import RequestContext, reset_request_context, set_request_context
+from app.core.exceptions import MyChordHubException, QueryBudgetExceeded
+from app.core.metrics import (
+    DB_QUERIES_PER_REQUEST,
+    DB_REPEATED_STATEMENTS,
+    DB_TIME_PER_REQUEST,
+    REQUEST_LATENCY,
+    REQUESTS_IN_FLIGHT,
+)
+from app.db.queries import get_query_budget, repeated_statements
 from app.utils.logger import get_logger
 
 logger = get_logger("middleware")
 
+SECURITY_HEADERS = [
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"referrer-policy", b"strict-origin-when-cross-origin"),
+]
+HSTS_HEADER = (b"strict-transport-security", b"max-age=31536000; includeSubDomains")
+
+
+class RequestContextMiddleware:
+    """
+    Single middleware layer for request IDs, timing, request logging,
+    metrics, security headers and application error handling.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        context = RequestContext(
+            method=scope["method"],
+            path=scope["path"],
+            client_ip=client[0] if client else None,
+        )
+        # Expose the request ID as request.state.request_id
+        scope.setdefault("state", {})["request_id"] = context.request_id
+        token = set_request_context(context)
+        extra_headers = list(SECURITY_HEADERS)
+        if scope.get("scheme") == "https":
+            extra_headers.append(HSTS_HEADER)
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                context.status_code = message["status"]
+                message["headers"] = [
+                    *message.get("headers", []),
+                    *extra_headers,
+                    (b"x-request-id", context.request_id.encode()),
+                    (b"x-process-time", str(round(context.elapsed, 4)).encode()),
+                ]
+                if settings.DEBUG:
+                    message["headers"].extend(self._query_headers(context))
+            await send(message)
 
-class ErrorHandlerMiddleware(BaseHTTPMiddleware):
-    """Middleware for handling application errors."""
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        """Process request and handle errors."""
+        logger.info(
+            "Request started",
+            extra={
+                "request_id": context.request_id,
+                "method": context.method,
+                "path": context.path,
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "client_ip": context.client_ip,
+            },
+        )
+        REQUESTS_IN_FLIGHT.inc()
         try:
-            response = await call_next(request)
-            return response
-        
-        except MyChordHubException as e:
-            logger.error(
-                f"Application error: {e.message}",
+            await self.app(scope, receive, send_with_headers)
+        except Exception as e:
+            if context.status_code is not None:
+                # Headers already went out; nothing sensible left to send
+                raise
+            await self._error_response(e, scope)(scope, receive, send_with_headers)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            self._observe(context, scope)
+            logger.info(
+                "Request completed",
                 extra={
-                    "status_code": e.status_code,
-                    "details": e.details,
-                    "path": request.url.path,
-                    "method": request.method
-                }
+                    "request_id": context.request_id,
+                    "status_code": context.status_code,
+                    "process_time": round(context.elapsed, 4),
+                    "db_queries": context.query_count,
+                },
             )
-            return JSONResponse(
-                status_code=e.status_code,
-                content={
-                    "error": e.message,
-                    "details": e.details,
-                    "status_code": e.status_code
-                }
+            reset_request_context(token)
+        self._check_queries(context, scope)
+
+    @staticmethod
+    def _query_headers(context: RequestContext) -> list:
+        """Debug headers summarizing the SQL issued so far."""
+        repeated = repeated_statements(context.statements, settings.QUERY_REPEAT_THRESHOLD)
+        return [
+            (b"x-db-query-count", str(context.query_count).encode()),
+            (b"x-db-query-time", str(round(context.query_time, 4)).encode()),
+            (b"x-db-repeated-statements", str(len(repeated)).encode()),
+        ]
+
+    @staticmethod
+    def _check_queries(context: RequestContext, scope: Scope) -> None:
+        """Flag likely N+1 patterns and enforce declared query budgets."""
+        repeated = repeated_statements(context.statements, settings.QUERY_REPEAT_THRESHOLD)
+        if repeated:
+            DB_REPEATED_STATEMENTS.labels(route=context.route).inc()
+            statement, count = repeated[0]
+            logger.warning(
+                "Repeated SQL statement",
+                extra={
+                    "request_id": context.request_id,
+                    "route": context.route,
+                    "repeats": count,
+                    "statement": statement[:500],
+                },
             )
-        
-        except Exception as e:
+        budget = get_query_budget(scope.get("route"))
+        if budget is None or context.query_count <= budget:
+            return
+        error = QueryBudgetExceeded(context.route, context.query_count, budget)
+        if settings.QUERY_BUDGET_ENFORCE:
+            raise error
+        logger.warning(error.message, extra={"request_id": context.request_id, **error.details})
+
+    @staticmethod
+    def _observe(context: RequestContext, scope: Scope) -> None:
+        """Record request metrics labelled by route template."""
+        # The router stores the matched route in the scope; unmatched paths
+        # share one label so raw URLs never become label values.
+        route = scope.get("route")
+        context.route = getattr(route, "path", None) or "unmatched"
+        REQUEST_LATENCY.labels(
+            method=context.method,
+            route=context.route,
+            status=str(context.status_code or 500),
+        ).observe(context.elapsed)
+        DB_QUERIES_PER_REQUEST.labels(route=context.route).observe(context.query_count)
+        DB_TIME_PER_REQUEST.labels(route=context.route).observe(context.query_time)
+
+    @staticmethod
+    def _error_response(error: Exception, scope: Scope) -> JSONResponse:
+        """Log an unhandled error and turn it into a JSON response."""
+        if isinstance(error, MyChordHubException):
             logger.error(
-                f"Unexpected error: {str(e)}",
+                f"Application error: {error.message}",
                 extra={
-                    "path": request.url.path,
-                    "method": request.method
+                    "status_code": error.status_code,
+                    "details": error.details,
+                    "path": scope["path"],
+                    "method": scope["method"],
                 },
-                exc_info=True
             )
             return JSONResponse(
-                status_code=500,
+                status_code=error.status_code,
                 content={
-                    "error": "Internal server error",
-                    "message": "An unexpected error occurred",
-                    "status_code": 500
-                }
+                    "error": error.message,
+                    "details": error.details,
+                    "status_code": error.status_code,
+                },
             )
-
-
-class LoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware for request/response logging."""
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        """Log request and response information."""
-        # Generate request ID
-        request_id = str(uuid.uuid4())
-        request.state.request_id = request_id
-        
-        # Log request
-        start_time = time.time()
-        logger.info(
-            f"Request started",
-            extra={
-                "request_id": request_id,
-                "method": request.method,
-                "path": request.url.path,
-                "query": str(request.query_params),
-                "client_ip": request.client.host if request.client else None
-            }
+        logger.error(
+            f"Unexpected error: {str(error)}",
+            extra={"path": scope["path"], "method": scope["method"]},
+            exc_info=True,
         )
-        
-        # Process request
-        response = await call_next(request)
-        
-        # Calculate processing time
-        process_time = time.time() - start_time
-        
-        # Log response
-        logger.info(
-            f"Request completed",
-            extra={
-                "request_id": request_id,
-                "status_code": response.status_code,
-                "process_time": round(process_time, 4)
-            }
+        return JSONResponse(
+            status_code=500,
+            content={
+                "error": "Internal server error",
+                "message": "An unexpected error occurred",
+                "status_code": 500,
+            },
         )
-        
-        # Add request ID to response headers
-        response.headers["X-Request-ID"] = request_id
-        response.headers["X-Process-Time"] = str(round(process_time, 4))
-        
-        return response
-
-
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    """Middleware for adding security headers."""
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        """Add security headers to response."""
-        response = await call_next(request)
-        
-        # Add security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        
-        # Add HSTS header for HTTPS
-        if request.url.scheme == "https":
-            response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        
-        return response
\ No newline at end of file
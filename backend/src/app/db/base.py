@@ -1,31 +1,61 @@
 """
 Database base configuration and session management.
 """
+import hashlib
+from typing import Optional
+
+from fastapi import Request
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.db.pool import engine_options, instrument_engine
+from app.db.queries import instrument_queries
+from app.db.routing import ReplicaStickiness, RoutingSession, create_replica_engines
 
 # Create SQLAlchemy engine
 engine = create_engine(
     str(settings.DATABASE_URL),
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
+    **engine_options(str(settings.DATABASE_URL)),
 )
+pool_stats = instrument_engine(engine, name="primary")
+instrument_queries()
+
+# Register primary and replica engines for read/write routing
+RoutingSession.primary_engine = engine
+RoutingSession.stickiness = ReplicaStickiness(settings.REPLICA_STICKY_SECONDS)
+replica_pool_stats = create_replica_engines()
 
 # Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Objects stay loaded after commit; writes return generated columns directly.
+SessionLocal = sessionmaker(
+    class_=RoutingSession,
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+    bind=engine,
+)
 
 # Create Base class for models
 Base = declarative_base()
 
 
-def get_db():
-    """Dependency to get database session."""
+def get_sticky_key(request: Request) -> Optional[str]:
+    """Identify the client for read-your-writes stickiness."""
+    identity = request.headers.get("authorization")
+    if not identity and request.client:
+        identity = request.client.host
+    if not identity:
+        return None
+    return hashlib.sha1(identity.encode()).hexdigest()
+
+
+def get_db(request: Request):
+    """Dependency to get database session (primary unless asked otherwise)."""
     db = SessionLocal()
+    db.sticky_key = get_sticky_key(request)
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -0,0 +1,167 @@
+"""
+Connection pool configuration and instrumentation.
+"""
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from app.core.config import settings
+
+
+class PoolStats:
+    """Thread-safe counters describing the state of one connection pool."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.checked_out = 0
+        self.connections_opened = 0
+        self.connections_invalidated = 0
+        self.pre_ping_failures = 0
+        self.checkouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.connect_time_total = 0.0
+        self.connect_time_max = 0.0
+        self._engine: Optional[Engine] = None
+
+    def record_wait(self, seconds: float) -> None:
+        """Record time spent waiting for a pooled connection."""
+        with self._lock:
+            self.checkouts += 1
+            self.wait_time_total += seconds
+            self.wait_time_max = max(self.wait_time_max, seconds)
+
+    def record_connect(self, seconds: float) -> None:
+        """Record latency of opening a new DBAPI connection."""
+        with self._lock:
+            self.connections_opened += 1
+            self.connect_time_total += seconds
+            self.connect_time_max = max(self.connect_time_max, seconds)
+
+    def adjust_checked_out(self, delta: int) -> None:
+        """Track connections currently handed out by the pool."""
+        with self._lock:
+            self.checked_out += delta
+
+    def record_invalidation(self) -> None:
+        """Record a connection being invalidated."""
+        with self._lock:
+            self.connections_invalidated += 1
+
+    def record_pre_ping_failure(self) -> None:
+        """Record a stale connection detected by ``pool_pre_ping``."""
+        with self._lock:
+            self.pre_ping_failures += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a point-in-time view of the pool counters."""
+        with self._lock:
+            data = {
+                "name": self.name,
+                "checked_out": self.checked_out,
+                "checkouts": self.checkouts,
+                "connections_opened": self.connections_opened,
+                "connections_invalidated": self.connections_invalidated,
+                "pre_ping_failures": self.pre_ping_failures,
+                "wait_time_avg": (
+                    self.wait_time_total / self.checkouts if self.checkouts else 0.0
+                ),
+                "wait_time_max": self.wait_time_max,
+                "connect_time_avg": (
+                    self.connect_time_total / self.connections_opened
+                    if self.connections_opened
+                    else 0.0
+                ),
+                "connect_time_max": self.connect_time_max,
+            }
+        pool = self._engine.pool if self._engine is not None else None
+        if isinstance(pool, QueuePool):
+            data.update(
+                {
+                    "size": pool.size(),
+                    "idle": pool.checkedin(),
+                    "overflow": pool.overflow(),
+                }
+            )
+        return data
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that measures how long callers wait for a connection."""
+
+    stats: Optional[PoolStats] = None
+
+    def _do_get(self):  # type: ignore[override]
+        start = time.perf_counter()
+        record = super()._do_get()
+        if self.stats is not None:
+            self.stats.record_wait(time.perf_counter() - start)
+        return record
+
+    def recreate(self) -> "InstrumentedQueuePool":
+        """Keep stats attached when the engine is disposed."""
+        pool = super().recreate()
+        pool.stats = self.stats  # type: ignore[attr-defined]
+        return pool  # type: ignore[return-value]
+
+
+_connect_started = threading.local()
+
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """Build ``create_engine`` pool options from settings."""
+    if url.startswith("sqlite"):
+        # SQLite uses its own single-file pool; sizing options do not apply.
+        return {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def instrument_engine(engine: Engine, name: str = "primary") -> PoolStats:
+    """Attach pool event listeners to an engine and return its stats."""
+    stats = PoolStats(name)
+    pool = engine.pool
+    stats._engine = engine
+    if isinstance(pool, InstrumentedQueuePool):
+        pool.stats = stats
+
+    @event.listens_for(engine, "do_connect")
+    def _on_do_connect(dialect, conn_rec, cargs, cparams):
+        _connect_started.value = time.perf_counter()
+
+    @event.listens_for(pool, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        started = getattr(_connect_started, "value", None)
+        if started is not None:
+            stats.record_connect(time.perf_counter() - started)
+            _connect_started.value = None
+
+    @event.listens_for(pool, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        stats.adjust_checked_out(1)
+
+    @event.listens_for(pool, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        stats.adjust_checked_out(-1)
+
+    @event.listens_for(engine, "handle_error")
+    def _on_handle_error(context):
+        if getattr(context, "is_pre_ping", False) and context.is_disconnect:
+            stats.record_pre_ping_failure()
+
+    @event.listens_for(pool, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        stats.record_invalidation()
+
+    return stats
@@ -0,0 +1,84 @@
+"""
+Per-statement SQL instrumentation.
+
+Listeners are attached to the ``Engine`` class, so the primary, replica and
+any test engines are all covered. Statement counts, time and shapes are added
+to the current request's context and exported as Prometheus metrics.
+
+Statements are compiled with bound parameters, so the SQL text is the shape:
+the same text repeated many times in one request is the signature of an N+1
+lazy load.
+"""
+import time
+from typing import Any, Callable, List, Optional, Tuple, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.context import get_request_context
+from app.core.metrics import DB_QUERY_DURATION
+
+_installed = False
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_start"].pop()
+    elapsed = time.perf_counter() - started
+    DB_QUERY_DURATION.observe(elapsed)
+    request = get_request_context()
+    if request is not None:
+        request.query_count += 1
+        request.query_time += elapsed
+        request.statements[statement] = request.statements.get(statement, 0) + 1
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_start"):
+        connection.info["query_start"].pop()
+
+
+def instrument_queries() -> None:
+    """Install the statement listeners once per process."""
+    global _installed
+    if _installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+    _installed = True
+
+
+Endpoint = TypeVar("Endpoint", bound=Callable[..., Any])
+
+
+def query_budget(max_queries: int) -> Callable[[Endpoint], Endpoint]:
+    """
+    Declare the most SQL statements an endpoint may issue per request.
+
+    Apply below the router decorator. Exceeding the budget is logged, and
+    raises ``QueryBudgetExceeded`` when ``QUERY_BUDGET_ENFORCE`` is set (as
+    in the test suite).
+    """
+
+    def decorate(endpoint: Endpoint) -> Endpoint:
+        endpoint.query_budget = max_queries
+        return endpoint
+
+    return decorate
+
+
+def get_query_budget(route: Any) -> Optional[int]:
+    """Budget declared on a matched route's endpoint, if any."""
+    return getattr(getattr(route, "endpoint", None), "query_budget", None)
+
+
+def repeated_statements(statements: dict, threshold: int) -> List[Tuple[str, int]]:
+    """Statement shapes executed at least ``threshold`` times, most frequent first."""
+    repeated = [(sql, count) for sql, count in statements.items() if count >= threshold]
+    return sorted(repeated, key=lambda item: item[1], reverse=True)
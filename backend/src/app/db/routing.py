@@ -0,0 +1,118 @@
+"""
+Read-replica routing for database sessions.
+"""
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.dml import UpdateBase
+
+from app.core.config import settings
+from app.db.pool import PoolStats, engine_options, instrument_engine
+
+
+class ReplicaStickiness:
+    """Remembers clients that wrote recently so their reads see their writes."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._marks: Dict[str, float] = {}
+
+    def mark(self, key: Optional[str]) -> None:
+        """Pin a client to the primary for the next ``ttl`` seconds."""
+        if not key or self.ttl <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._marks[key] = now + self.ttl
+            if len(self._marks) > 10000:
+                self._marks = {k: v for k, v in self._marks.items() if v > now}
+
+    def is_sticky(self, key: Optional[str]) -> bool:
+        """Check whether a client must still read from the primary."""
+        if not key:
+            return False
+        with self._lock:
+            expires = self._marks.get(key)
+            if expires is None:
+                return False
+            if expires <= time.monotonic():
+                del self._marks[key]
+                return False
+            return True
+
+
+class RoutingSession(Session):
+    """
+    Session that sends read-only work to a replica and everything else to the
+    primary engine.
+
+    A session starts in primary mode. Callers opt into replica reads with
+    :meth:`use_replica`; any flush or DML statement switches the session back
+    to the primary for the rest of its life and marks ``sticky_key`` so the
+    same client keeps reading from the primary until replicas catch up.
+    """
+
+    primary_engine: Engine
+    replica_engines: List[Engine] = []
+    stickiness: Optional[ReplicaStickiness] = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.read_only = False
+        self.sticky_key: Optional[str] = None
+        self._replica: Optional[Engine] = None
+        self._has_written = False
+
+    def use_replica(self) -> "RoutingSession":
+        """Route reads to a replica unless the client wrote recently."""
+        if self._has_written or not self.replica_engines:
+            return self
+        if self.stickiness is not None and self.stickiness.is_sticky(self.sticky_key):
+            return self
+        self.read_only = True
+        return self
+
+    def use_primary(self) -> "RoutingSession":
+        """Force all further statements to the primary."""
+        self.read_only = False
+        return self
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        """Pick the engine for a statement."""
+        if self._flushing or isinstance(clause, UpdateBase):
+            self._record_write()
+            return self.primary_engine
+        if self.read_only and (clause is None or isinstance(clause, Select)):
+            if self._replica is None:
+                self._replica = random.choice(self.replica_engines)
+            return self._replica
+        return self.primary_engine
+
+    def _record_write(self) -> None:
+        """Switch to the primary and pin the client there for a while."""
+        self.read_only = False
+        if self._has_written:
+            return
+        self._has_written = True
+        if self.stickiness is not None:
+            self.stickiness.mark(self.sticky_key)
+
+
+def create_replica_engines() -> Dict[str, PoolStats]:
+    """Create configured replica engines and register them for routing."""
+    stats: Dict[str, PoolStats] = {}
+    engines: List[Engine] = []
+    for index, url in enumerate(settings.DATABASE_REPLICA_URLS):
+        engine = create_engine(url, **engine_options(url))
+        name = f"replica-{index}"
+        stats[name] = instrument_engine(engine, name=name)
+        engines.append(engine)
+    RoutingSession.replica_engines = engines
+    return stats
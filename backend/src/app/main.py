@@ -1,14 +1,24 @@
 """
 FastAPI main application.
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 
 from app.api.api_v1.api import api_router
 from app.core.config import settings
-from app.core.middleware import ErrorHandlerMiddleware, LoggingMiddleware, SecurityHeadersMiddleware
+from app.core.metrics import (
+    CONTENT_TYPE_LATEST,
+    PoolStatsCollector,
+    register_process_collector,
+    render_metrics,
+)
+from app.core.middleware import RequestContextMiddleware
+from app.db.base import pool_stats, replica_pool_stats
+from app.services.maintenance import start_maintenance, stop_maintenance
+from app.services.song_import import shutdown_executor
 from app.utils.logger import setup_logging
+from app.utils.voicings import warm_fretboard
 
 # Setup logging
 setup_logging()
@@ -23,10 +33,8 @@ app = FastAPI(
     redoc_url=f"{settings.API_V1_STR}/redoc",
 )
 
-# Add custom middleware (order matters - first added, last executed)
-app.add_middleware(SecurityHeadersMiddleware)
-app.add_middleware(ErrorHandlerMiddleware)
-app.add_middleware(LoggingMiddleware)
+# Request ID, timing, logging, security headers and error handling in one layer
+app.add_middleware(RequestContextMiddleware)
 
 # Set all CORS enabled origins
 if settings.BACKEND_CORS_ORIGINS:
@@ -38,12 +46,27 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_headers=["*"],
     )
 
-# Add trusted host middleware for security
-app.add_middleware(TrustedHostMiddleware, allowed_hosts=["*"])
+# Add trusted host middleware for security (allowing "*" would make it a no-op)
+if "*" not in settings.ALLOWED_HOSTS:
+    app.add_middleware(TrustedHostMiddleware, allowed_hosts=settings.ALLOWED_HOSTS)
+
+# Export connection pool counters alongside request metrics
+register_process_collector(
+    PoolStatsCollector(lambda: [pool_stats, *replica_pool_stats.values()])
+)
 
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+# Periodic maintenance jobs
+app.add_event_handler("startup", start_maintenance)
+app.add_event_handler("shutdown", stop_maintenance)
+# Import worker processes
+app.add_event_handler("shutdown", shutdown_executor)
+
+# Precompute the voicing index before serving requests
+app.add_event_handler("startup", warm_fretboard)
+
 
 @app.get("/")
 async def root():
@@ -58,4 +81,19 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy", "service": "mychordhub-backend"}
\ No newline at end of file
+    return {"status": "healthy", "service": "mychordhub-backend"}
+
+
+@app.get("/health/db-pool")
+async def db_pool_status():
+    """Connection pool statistics."""
+    return {
+        "primary": pool_stats.snapshot(),
+        "replicas": [stats.snapshot() for stats in replica_pool_stats.values()],
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics."""
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
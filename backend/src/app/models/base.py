@@ -12,6 +12,10 @@ class Base:
     """Base class for all database models."""
     
     __allow_unmapped__ = True
+
+    # Fetch server-generated values with RETURNING in the INSERT/UPDATE itself
+    # (SQLAlchemy falls back to a SELECT on backends without RETURNING)
+    __mapper_args__ = {"eager_defaults": True}
     
     # Generate __tablename__ automatically
     @declared_attr
@@ -19,6 +23,6 @@ class Base:
         return cls.__name__.lower()
 
     # Common fields for all models
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
\ No newline at end of file
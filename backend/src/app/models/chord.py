@@ -1,7 +1,7 @@
 """
 Custom chord model for storing user-defined chord diagrams.
 """
-from sqlalchemy import Column, ForeignKey, Integer, String, JSON, Boolean
+from sqlalchemy import Column, ForeignKey, Index, Integer, String, JSON, Boolean, Table
 from sqlalchemy.orm import relationship
 
 from app.models.base import Base
@@ -27,16 +27,56 @@ class CustomChord(Base):
     difficulty = Column(String(20), nullable=True)  # Easy, Medium, Hard
     is_barre_chord = Column(Boolean, default=False, nullable=False)
     alternative_names = Column(JSON, nullable=True)  # Array of alternative chord names
+    identified_name = Column(String(50), nullable=True)  # Name derived from the frets, if a known chord
+    shape_fingerprint = Column(String(80), nullable=True)  # Absolute frets and tuning, see shape_fingerprint()
+    # Set when this chord is a user's copy of another chord's shape
+    canonical_id = Column(Integer, ForeignKey("custom_chords.id", ondelete="SET NULL"), nullable=True)
     
     # Usage and validation
     is_verified = Column(Boolean, default=False, nullable=False)  # Admin verified
     usage_count = Column(Integer, default=0, nullable=False)  # How often this chord is used
     
     # Foreign Keys
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     # Relationships
     user = relationship("User", back_populates="custom_chords")
+
+    # Indexes follow the service query shapes (see migration 003)
+    __table_args__ = (
+        # A user's chords, and lookups by (user, name)
+        Index('ix_custom_chords_user_name', 'user_id', 'name'),
+        # get_verified_chords / search_by_name: verified chords by usage
+        Index(
+            'ix_custom_chords_verified_usage',
+            usage_count.desc(),
+            postgresql_where=is_verified == True,
+            sqlite_where=is_verified == True,
+        ),
+        # Creation and merge_duplicate_shapes: canonical chords by shape
+        Index(
+            'ix_custom_chords_shape',
+            'shape_fingerprint',
+            postgresql_where=canonical_id.is_(None),
+            sqlite_where=canonical_id.is_(None),
+        ),
+    )
     
     def __repr__(self) -> str:
-        return f"<CustomChord(id={self.id}, name='{self.name}', user_id={self.user_id})>"
\ No newline at end of file
+        return f"<CustomChord(id={self.id}, name='{self.name}', user_id={self.user_id})>"
+
+
+# Chord name lookup index: one row per searchable spelling of a chord (its
+# name, alternative names and identified name, keyed by chord_lookup_key).
+# Keys compare bytewise on PostgreSQL so prefix ranges use the index.
+chord_names = Table(
+    'chord_names',
+    Base.metadata,
+    Column(
+        'name_key',
+        String(50).with_variant(String(50, collation='C'), 'postgresql'),
+        primary_key=True,
+    ),
+    Column('chord_id', Integer, ForeignKey('custom_chords.id', ondelete='CASCADE'), primary_key=True),
+    Index('ix_chord_names_chord_id', 'chord_id'),
+)
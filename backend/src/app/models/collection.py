@@ -1,7 +1,7 @@
 """
 Collection model for organizing saved songs.
 """
-from sqlalchemy import Column, ForeignKey, Integer, String, Text, Boolean
+from sqlalchemy import Column, ForeignKey, Index, Integer, String, Text, Boolean
 from sqlalchemy.orm import relationship
 
 from app.models.base import Base
@@ -19,14 +19,31 @@ class Collection(Base):
     is_public = Column(Boolean, default=False, nullable=False)
     
     # Metadata
-    song_count = Column(Integer, default=0, nullable=False)  # Cached count for performance
+    # Cached count, changed by atomic UPDATEs alongside collection_songs writes
+    # and repaired by CollectionService.reconcile_song_counts
+    song_count = Column(Integer, default=0, nullable=False)
     
     # Foreign Keys
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     
     # Relationships
     user = relationship("User", back_populates="collections")
-    songs = relationship("Song", secondary=collection_songs, back_populates="collections")
+    songs = relationship(
+        "Song",
+        secondary=collection_songs,
+        back_populates="collections",
+        order_by=collection_songs.c.position,
+    )
+
+    __table_args__ = (
+        # get_public_collections
+        Index(
+            'ix_collections_public',
+            'id',
+            postgresql_where=is_public == True,
+            sqlite_where=is_public == True,
+        ),
+    )
     
     def __repr__(self) -> str:
         return f"<Collection(id={self.id}, name='{self.name}', user_id={self.user_id})>"
\ No newline at end of file
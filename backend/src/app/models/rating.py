@@ -1,7 +1,7 @@
 """
 Rating model for song ratings and reviews.
 """
-from sqlalchemy import Column, ForeignKey, Integer, Float, Text, Boolean, UniqueConstraint
+from sqlalchemy import Column, ForeignKey, Index, Integer, Float, Text, Boolean, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from app.models.base import Base
@@ -21,8 +21,9 @@ class Rating(Base):
     helpful_count = Column(Integer, default=0, nullable=False)  # How many found this helpful
     
     # Foreign Keys
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
-    song_id = Column(Integer, ForeignKey("songs.id"), nullable=False, index=True)
+    # Lookups by user use unique_user_song_rating, by song ix_ratings_song_verified
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    song_id = Column(Integer, ForeignKey("songs.id"), nullable=False)
     
     # Relationships
     user = relationship("User", back_populates="ratings")
@@ -31,6 +32,8 @@ class Rating(Base):
     # Constraints
     __table_args__ = (
         UniqueConstraint('user_id', 'song_id', name='unique_user_song_rating'),
+        # Verified ratings of a song, with the score for rating stats
+        Index('ix_ratings_song_verified', 'song_id', 'is_verified', 'score'),
     )
     
     def __repr__(self) -> str:
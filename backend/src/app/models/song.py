@@ -1,7 +1,7 @@
 """
 Song model for storing guitar tabs and chord charts.
 """
-from sqlalchemy import Column, ForeignKey, Integer, String, Text, Float, Boolean, JSON
+from sqlalchemy import BigInteger, Column, ForeignKey, Index, Integer, String, Text, Float, Boolean, JSON
 from sqlalchemy.orm import relationship
 
 from app.models.base import Base
@@ -31,6 +31,7 @@ class Song(Base):
     tablature = Column(Text, nullable=True)  # Optional guitar tablature
     chord_definitions = Column(JSON, nullable=True)  # Custom chord diagrams
     song_structure = Column(JSON, nullable=True)  # Verse, Chorus, Bridge sections
+    chord_vocabulary = Column(BigInteger, nullable=True)  # Distinct chords as a bitmap, see app.utils.vocabulary
     
     # Metadata
     description = Column(Text, nullable=True)
@@ -50,17 +51,56 @@ class Song(Base):
     owner = relationship("User", back_populates="songs")
     ratings = relationship("Rating", back_populates="song", cascade="all, delete-orphan")
     collections = relationship("Collection", secondary="collection_songs", back_populates="songs")
+
+    # Indexes follow the service query shapes (see migration 003)
+    __table_args__ = (
+        # get_public_songs: public songs in id order; chord_vocabulary
+        # covers get_playable_songs' bitmap test (see migration 008)
+        Index(
+            'ix_songs_public',
+            'id',
+            'chord_vocabulary',
+            postgresql_where=is_public == True,
+            sqlite_where=is_public == True,
+        ),
+        # get_popular_songs: public songs by view count, then rating
+        Index(
+            'ix_songs_public_popularity',
+            view_count.desc(),
+            average_rating.desc(),
+            postgresql_where=is_public == True,
+            sqlite_where=is_public == True,
+        ),
+    )
     
     def __repr__(self) -> str:
         return f"<Song(id={self.id}, title='{self.title}', artist='{self.artist}')>"
 
 
-# Association table for many-to-many relationship between Collections and Songs
+# Association table for many-to-many relationship between Collections and Songs.
+# Each entry is a setlist slot: ``position`` is a gap-based rank (see
+# CollectionService), ``transpose``/``capo`` override the song for this setlist.
 from sqlalchemy import Table
 
 collection_songs = Table(
     'collection_songs',
     Base.metadata,
     Column('collection_id', Integer, ForeignKey('collections.id'), primary_key=True),
-    Column('song_id', Integer, ForeignKey('songs.id'), primary_key=True)
+    Column('song_id', Integer, ForeignKey('songs.id'), primary_key=True),
+    Column('position', Integer, default=0, server_default='0', nullable=False),
+    Column('transpose', Integer, default=0, server_default='0', nullable=False),
+    Column('capo', Integer, nullable=True),
+    Index('ix_collection_songs_collection_position', 'collection_id', 'position'),
+    Index('ix_collection_songs_song_id', 'song_id'),
+)
+
+
+# Inverted index of song progressions: one row per distinct key-invariant
+# chord n-gram of a song (see app.utils.progressions)
+song_ngrams = Table(
+    'song_ngrams',
+    Base.metadata,
+    Column('ngram', String(16), primary_key=True),
+    Column('song_id', Integer, ForeignKey('songs.id', ondelete='CASCADE'), primary_key=True),
+    Index('ix_song_ngrams_song_id', 'song_id'),
 )
\ No newline at end of file
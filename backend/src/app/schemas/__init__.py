@@ -2,17 +2,26 @@
 Pydantic schemas for API request/response models.
 """
 from .user import User, UserCreate, UserUpdate, UserInDB
-from .song import Song, SongCreate, SongUpdate, SongInDB
-from .chord import CustomChord, CustomChordCreate, CustomChordUpdate
-from .collection import Collection, CollectionCreate, CollectionUpdate, CollectionWithSongs
+from .song import Song, SongCreate, SongUpdate, SongInDB, SongBulkUpdate, SongSummary
+from .chord import CustomChord, CustomChordCreate, CustomChordUpdate, CustomChordBulkUpdate
+from .collection import (
+    Collection, CollectionCreate, CollectionUpdate, CollectionWithSongs, CollectionSongIds,
+    CollectionSongEntry, CollectionSongEntryUpdate, Setlist, SetlistEntry,
+)
 from .rating import Rating, RatingCreate, RatingUpdate
 from .token import Token, TokenPayload
+from .bulk import BulkDelete, BulkItemError, BulkOperationResult
+from .song_import import ImportJobStatus
 
 __all__ = [
     "User", "UserCreate", "UserUpdate", "UserInDB",
-    "Song", "SongCreate", "SongUpdate", "SongInDB", 
-    "CustomChord", "CustomChordCreate", "CustomChordUpdate",
+    "Song", "SongCreate", "SongUpdate", "SongInDB", "SongBulkUpdate", "SongSummary",
+    "CustomChord", "CustomChordCreate", "CustomChordUpdate", "CustomChordBulkUpdate",
     "Collection", "CollectionCreate", "CollectionUpdate", "CollectionWithSongs",
+    "CollectionSongIds", "CollectionSongEntry", "CollectionSongEntryUpdate",
+    "Setlist", "SetlistEntry",
     "Rating", "RatingCreate", "RatingUpdate",
-    "Token", "TokenPayload"
+    "Token", "TokenPayload",
+    "BulkDelete", "BulkItemError", "BulkOperationResult",
+    "ImportJobStatus",
 ]
\ No newline at end of file
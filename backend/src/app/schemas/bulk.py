@@ -0,0 +1,63 @@
+"""
+Bulk operation Pydantic schemas.
+"""
+from typing import Any, Dict, List, Sequence, Tuple, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+SchemaType = TypeVar("SchemaType", bound=BaseModel)
+
+
+class BulkItemError(BaseModel):
+    """Error for a single item of a bulk request."""
+    index: int
+    error: str
+
+
+class BulkOperationResult(BaseModel):
+    """Outcome of a bulk create/update/delete."""
+    ids: List[int] = []
+    errors: List[BulkItemError] = []
+
+
+class BulkDelete(BaseModel):
+    """Schema for bulk delete requests."""
+    ids: List[int]
+
+
+def parse_bulk_items(
+    items: Sequence[Dict[str, Any]], schema: Type[SchemaType]
+) -> Tuple[List[int], List[SchemaType], List[BulkItemError]]:
+    """
+    Validate raw bulk items one by one.
+
+    Returns the original indexes of the valid items, the parsed items and
+    the validation errors for the rest.
+    """
+    indexes: List[int] = []
+    parsed: List[SchemaType] = []
+    errors: List[BulkItemError] = []
+    for index, item in enumerate(items):
+        try:
+            parsed.append(schema(**item))
+            indexes.append(index)
+        except ValidationError as e:
+            errors.append(
+                BulkItemError(index=index, error=e.errors()[0]["msg"])
+            )
+    return indexes, parsed, errors
+
+
+def merge_bulk_errors(
+    result: BulkOperationResult,
+    indexes: Sequence[int],
+    validation_errors: Sequence[BulkItemError],
+) -> BulkOperationResult:
+    """Map write errors back to request indexes and add validation errors."""
+    errors = [
+        BulkItemError(index=indexes[error.index], error=error.error)
+        for error in result.errors
+    ]
+    errors.extend(validation_errors)
+    errors.sort(key=lambda error: error.index)
+    return BulkOperationResult(ids=result.ids, errors=errors)
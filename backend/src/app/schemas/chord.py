@@ -63,10 +63,17 @@ class CustomChordUpdate(BaseModel):
     alternative_names: Optional[List[str]] = None
 
 
+class CustomChordBulkUpdate(CustomChordUpdate):
+    """Schema for one item of a bulk custom chord update."""
+    id: int
+
+
 class CustomChordInDBBase(CustomChordBase):
     """Base custom chord schema with database fields."""
     id: int
     user_id: int
+    identified_name: Optional[str] = None
+    canonical_id: Optional[int] = None
     is_verified: bool = False
     usage_count: int = 0
 
@@ -4,7 +4,7 @@ Collection Pydantic schemas.
 from typing import List, Optional
 from pydantic import BaseModel, field_validator
 
-from .song import Song
+from .song import SongSummary
 
 
 class CollectionBase(BaseModel):
@@ -34,6 +34,48 @@ class CollectionUpdate(BaseModel):
     is_public: Optional[bool] = None
 
 
+class CollectionSongIds(BaseModel):
+    """Schema for adding or removing many songs of a collection."""
+    song_ids: List[int]
+
+
+class CollectionSongEntry(BaseModel):
+    """Position and per-entry overrides of one song in a collection."""
+    song_id: int
+    position: int
+    transpose: int = 0
+    capo: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+
+class CollectionSongEntryUpdate(BaseModel):
+    """
+    Schema for changing one entry of a setlist.
+
+    Setting ``after_song_id`` moves the song after that song (null moves it
+    to the top); ``capo`` null clears the override.
+    """
+    after_song_id: Optional[int] = None
+    transpose: Optional[int] = None
+    capo: Optional[int] = None
+
+    @field_validator('transpose')
+    @classmethod
+    def validate_transpose(cls, v):
+        if v is not None and (v < -11 or v > 11):
+            raise ValueError('Transpose must be between -11 and 11 semitones')
+        return v
+
+    @field_validator('capo')
+    @classmethod
+    def validate_capo(cls, v):
+        if v is not None and (v < 0 or v > 12):
+            raise ValueError('Capo position must be between 0 and 12')
+        return v
+
+
 class CollectionInDBBase(CollectionBase):
     """Base collection schema with database fields."""
     id: int
@@ -49,6 +91,21 @@ class Collection(CollectionInDBBase):
     pass
 
 
+class SetlistEntry(BaseModel):
+    """One song of a setlist, transposed for this entry."""
+    position: int
+    transpose: int = 0
+    capo: int = 0
+    key: Optional[str] = None
+    song: SongSummary
+    lyrics_and_chords: str
+
+
+class Setlist(Collection):
+    """Collection schema with its songs in setlist order."""
+    entries: List[SetlistEntry] = []
+
+
 class CollectionWithSongs(Collection):
-    """Collection schema with songs included."""
-    songs: List[Song] = []
\ No newline at end of file
+    """Collection schema with one page of song summaries included."""
+    songs: List[SongSummary] = []
\ No newline at end of file
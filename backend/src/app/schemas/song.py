@@ -85,6 +85,11 @@ class SongUpdate(BaseModel):
     is_original: Optional[bool] = None
 
 
+class SongBulkUpdate(SongUpdate):
+    """Schema for one item of a bulk song update."""
+    id: int
+
+
 class SongInDBBase(SongBase):
     """Base song schema with database fields."""
     id: int
@@ -107,6 +112,31 @@ class SongInDB(SongInDBBase):
     pass
 
 
+class SongSummary(BaseModel):
+    """Song schema for list views, without lyrics, tablature or other large fields."""
+    id: int
+    title: str
+    artist: str
+    album: Optional[str] = None
+    year: Optional[int] = None
+    genre: Optional[str] = None
+    key: Optional[str] = None
+    capo: int = 0
+    bpm: Optional[int] = None
+    time_signature: str = "4/4"
+    difficulty: Optional[str] = None
+    tags: Optional[List[str]] = None
+    is_public: bool = True
+    is_original: bool = False
+    view_count: int = 0
+    average_rating: float = 0.0
+    rating_count: int = 0
+    owner_id: int
+
+    class Config:
+        from_attributes = True
+
+
 class SongSearch(BaseModel):
     """Schema for song search parameters."""
     query: Optional[str] = None
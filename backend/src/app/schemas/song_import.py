@@ -0,0 +1,24 @@
+"""
+Song import Pydantic schemas.
+"""
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel
+
+from .bulk import BulkItemError
+
+
+class ImportJobStatus(BaseModel):
+    """Progress report for a bulk song import."""
+    id: str
+    filename: str
+    status: str  # pending, running, completed, failed
+    processed: int = 0
+    created: int = 0
+    failed: int = 0
+    errors: List[BulkItemError] = []
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
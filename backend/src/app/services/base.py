@@ -1,19 +1,42 @@
 """
 Base service class with CRUD operations.
 """
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import Any, Dict, Generic, List, Optional, Sequence, Type, TypeVar, Union
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
+from sqlalchemy import Table, delete, insert, inspect, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.db.base import Base
+from app.schemas.bulk import BulkItemError, BulkOperationResult
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 
+def insert_ignoring_conflicts(db: Session, table: Table):
+    """
+    ``INSERT ... ON CONFLICT DO NOTHING`` for the session's database.
+
+    Raises:
+        RuntimeError: for databases other than PostgreSQL and SQLite
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(table).on_conflict_do_nothing()
+    if dialect == "sqlite":
+        return sqlite.insert(table).on_conflict_do_nothing()
+    raise RuntimeError(
+        f"Inserting {table.name} while skipping duplicates needs PostgreSQL or "
+        f"SQLite; the {dialect!r} database is not supported"
+    )
+
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     """Base CRUD service class."""
     
@@ -26,6 +49,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         * `schema`: A Pydantic model (schema) class
         """
         self.model = model
+        self.column_names = frozenset(inspect(model).column_attrs.keys())
 
     def get(self, db: Session, id: Any) -> Optional[ModelType]:
         """Get a single record by ID."""
@@ -41,10 +65,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         """Create a new record."""
         obj_in_data = jsonable_encoder(obj_in)
         db_obj = self.model(**obj_in_data)  # type: ignore
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
+        return self.save(db, db_obj=db_obj)
 
     def update(
         self,
@@ -54,17 +75,26 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         obj_in: Union[UpdateSchemaType, Dict[str, Any]]
     ) -> ModelType:
         """Update a record."""
-        obj_data = jsonable_encoder(db_obj)
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
             update_data = obj_in.dict(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
+        for field, value in update_data.items():
+            if field in self.column_names:
+                setattr(db_obj, field, value)
+        return self.save(db, db_obj=db_obj)
+
+    def save(self, db: Session, *, db_obj: ModelType) -> ModelType:
+        """
+        Flush and commit a record in a single round trip.
+
+        Server-generated columns come back through ``RETURNING`` (see
+        ``eager_defaults`` on the model base), so no follow-up SELECT is
+        needed; the session must not expire objects on commit for this to
+        hold.
+        """
         db.add(db_obj)
         db.commit()
-        db.refresh(db_obj)
         return db_obj
 
     def remove(self, db: Session, *, id: int) -> ModelType:
@@ -72,4 +102,154 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         obj = db.query(self.model).get(id)
         db.delete(obj)
         db.commit()
-        return obj
\ No newline at end of file
+        return obj
+
+    def create_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+        extra: Optional[Dict[str, Any]] = None,
+        chunk_size: Optional[int] = None,
+    ) -> BulkOperationResult:
+        """
+        Insert many records, one transaction per chunk.
+
+        Each chunk is a single executemany INSERT ... RETURNING id. If a chunk
+        fails, its rows are retried one by one so only the offending rows are
+        reported in ``errors`` (indexes refer to ``objs_in``).
+        """
+        rows = [
+            self._row_data(obj_in, extra, exclude_unset=False) for obj_in in objs_in
+        ]
+
+        def write(chunk: List[Dict[str, Any]]) -> List[int]:
+            stmt = insert(self.model).returning(
+                self.model.id, sort_by_parameter_order=True
+            )
+            return list(db.scalars(stmt, chunk))
+
+        return self._run_chunked(db, rows, write, chunk_size)
+
+    def update_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Dict[str, Any]],
+        scope: Optional[Dict[str, Any]] = None,
+        chunk_size: Optional[int] = None,
+    ) -> BulkOperationResult:
+        """
+        Update many records by primary key, one transaction per chunk.
+
+        Every item must carry an ``id``. ``scope`` restricts the rows that may
+        be touched (e.g. ``{"owner_id": user.id}``); other ids are reported as
+        not found.
+        """
+        rows = [self._row_data(obj_in) for obj_in in objs_in]
+
+        def write(chunk: List[Dict[str, Any]]) -> List[int]:
+            found = self._existing_ids(db, [row.get("id") for row in chunk], scope)
+            missing = [row.get("id") for row in chunk if row.get("id") not in found]
+            if missing:
+                raise LookupError(f"Record not found: {missing[0]}")
+            # Group rows by their column set so each group is one executemany
+            groups: Dict[frozenset, List[Dict[str, Any]]] = {}
+            for row in chunk:
+                groups.setdefault(frozenset(row), []).append(row)
+            for group in groups.values():
+                db.execute(update(self.model), group)
+            return [row["id"] for row in chunk]
+
+        return self._run_chunked(db, rows, write, chunk_size)
+
+    def remove_many(
+        self,
+        db: Session,
+        *,
+        ids: Sequence[int],
+        scope: Optional[Dict[str, Any]] = None,
+        chunk_size: Optional[int] = None,
+    ) -> BulkOperationResult:
+        """Delete many records by id, one DELETE ... IN per chunk."""
+        rows = [{"id": id} for id in ids]
+
+        def write(chunk: List[Dict[str, Any]]) -> List[int]:
+            chunk_ids = [row["id"] for row in chunk]
+            found = self._existing_ids(db, chunk_ids, scope)
+            missing = [id for id in chunk_ids if id not in found]
+            if missing:
+                raise LookupError(f"Record not found: {missing[0]}")
+            self._before_remove_many(db, ids=chunk_ids)
+            db.execute(
+                delete(self.model)
+                .where(self.model.id.in_(chunk_ids))
+                .execution_options(synchronize_session=False)
+            )
+            return chunk_ids
+
+        return self._run_chunked(db, rows, write, chunk_size)
+
+    def _before_remove_many(self, db: Session, *, ids: List[int]) -> None:
+        """Hook for deleting dependent rows the ORM would otherwise cascade."""
+
+    def _row_data(
+        self,
+        obj_in: Union[BaseModel, Dict[str, Any]],
+        extra: Optional[Dict[str, Any]] = None,
+        exclude_unset: bool = True,
+    ) -> Dict[str, Any]:
+        """Column values for one bulk row, ignoring unmapped keys."""
+        if isinstance(obj_in, dict):
+            data = obj_in
+        else:
+            data = obj_in.dict(exclude_unset=exclude_unset)
+        row = {k: v for k, v in data.items() if k in self.column_names}
+        if extra:
+            row.update(extra)
+        return row
+
+    def _existing_ids(
+        self, db: Session, ids: List[Any], scope: Optional[Dict[str, Any]]
+    ) -> set:
+        """Return which of ``ids`` exist (within ``scope``)."""
+        stmt = select(self.model.id).where(self.model.id.in_(ids))
+        for field, value in (scope or {}).items():
+            stmt = stmt.where(getattr(self.model, field) == value)
+        return set(db.scalars(stmt))
+
+    def _run_chunked(
+        self, db: Session, rows: List[Dict[str, Any]], write, chunk_size: Optional[int]
+    ) -> BulkOperationResult:
+        """Apply ``write`` chunk by chunk, isolating failing rows."""
+        chunk_size = chunk_size or settings.BULK_CHUNK_SIZE
+        result = BulkOperationResult()
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            try:
+                result.ids.extend(write(chunk))
+                db.commit()
+                continue
+            except (SQLAlchemyError, LookupError):
+                db.rollback()
+            # Retry the failed chunk row by row to pinpoint bad records
+            for offset, row in enumerate(chunk):
+                try:
+                    result.ids.extend(write([row]))
+                    db.commit()
+                except (SQLAlchemyError, LookupError) as e:
+                    db.rollback()
+                    result.errors.append(
+                        BulkItemError(index=start + offset, error=self._error_message(e))
+                    )
+        return result
+
+    @staticmethod
+    def _error_message(error: Exception) -> str:
+        """Short description of why a row failed."""
+        if isinstance(error, LookupError):
+            return str(error.args[0])
+        orig = getattr(error, "orig", None)
+        if orig is not None and str(orig):
+            return str(orig).splitlines()[0]
+        return error.__class__.__name__
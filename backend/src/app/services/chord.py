@@ -1,13 +1,97 @@
 """
 Custom chord service for chord management operations.
 """
-from typing import List, Optional
+from itertools import groupby
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple, Union
 
+from pydantic import BaseModel
+from sqlalchemy import bindparam, delete, func, insert, or_, select, update
 from sqlalchemy.orm import Session
 
-from app.models.chord import CustomChord
+from app.models.chord import CustomChord, chord_names
+from app.schemas.bulk import BulkItemError, BulkOperationResult
 from app.schemas.chord import CustomChordCreate, CustomChordUpdate
 from app.services.base import CRUDBase
+from app.utils.chord_diagrams import DiagramSpec, spec_from_definition, spec_from_voicing
+from app.utils.chord_identification import identify_chord_name, shape_fingerprint
+from app.utils.music_theory import chord_lookup_key
+from app.utils.voicings import get_fretboard
+
+NAME_KEY_LENGTH = 50
+
+
+def name_keys(
+    name: Optional[str],
+    alternative_names: Optional[List[str]],
+    identified_name: Optional[str],
+) -> Set[str]:
+    """Lookup keys a chord is found under."""
+    names = [name, identified_name, *(alternative_names or [])]
+    keys = {chord_lookup_key(name)[:NAME_KEY_LENGTH] for name in names if isinstance(name, str)}
+    keys.discard("")
+    return keys
+
+
+class ResolvedDiagram(NamedTuple):
+    """The diagram chosen for one chord of a song."""
+    chord: str
+    source: Optional[str]  # "song", "custom", "verified", "generated" or None
+    spec: Optional[DiagramSpec]
+    chord_id: Optional[int] = None
+    is_verified: bool = False
+
+
+def prefix_upper_bound(prefix: str) -> str:
+    """Smallest string greater than every string starting with ``prefix``."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def merge_names(
+    names: Optional[List[str]], extra: Iterable[Optional[str]], exclude: Optional[str] = None
+) -> List[str]:
+    """``names`` followed by the new ones in ``extra``, without repeats or ``exclude``."""
+    merged = list(names or [])
+    for name in extra:
+        if name and name != exclude and name not in merged:
+            merged.append(name)
+    return merged
+
+
+def _plan_shape_merge(
+    group: List[Any],
+    kept: List[Dict[str, Any]],
+    links: List[Dict[str, Any]],
+    removed: List[Tuple[int, int]],
+) -> None:
+    """
+    Plan the merge of one shape's chords, best first, for merge_duplicate_shapes.
+
+    Each user keeps their first chord of the shape; their later ones are
+    removed into it. Kept chords other than the canonical become links.
+    """
+    canonical = group[0]
+    by_user: Dict[int, Dict[str, Any]] = {}
+    for row in group:
+        keeper = by_user.get(row.user_id)
+        if keeper is None:
+            by_user[row.user_id] = {
+                "b_id": row.id,
+                "name": row.name,
+                "b_names": list(row.alternative_names or []),
+            }
+            if row is not canonical:
+                links.append({"b_id": row.id, "b_canonical": canonical.id})
+        else:
+            keeper["b_names"] = merge_names(
+                keeper["b_names"], [row.name, *(row.alternative_names or [])], keeper["name"]
+            )
+            removed.append((row.id, canonical.id))
+    for keeper in by_user.values():
+        keeper["b_usage"] = (
+            sum(row.usage_count for row in group) if keeper["b_id"] == canonical.id else 0
+        )
+        del keeper["name"]
+        kept.append(keeper)
 
 
 class CustomChordService(CRUDBase[CustomChord, CustomChordCreate, CustomChordUpdate]):
@@ -16,14 +100,507 @@ class CustomChordService(CRUDBase[CustomChord, CustomChordCreate, CustomChordUpd
     def create_with_user(
         self, db: Session, *, obj_in: CustomChordCreate, user_id: int
     ) -> CustomChord:
-        """Create custom chord with user."""
+        """
+        Create custom chord with user, reusing stored shapes.
+
+        A shape the user already has gains the new name as an alternative
+        name instead of a second row. A copy of a verified shape is stored
+        linked to it through ``canonical_id``.
+        """
         obj_in_data = obj_in.dict()
+        fingerprint = shape_fingerprint(obj_in.fret_positions, obj_in.starting_fret)
+        canonical = self.get_canonical_by_shape(db, fingerprint=fingerprint, user_id=user_id)
+        if canonical is not None and canonical.user_id == user_id:
+            names = merge_names(
+                canonical.alternative_names,
+                [obj_in.name, *(obj_in.alternative_names or [])],
+                exclude=canonical.name,
+            )
+            if names != (canonical.alternative_names or []):
+                canonical.alternative_names = names
+                db.flush()
+                self._write_name_keys(db, [canonical])
+                db.commit()
+            return canonical
+
         db_obj = self.model(**obj_in_data, user_id=user_id)
+        db_obj.identified_name = identify_chord_name(
+            db_obj.fret_positions, db_obj.starting_fret
+        )
+        db_obj.shape_fingerprint = fingerprint
+        db_obj.canonical_id = canonical.id if canonical is not None else None
         db.add(db_obj)
+        db.flush()
+        self._write_name_keys(db, [db_obj])
         db.commit()
-        db.refresh(db_obj)
         return db_obj
 
+    def update(
+        self,
+        db: Session,
+        *,
+        db_obj: CustomChord,
+        obj_in: Union[CustomChordUpdate, Dict[str, Any]]
+    ) -> CustomChord:
+        """
+        Update a custom chord, re-identifying and relinking it when its
+        shape changes.
+        """
+        row = self._row_data(obj_in)
+        old_fingerprint = db_obj.shape_fingerprint
+        for field, value in row.items():
+            setattr(db_obj, field, value)
+        db_obj.identified_name = identify_chord_name(
+            db_obj.fret_positions, db_obj.starting_fret
+        )
+        db_obj.shape_fingerprint = shape_fingerprint(
+            db_obj.fret_positions, db_obj.starting_fret
+        )
+        if row.keys() & {"name", "alternative_names", "identified_name"}:
+            self._write_name_keys(db, [db_obj])
+        if db_obj.shape_fingerprint != old_fingerprint:
+            db.flush()
+            db_obj.canonical_id = self._relink_shapes(db, ids=[db_obj.id])[db_obj.id]
+        return self.save(db, db_obj=db_obj)
+
+    def create_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Union[CustomChordCreate, Dict[str, Any]]],
+        extra: Optional[Dict[str, Any]] = None,
+        chunk_size: Optional[int] = None,
+    ) -> BulkOperationResult:
+        """
+        Bulk insert reusing stored shapes like ``create_with_user``, then
+        index the new chords' names.
+
+        A chord whose shape its user already has, stored or earlier in the
+        batch, is added to that chord's alternative names and reports its
+        id. Copies of a verified shape are inserted linked to it. Stored
+        candidates are fetched with a single query.
+        """
+        rows = [self._row_data(obj_in, extra, exclude_unset=False) for obj_in in objs_in]
+        fingerprints = {row["shape_fingerprint"] for row in rows if row.get("shape_fingerprint")}
+        stored = []
+        if fingerprints:
+            stored = db.execute(
+                select(
+                    CustomChord.id,
+                    CustomChord.user_id,
+                    CustomChord.name,
+                    CustomChord.alternative_names,
+                    CustomChord.is_verified,
+                    CustomChord.shape_fingerprint,
+                )
+                .where(
+                    CustomChord.shape_fingerprint.in_(fingerprints),
+                    CustomChord.canonical_id.is_(None),
+                    or_(
+                        CustomChord.user_id.in_({row.get("user_id") for row in rows}),
+                        CustomChord.is_verified == True,
+                    ),
+                )
+                .order_by(CustomChord.usage_count.desc(), CustomChord.id)
+            ).all()
+        # (user, shape) -> stored row, or position of a new row
+        owned: Dict[Tuple[Any, str], Any] = {}
+        verified: Dict[str, int] = {}
+        for chord in stored:
+            owned.setdefault((chord.user_id, chord.shape_fingerprint), chord)
+            if chord.is_verified:
+                verified.setdefault(chord.shape_fingerprint, chord.id)
+
+        new_rows: List[Dict[str, Any]] = []
+        new_position: Dict[int, int] = {}  # objs_in index -> new row it is stored as
+        renamed: Dict[int, Dict[str, Any]] = {}  # stored chord id -> UPDATE parameters
+        folded: Dict[int, int] = {}  # objs_in index -> stored chord id
+        for index, row in enumerate(rows):
+            fingerprint = row.get("shape_fingerprint")
+            target = owned.get((row.get("user_id"), fingerprint)) if fingerprint else None
+            names = [row.get("name"), *(row.get("alternative_names") or [])]
+            if target is None:
+                row["canonical_id"] = verified.get(fingerprint)
+                if fingerprint:
+                    owned[(row.get("user_id"), fingerprint)] = len(new_rows)
+                new_position[index] = len(new_rows)
+                new_rows.append(row)
+            elif isinstance(target, int):
+                new_row = new_rows[target]
+                new_row["alternative_names"] = merge_names(
+                    new_row.get("alternative_names"), names, new_row.get("name")
+                )
+                new_position[index] = target
+            else:
+                entry = renamed.setdefault(
+                    target.id, {"b_id": target.id, "b_names": target.alternative_names or []}
+                )
+                entry["b_names"] = merge_names(entry["b_names"], names, target.name)
+                folded[index] = target.id
+
+        inserted = super().create_many(db, objs_in=new_rows, chunk_size=chunk_size)
+        failed = {error.index: error.error for error in inserted.errors}
+        created = iter(inserted.ids)
+        new_ids = {
+            position: next(created) for position in range(len(new_rows)) if position not in failed
+        }
+        result = BulkOperationResult()
+        for index in range(len(rows)):
+            position = new_position.get(index)
+            if position is None:
+                result.ids.append(folded[index])
+            elif position in new_ids:
+                result.ids.append(new_ids[position])
+            else:
+                result.errors.append(BulkItemError(index=index, error=failed[position]))
+
+        if renamed:
+            table = self.model.__table__
+            db.execute(
+                update(table)
+                .where(table.c.id == bindparam("b_id"))
+                .values(alternative_names=bindparam("b_names")),
+                list(renamed.values()),
+            )
+        self.reindex_names(db, ids=[*new_ids.values(), *renamed])
+        db.commit()
+        return result
+
+    def update_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Dict[str, Any]],
+        scope: Optional[Dict[str, Any]] = None,
+        chunk_size: Optional[int] = None,
+    ) -> BulkOperationResult:
+        """Bulk update, then re-index the touched chords' names and relink changed shapes."""
+        reshaped = [
+            obj_in.get("id")
+            for obj_in in objs_in
+            if obj_in.keys() & {"fret_positions", "starting_fret"}
+        ]
+        old_fingerprints: Dict[int, Optional[str]] = {}
+        if reshaped:
+            old_fingerprints = dict(
+                db.execute(
+                    select(CustomChord.id, CustomChord.shape_fingerprint).where(
+                        CustomChord.id.in_(reshaped)
+                    )
+                ).all()
+            )
+        result = super().update_many(db, objs_in=objs_in, scope=scope, chunk_size=chunk_size)
+        self.reindex_names(db, ids=result.ids)
+        updated = [chord_id for chord_id in result.ids if chord_id in old_fingerprints]
+        if updated:
+            new_fingerprints = db.execute(
+                select(CustomChord.id, CustomChord.shape_fingerprint).where(
+                    CustomChord.id.in_(updated)
+                )
+            ).all()
+            self._relink_shapes(
+                db,
+                ids=[
+                    chord_id
+                    for chord_id, fingerprint in new_fingerprints
+                    if fingerprint != old_fingerprints[chord_id]
+                ],
+            )
+            db.commit()
+        return result
+
+    def _relink_shapes(self, db: Session, *, ids: Sequence[int]) -> Dict[int, Optional[int]]:
+        """
+        Fix ``canonical_id`` links after the shapes of chords ``ids`` changed.
+
+        Copies linked to an edited chord still have its old shape; the most
+        used of them becomes their canonical chord. An edited chord that is
+        not verified is linked to the most used verified chord of its new
+        shape owned by someone else, if any. Returns each edited chord's
+        new ``canonical_id``.
+        """
+        if not ids:
+            return {}
+        changes: List[Dict[str, Any]] = []
+        orphans = db.execute(
+            select(CustomChord.id, CustomChord.canonical_id)
+            .where(CustomChord.canonical_id.in_(ids), CustomChord.id.notin_(ids))
+            .order_by(CustomChord.canonical_id, CustomChord.usage_count.desc(), CustomChord.id)
+        ).all()
+        for _, group in groupby(orphans, key=lambda row: row.canonical_id):
+            heir, *copies = group
+            changes.append({"b_id": heir.id, "b_canonical": None})
+            changes.extend({"b_id": row.id, "b_canonical": heir.id} for row in copies)
+
+        edited = db.execute(
+            select(
+                CustomChord.id,
+                CustomChord.user_id,
+                CustomChord.is_verified,
+                CustomChord.shape_fingerprint,
+            ).where(CustomChord.id.in_(ids))
+        ).all()
+        verified = db.execute(
+            select(CustomChord.id, CustomChord.user_id, CustomChord.shape_fingerprint)
+            .where(
+                CustomChord.shape_fingerprint.in_({row.shape_fingerprint for row in edited}),
+                CustomChord.canonical_id.is_(None),
+                CustomChord.is_verified == True,
+                CustomChord.id.notin_(ids),
+            )
+            .order_by(CustomChord.usage_count.desc(), CustomChord.id)
+        ).all()
+        linked: Dict[int, Optional[int]] = {}
+        for chord in edited:
+            linked[chord.id] = None if chord.is_verified else next(
+                (
+                    row.id
+                    for row in verified
+                    if row.shape_fingerprint == chord.shape_fingerprint
+                    and row.user_id != chord.user_id
+                ),
+                None,
+            )
+            changes.append({"b_id": chord.id, "b_canonical": linked[chord.id]})
+
+        table = self.model.__table__
+        db.execute(
+            update(table)
+            .where(table.c.id == bindparam("b_id"))
+            .values(canonical_id=bindparam("b_canonical")),
+            changes,
+        )
+        return linked
+
+    def remove(self, db: Session, *, id: int) -> CustomChord:
+        """Delete a chord and its name index rows."""
+        db.execute(delete(chord_names).where(chord_names.c.chord_id == id))
+        return super().remove(db, id=id)
+
+    def _before_remove_many(self, db: Session, *, ids: List[int]) -> None:
+        db.execute(delete(chord_names).where(chord_names.c.chord_id.in_(ids)))
+
+    def _write_name_keys(self, db: Session, chords: Sequence[Any]) -> None:
+        """Replace the index rows of chords (objects or rows with the name columns)."""
+        ids = [chord.id for chord in chords]
+        db.execute(delete(chord_names).where(chord_names.c.chord_id.in_(ids)))
+        rows = [
+            {"name_key": key, "chord_id": chord.id}
+            for chord in chords
+            for key in name_keys(chord.name, chord.alternative_names, chord.identified_name)
+        ]
+        if rows:
+            db.execute(insert(chord_names), rows)
+
+    def reindex_names(self, db: Session, *, ids: Sequence[int]) -> None:
+        """Rebuild the name index rows of the given chords and commit."""
+        if not ids:
+            return
+        chords = db.execute(
+            select(
+                CustomChord.id,
+                CustomChord.name,
+                CustomChord.alternative_names,
+                CustomChord.identified_name,
+            ).where(CustomChord.id.in_(list(ids)))
+        ).all()
+        self._write_name_keys(db, chords)
+        db.commit()
+
+    def rebuild_name_index(self, db: Session, *, batch_size: int = 1000) -> int:
+        """Re-index every chord's names in id-ordered batches; returns chords indexed."""
+        indexed = 0
+        last_id = 0
+        while True:
+            ids = list(
+                db.scalars(
+                    select(CustomChord.id)
+                    .where(CustomChord.id > last_id)
+                    .order_by(CustomChord.id)
+                    .limit(batch_size)
+                )
+            )
+            if not ids:
+                return indexed
+            self.reindex_names(db, ids=ids)
+            indexed += len(ids)
+            last_id = ids[-1]
+
+    def _row_data(
+        self,
+        obj_in: Union[BaseModel, Dict[str, Any]],
+        extra: Optional[Dict[str, Any]] = None,
+        exclude_unset: bool = True,
+    ) -> Dict[str, Any]:
+        """Bulk rows carry the identified name and fingerprint whenever they carry a shape."""
+        row = super()._row_data(obj_in, extra, exclude_unset)
+        row.pop("identified_name", None)
+        row.pop("shape_fingerprint", None)
+        if "fret_positions" in row or "starting_fret" in row:
+            if "fret_positions" in row and "starting_fret" in row:
+                row["identified_name"] = identify_chord_name(
+                    row["fret_positions"], row["starting_fret"]
+                )
+                row["shape_fingerprint"] = shape_fingerprint(
+                    row["fret_positions"], row["starting_fret"]
+                )
+            else:
+                # Half a shape: leave it to backfill_shape_columns
+                row["identified_name"] = None
+                row["shape_fingerprint"] = None
+        return row
+
+    def backfill_shape_columns(
+        self, db: Session, *, only_missing: bool = False, batch_size: int = 1000
+    ) -> int:
+        """
+        Identify and fingerprint stored chord shapes in id-ordered batches;
+        returns rows changed.
+
+        Only the shape columns are loaded, and each batch's changes are one
+        executemany UPDATE committed on its own.
+        """
+        table = self.model.__table__
+        stmt = update(table).where(table.c.id == bindparam("b_id")).values(
+            identified_name=bindparam("b_name"),
+            shape_fingerprint=bindparam("b_fingerprint"),
+        )
+        changed = 0
+        last_id = 0
+        while True:
+            query = (
+                select(
+                    CustomChord.id,
+                    CustomChord.fret_positions,
+                    CustomChord.starting_fret,
+                    CustomChord.identified_name,
+                    CustomChord.shape_fingerprint,
+                )
+                .where(CustomChord.id > last_id)
+                .order_by(CustomChord.id)
+                .limit(batch_size)
+            )
+            if only_missing:
+                query = query.where(
+                    or_(
+                        CustomChord.identified_name.is_(None),
+                        CustomChord.shape_fingerprint.is_(None),
+                    )
+                )
+            rows = db.execute(query).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            updates = []
+            renamed = []
+            for row in rows:
+                name = identify_chord_name(row.fret_positions, row.starting_fret)
+                fingerprint = shape_fingerprint(row.fret_positions, row.starting_fret)
+                if (name, fingerprint) != (row.identified_name, row.shape_fingerprint):
+                    updates.append({"b_id": row.id, "b_name": name, "b_fingerprint": fingerprint})
+                    if name != row.identified_name:
+                        renamed.append(row.id)
+            if updates:
+                db.execute(stmt, updates)
+                changed += len(updates)
+                self.reindex_names(db, ids=renamed)
+            db.commit()
+        return changed
+
+    def merge_duplicate_shapes(self, db: Session, *, batch_size: int = 500) -> Dict[str, int]:
+        """
+        Fold chords sharing a shape fingerprint into one canonical chord each.
+
+        The canonical chord of a shape is the verified one, then the most
+        used, then the oldest. A user's other chords of that shape are
+        deleted, their names becoming alternative names of the user's
+        chord; other users' copies are linked to the canonical chord and
+        unverified. Usage moves to the chord that is kept. Run
+        ``backfill_shape_columns`` first so every chord has a fingerprint.
+        Returns the number of chords deleted and linked.
+        """
+        merged = linked = 0
+        last_fingerprint = ""
+        while True:
+            fingerprints = list(
+                db.scalars(
+                    select(CustomChord.shape_fingerprint)
+                    .where(
+                        CustomChord.shape_fingerprint > last_fingerprint,
+                        CustomChord.canonical_id.is_(None),
+                    )
+                    .group_by(CustomChord.shape_fingerprint)
+                    .having(func.count() > 1)
+                    .order_by(CustomChord.shape_fingerprint)
+                    .limit(batch_size)
+                )
+            )
+            if not fingerprints:
+                return {"merged": merged, "linked": linked}
+            last_fingerprint = fingerprints[-1]
+            rows = db.execute(
+                select(
+                    CustomChord.id,
+                    CustomChord.user_id,
+                    CustomChord.name,
+                    CustomChord.alternative_names,
+                    CustomChord.shape_fingerprint,
+                    CustomChord.usage_count,
+                    CustomChord.is_verified,
+                )
+                .where(
+                    CustomChord.shape_fingerprint.in_(fingerprints),
+                    CustomChord.canonical_id.is_(None),
+                )
+                .order_by(
+                    CustomChord.shape_fingerprint,
+                    CustomChord.is_verified.desc(),
+                    CustomChord.usage_count.desc(),
+                    CustomChord.id,
+                )
+            ).all()
+            kept: List[Dict[str, Any]] = []
+            links: List[Dict[str, Any]] = []
+            removed: List[Tuple[int, int]] = []
+            for _, group in groupby(rows, key=lambda row: row.shape_fingerprint):
+                _plan_shape_merge(list(group), kept, links, removed)
+
+            table = self.model.__table__
+            repoint = [{"b_old": link["b_id"], "b_new": link["b_canonical"]} for link in links]
+            repoint += [
+                {"b_old": chord_id, "b_new": canonical_id} for chord_id, canonical_id in removed
+            ]
+            # Links to chords about to be linked or deleted follow them to the canonical chord
+            db.execute(
+                update(table)
+                .where(table.c.canonical_id == bindparam("b_old"))
+                .values(canonical_id=bindparam("b_new")),
+                repoint,
+            )
+            db.execute(
+                update(table).where(table.c.id == bindparam("b_id")).values(
+                    usage_count=bindparam("b_usage"),
+                    alternative_names=bindparam("b_names"),
+                ),
+                kept,
+            )
+            if links:
+                db.execute(
+                    update(table).where(table.c.id == bindparam("b_id")).values(
+                        canonical_id=bindparam("b_canonical"),
+                        usage_count=0,
+                        is_verified=False,
+                    ),
+                    links,
+                )
+            removed_ids = [chord_id for chord_id, _ in removed]
+            if removed_ids:
+                db.execute(delete(chord_names).where(chord_names.c.chord_id.in_(removed_ids)))
+                db.execute(delete(table).where(table.c.id.in_(removed_ids)))
+            self.reindex_names(db, ids=[row["b_id"] for row in kept])
+            merged += len(removed_ids)
+            linked += len(links)
+
     def get_multi_by_user(
         self, db: Session, *, user_id: int, skip: int = 0, limit: int = 100
     ) -> List[CustomChord]:
@@ -46,6 +623,36 @@ class CustomChordService(CRUDBase[CustomChord, CustomChordCreate, CustomChordUpd
             .first()
         )
 
+    def get_names_by_user(
+        self, db: Session, *, names: Iterable[str], user_id: int
+    ) -> Set[str]:
+        """Return which of the given chord names the user already has."""
+        return set(
+            name
+            for (name,) in db.query(CustomChord.name).filter(
+                CustomChord.user_id == user_id, CustomChord.name.in_(list(names))
+            )
+        )
+
+    def get_canonical_by_shape(
+        self, db: Session, *, fingerprint: str, user_id: int
+    ) -> Optional[CustomChord]:
+        """The user's own chord of a shape, else the most used verified one."""
+        return (
+            db.query(self.model)
+            .filter(
+                CustomChord.shape_fingerprint == fingerprint,
+                CustomChord.canonical_id.is_(None),
+                or_(CustomChord.user_id == user_id, CustomChord.is_verified == True),
+            )
+            .order_by(
+                (CustomChord.user_id == user_id).desc(),
+                CustomChord.usage_count.desc(),
+                CustomChord.id,
+            )
+            .first()
+        )
+
     def get_verified_chords(
         self, db: Session, *, skip: int = 0, limit: int = 100
     ) -> List[CustomChord]:
@@ -59,26 +666,141 @@ class CustomChordService(CRUDBase[CustomChord, CustomChordCreate, CustomChordUpd
             .all()
         )
 
+    def get_best_by_names(
+        self, db: Session, *, names: Iterable[str], user_id: int
+    ) -> Dict[str, Any]:
+        """
+        Best stored chord for each name, in one query.
+
+        Names match through the name index under any spelling. The user's
+        own chords win over verified ones, then the most used; the ranking
+        runs in the database, so one row comes back per name. Rows carry
+        only the diagram columns.
+        """
+        keys = {name: chord_lookup_key(name)[:NAME_KEY_LENGTH] for name in names}
+        if not keys:
+            return {}
+        ranked = (
+            select(
+                chord_names.c.name_key,
+                CustomChord.id,
+                CustomChord.user_id,
+                CustomChord.is_verified,
+                CustomChord.fret_positions,
+                CustomChord.finger_positions,
+                CustomChord.starting_fret,
+                func.row_number()
+                .over(
+                    partition_by=chord_names.c.name_key,
+                    order_by=(
+                        (CustomChord.user_id == user_id).desc(),
+                        CustomChord.usage_count.desc(),
+                        CustomChord.id,
+                    ),
+                )
+                .label("rank"),
+            )
+            .join(chord_names, chord_names.c.chord_id == CustomChord.id)
+            .where(
+                chord_names.c.name_key.in_(set(keys.values())),
+                or_(CustomChord.user_id == user_id, CustomChord.is_verified == True),
+            )
+            .subquery()
+        )
+        best = {
+            row.name_key: row
+            for row in db.execute(select(ranked).where(ranked.c.rank == 1))
+        }
+        return {name: best[key] for name, key in keys.items() if key in best}
+
+    def resolve_diagrams(
+        self,
+        db: Session,
+        *,
+        chords: Iterable[str],
+        user_id: int,
+        definitions: Optional[Dict[str, Any]] = None,
+    ) -> List[ResolvedDiagram]:
+        """
+        One diagram per distinct chord, in order of first appearance.
+
+        Preference: the song's own ``chord_definitions``, the user's custom
+        chords, verified chords, then the easiest generated voicing. Stored
+        chords are fetched with a single query.
+        """
+        chords = list(dict.fromkeys(chords))
+        resolved: Dict[str, ResolvedDiagram] = {}
+        for chord in chords:
+            spec = spec_from_definition((definitions or {}).get(chord))
+            if spec is not None:
+                resolved[chord] = ResolvedDiagram(chord, "song", spec)
+
+        stored = self.get_best_by_names(
+            db, names=[chord for chord in chords if chord not in resolved], user_id=user_id
+        )
+        for chord, row in stored.items():
+            spec = spec_from_definition(
+                {
+                    "fret_positions": row.fret_positions,
+                    "finger_positions": row.finger_positions,
+                    "starting_fret": row.starting_fret,
+                }
+            )
+            if spec is not None:
+                source = "custom" if row.user_id == user_id else "verified"
+                resolved[chord] = ResolvedDiagram(chord, source, spec, row.id, row.is_verified)
+
+        fretboard = get_fretboard()
+        for chord in chords:
+            if chord in resolved:
+                continue
+            voicings = fretboard.voicings(chord, limit=1)
+            if voicings:
+                resolved[chord] = ResolvedDiagram(chord, "generated", spec_from_voicing(voicings[0]))
+            else:
+                resolved[chord] = ResolvedDiagram(chord, None, None)
+        return [resolved[chord] for chord in chords]
+
+    def increment_usage_counts(self, db: Session, *, ids: Iterable[int]) -> None:
+        """Add one use to each chord with a single UPDATE."""
+        ids = list(ids)
+        if not ids:
+            return
+        db.execute(
+            update(CustomChord)
+            .where(CustomChord.id.in_(ids))
+            .values(usage_count=CustomChord.usage_count + 1)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
     def increment_usage_count(self, db: Session, *, chord_id: int) -> CustomChord:
         """Increment usage count for a chord."""
         chord = self.get(db, id=chord_id)
         if chord:
             chord.usage_count += 1
-            db.add(chord)
-            db.commit()
-            db.refresh(chord)
+            self.save(db, db_obj=chord)
         return chord
 
     def search_by_name(
         self, db: Session, *, name: str, skip: int = 0, limit: int = 10
     ) -> List[CustomChord]:
-        """Search chords by name."""
+        """
+        Search verified chords by name prefix.
+
+        Matches the chord name, alternative names and identified name under
+        any spelling: "Db7", "C#7" and "c#dom7" find the same chords.
+        """
+        key = chord_lookup_key(name)[:NAME_KEY_LENGTH]
+        if not key:
+            return []
+        matching = select(chord_names.c.chord_id).where(
+            chord_names.c.name_key >= key,
+            chord_names.c.name_key < prefix_upper_bound(key),
+        )
         return (
             db.query(self.model)
-            .filter(
-                CustomChord.name.ilike(f"%{name}%"),
-                CustomChord.is_verified == True
-            )
+            .filter(CustomChord.id.in_(matching), CustomChord.is_verified == True)
             .order_by(CustomChord.usage_count.desc())
             .offset(skip)
             .limit(limit)
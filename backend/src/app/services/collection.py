@@ -1,14 +1,52 @@
 """
 Collection service for managing song collections.
+
+A collection doubles as an ordered setlist. Entries in ``collection_songs``
+carry a gap-based ``position``: new songs are appended POSITION_GAP after
+the last one, and moving a song takes the midpoint of its new neighbours,
+so a move updates a single row. Only when two neighbours have no integer
+left between them is the collection renumbered.
 """
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, delete, exists, func, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session, selectinload
 
 from app.models.collection import Collection
-from app.models.song import Song
+from app.models.song import Song, collection_songs
 from app.schemas.collection import CollectionCreate, CollectionUpdate
-from app.services.base import CRUDBase
+from app.services.base import CRUDBase, insert_ignoring_conflicts
+from app.services.song import SONG_SHEET_OPTIONS, SONG_SUMMARY_OPTIONS
+from app.utils.music_theory import transpose_chord, transpose_text
+
+POSITION_GAP = 1024
+
+
+def rank_between(lower: Optional[int], upper: Optional[int]) -> Optional[int]:
+    """Position between two neighbours, or None when there is no room left."""
+    if lower is None and upper is None:
+        return POSITION_GAP
+    if lower is None:
+        return upper - POSITION_GAP
+    if upper is None:
+        return lower + POSITION_GAP
+    if upper - lower < 2:
+        return None
+    return (lower + upper) // 2
+
+
+def setlist_entry(row: Row) -> Dict[str, Any]:
+    """Render one setlist row with the song transposed for this entry."""
+    song, position, transpose, capo = row
+    return {
+        "position": position,
+        "transpose": transpose,
+        "capo": song.capo if capo is None else capo,
+        "key": transpose_chord(song.key, transpose) if song.key and transpose else song.key,
+        "song": song,
+        "lyrics_and_chords": transpose_text(song.lyrics_and_chords, transpose),
+    }
 
 
 class CollectionService(CRUDBase[Collection, CollectionCreate, CollectionUpdate]):
@@ -20,10 +58,7 @@ class CollectionService(CRUDBase[Collection, CollectionCreate, CollectionUpdate]
         """Create collection with user."""
         obj_in_data = obj_in.dict()
         db_obj = self.model(**obj_in_data, user_id=user_id)
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
+        return self.save(db, db_obj=db_obj)
 
     def get_multi_by_user(
         self, db: Session, *, user_id: int, skip: int = 0, limit: int = 100
@@ -44,74 +79,323 @@ class CollectionService(CRUDBase[Collection, CollectionCreate, CollectionUpdate]
         return (
             db.query(self.model)
             .filter(Collection.is_public == True)
+            .order_by(Collection.id)
             .offset(skip)
             .limit(limit)
             .all()
         )
 
+    def add_songs(
+        self, db: Session, *, collection: Collection, song_ids: Sequence[int]
+    ) -> List[int]:
+        """
+        Add songs to a collection in one statement, skipping songs already in it.
+
+        Returns the IDs actually added. Callers check that the songs exist
+        and are accessible.
+        """
+        song_ids = list(dict.fromkeys(song_ids))
+        if not song_ids:
+            return []
+        # Append after the current last entry, computed in the same statement
+        last = (
+            select(func.coalesce(func.max(collection_songs.c.position), 0))
+            .where(collection_songs.c.collection_id == collection.id)
+            .scalar_subquery()
+        )
+        stmt = (
+            insert_ignoring_conflicts(db, collection_songs)
+            .values(
+                [
+                    {
+                        "collection_id": collection.id,
+                        "song_id": id,
+                        "position": last + POSITION_GAP * (index + 1),
+                    }
+                    for index, id in enumerate(song_ids)
+                ]
+            )
+            .returning(collection_songs.c.song_id)
+        )
+        added = list(db.execute(stmt).scalars())
+        self._adjust_song_count(db, collection=collection, delta=len(added))
+        db.commit()
+        return added
+
+    def remove_songs(
+        self, db: Session, *, collection: Collection, song_ids: Sequence[int]
+    ) -> List[int]:
+        """Remove songs from a collection in one statement; returns the IDs removed."""
+        song_ids = list(dict.fromkeys(song_ids))
+        if not song_ids:
+            return []
+        stmt = (
+            delete(collection_songs)
+            .where(
+                collection_songs.c.collection_id == collection.id,
+                collection_songs.c.song_id.in_(song_ids),
+            )
+            .returning(collection_songs.c.song_id)
+        )
+        removed = list(db.execute(stmt).scalars())
+        self._adjust_song_count(db, collection=collection, delta=-len(removed))
+        db.commit()
+        return removed
+
     def add_song_to_collection(
         self, db: Session, *, collection_id: int, song_id: int
-    ) -> Collection:
+    ) -> Optional[Collection]:
         """Add a song to a collection."""
-        collection = self.get(db, id=collection_id)
-        song = db.query(Song).filter(Song.id == song_id).first()
-        
-        if not collection or not song:
+        collection = db.get(Collection, collection_id)
+        if not collection:
             return None
-        
-        # Check if song is already in collection
-        if song not in collection.songs:
-            collection.songs.append(song)
-            collection.song_count += 1
-            db.add(collection)
-            db.commit()
-            db.refresh(collection)
-        
+        self.add_songs(db, collection=collection, song_ids=[song_id])
         return collection
 
     def remove_song_from_collection(
         self, db: Session, *, collection_id: int, song_id: int
-    ) -> Collection:
+    ) -> Optional[Collection]:
         """Remove a song from a collection."""
-        collection = self.get(db, id=collection_id)
-        song = db.query(Song).filter(Song.id == song_id).first()
-        
-        if not collection or not song:
+        collection = db.get(Collection, collection_id)
+        if not collection:
             return None
-        
-        # Check if song is in collection
-        if song in collection.songs:
-            collection.songs.remove(song)
-            collection.song_count -= 1
-            db.add(collection)
-            db.commit()
-            db.refresh(collection)
-        
+        self.remove_songs(db, collection=collection, song_ids=[song_id])
         return collection
 
+    def _adjust_song_count(self, db: Session, *, collection: Collection, delta: int) -> None:
+        """Change the cached song count atomically in the database."""
+        if not delta:
+            return
+        db.execute(
+            update(Collection)
+            .where(Collection.id == collection.id)
+            .values(song_count=Collection.song_count + delta)
+        )
+
     def get_collection_with_songs(
-        self, db: Session, *, collection_id: int
-    ) -> Optional[Collection]:
-        """Get collection with its songs."""
-        return (
-            db.query(self.model)
-            .filter(Collection.id == collection_id)
-            .first()
+        self,
+        db: Session,
+        *,
+        collection_id: int,
+        skip: int = 0,
+        limit: Optional[int] = 100,
+    ) -> Optional[Tuple[Collection, List[Song]]]:
+        """
+        Get a collection and one page of its songs, in two queries.
+
+        Songs are loaded without their large text columns (see
+        ``SONG_SUMMARY_OPTIONS``). With ``limit=None`` every song is loaded
+        through ``selectinload``; otherwise only the requested page is
+        loaded and returned alongside, leaving ``collection.songs`` alone.
+        """
+        if limit is None:
+            collection = (
+                db.query(self.model)
+                .options(selectinload(Collection.songs).options(*SONG_SUMMARY_OPTIONS))
+                .filter(Collection.id == collection_id)
+                .first()
+            )
+            return (collection, list(collection.songs)) if collection else None
+
+        collection = self.get(db, id=collection_id)
+        if not collection:
+            return None
+        songs = (
+            db.query(Song)
+            .join(collection_songs, collection_songs.c.song_id == Song.id)
+            .filter(collection_songs.c.collection_id == collection_id)
+            .options(*SONG_SUMMARY_OPTIONS)
+            .order_by(collection_songs.c.position, Song.id)
+            .offset(skip)
+            .limit(limit)
+            .all()
         )
+        return collection, songs
+
+    def get_setlist_entries(self, db: Session, *, collection_id: int) -> List[Row]:
+        """Songs of a collection in setlist order with their per-entry overrides."""
+        stmt = (
+            select(
+                Song,
+                collection_songs.c.position,
+                collection_songs.c.transpose,
+                collection_songs.c.capo,
+            )
+            .join(collection_songs, collection_songs.c.song_id == Song.id)
+            .where(collection_songs.c.collection_id == collection_id)
+            .options(*SONG_SHEET_OPTIONS)
+            .order_by(collection_songs.c.position, collection_songs.c.song_id)
+        )
+        return db.execute(stmt).all()
+
+    def get_entry(
+        self, db: Session, *, collection_id: int, song_id: int
+    ) -> Optional[Row]:
+        """The ``collection_songs`` row of one song."""
+        stmt = select(collection_songs).where(
+            collection_songs.c.collection_id == collection_id,
+            collection_songs.c.song_id == song_id,
+        )
+        return db.execute(stmt).first()
+
+    def update_entry(
+        self, db: Session, *, collection_id: int, song_id: int, values: Dict[str, Any]
+    ) -> bool:
+        """Set per-entry overrides (``transpose``, ``capo``) of one song."""
+        result = db.execute(
+            update(collection_songs)
+            .where(
+                collection_songs.c.collection_id == collection_id,
+                collection_songs.c.song_id == song_id,
+            )
+            .values(**values)
+        )
+        db.commit()
+        return result.rowcount > 0
+
+    def move_song(
+        self,
+        db: Session,
+        *,
+        collection_id: int,
+        song_id: int,
+        after_song_id: Optional[int],
+    ) -> Optional[int]:
+        """
+        Move a song right after another one, or to the top when
+        ``after_song_id`` is None. Only the moved row is updated.
+
+        Returns the new position, or None when either song is not in the
+        collection.
+        """
+        in_collection = collection_songs.c.collection_id == collection_id
+        lower = None
+        if after_song_id is not None:
+            lower = db.execute(
+                select(collection_songs.c.position).where(
+                    in_collection, collection_songs.c.song_id == after_song_id
+                )
+            ).scalar()
+            if lower is None:
+                return None
+        upper_stmt = select(func.min(collection_songs.c.position)).where(
+            in_collection, collection_songs.c.song_id != song_id
+        )
+        if lower is not None:
+            upper_stmt = upper_stmt.where(collection_songs.c.position > lower)
+        upper = db.execute(upper_stmt).scalar()
+
+        position = rank_between(lower, upper)
+        if position is None:
+            self._renumber(db, collection_id=collection_id)
+            return self.move_song(
+                db, collection_id=collection_id, song_id=song_id, after_song_id=after_song_id
+            )
+        result = db.execute(
+            update(collection_songs)
+            .where(in_collection, collection_songs.c.song_id == song_id)
+            .values(position=position)
+        )
+        if not result.rowcount:
+            db.rollback()
+            return None
+        db.commit()
+        return position
+
+    def reorder_songs(
+        self, db: Session, *, collection_id: int, song_ids: Sequence[int]
+    ) -> List[int]:
+        """
+        Put the given songs first, in the given order; other songs keep their
+        relative order after them. Returns the resulting order.
+        """
+        current = self._song_order(db, collection_id=collection_id)
+        members = set(current)
+        first = [id for id in dict.fromkeys(song_ids) if id in members]
+        listed = set(first)
+        order = first + [id for id in current if id not in listed]
+        self._write_positions(db, collection_id=collection_id, song_ids=order)
+        db.commit()
+        return order
+
+    def _song_order(self, db: Session, *, collection_id: int) -> List[int]:
+        """Song IDs of a collection in setlist order."""
+        stmt = (
+            select(collection_songs.c.song_id)
+            .where(collection_songs.c.collection_id == collection_id)
+            .order_by(collection_songs.c.position, collection_songs.c.song_id)
+        )
+        return list(db.execute(stmt).scalars())
+
+    def _renumber(self, db: Session, *, collection_id: int) -> None:
+        """Respace all positions of a collection by POSITION_GAP."""
+        order = self._song_order(db, collection_id=collection_id)
+        self._write_positions(db, collection_id=collection_id, song_ids=order)
+
+    def _write_positions(
+        self, db: Session, *, collection_id: int, song_ids: Sequence[int]
+    ) -> None:
+        """Assign evenly spaced positions in one executemany UPDATE."""
+        if not song_ids:
+            return
+        stmt = (
+            update(collection_songs)
+            .where(
+                collection_songs.c.collection_id == bindparam("b_collection_id"),
+                collection_songs.c.song_id == bindparam("b_song_id"),
+            )
+            .values(position=bindparam("b_position"))
+        )
+        db.execute(
+            stmt,
+            [
+                {
+                    "b_collection_id": collection_id,
+                    "b_song_id": id,
+                    "b_position": POSITION_GAP * (index + 1),
+                }
+                for index, id in enumerate(song_ids)
+            ],
+        )
+
+    def reconcile_song_counts(self, db: Session) -> int:
+        """
+        Recompute drifted ``song_count`` values; returns how many were fixed.
+
+        Drift is found with one grouped query over ``collection_songs`` and
+        fixed with one executemany UPDATE. Counts changed concurrently are
+        picked up by the next run.
+        """
+        actual = func.count(collection_songs.c.song_id)
+        stmt = (
+            select(Collection.id, actual)
+            .outerjoin(collection_songs, collection_songs.c.collection_id == Collection.id)
+            .group_by(Collection.id, Collection.song_count)
+            .having(Collection.song_count != actual)
+        )
+        drifted = db.execute(stmt).all()
+        if drifted:
+            table = Collection.__table__
+            db.execute(
+                update(table)
+                .where(table.c.id == bindparam("b_id"))
+                .values(song_count=bindparam("b_count")),
+                [{"b_id": id, "b_count": count} for id, count in drifted],
+            )
+        db.commit()
+        return len(drifted)
 
     def is_song_in_collection(
         self, db: Session, *, collection_id: int, song_id: int
     ) -> bool:
         """Check if a song is in a collection."""
-        collection = self.get(db, id=collection_id)
-        if not collection:
-            return False
-        
-        song = db.query(Song).filter(Song.id == song_id).first()
-        if not song:
-            return False
-        
-        return song in collection.songs
+        stmt = select(
+            exists().where(
+                collection_songs.c.collection_id == collection_id,
+                collection_songs.c.song_id == song_id,
+            )
+        )
+        return db.execute(stmt).scalar()
 
 
 collection_service = CollectionService(Collection)
\ No newline at end of file
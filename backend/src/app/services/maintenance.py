@@ -0,0 +1,96 @@
+"""
+Periodic database maintenance jobs.
+"""
+import asyncio
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.context import reset_request_context, set_request_context
+from app.db.base import SessionLocal
+from app.services.chord import custom_chord_service
+from app.services.collection import collection_service
+from app.services.song import song_service
+from app.utils.logger import get_logger
+
+logger = get_logger("maintenance")
+
+_task: Optional[asyncio.Task] = None
+
+
+def reconcile_song_counts(session_factory: Callable[[], Session] = SessionLocal) -> int:
+    """Repair drifted collection song counts; returns how many were fixed."""
+    db = session_factory()
+    try:
+        fixed = collection_service.reconcile_song_counts(db)
+    finally:
+        db.close()
+    if fixed:
+        logger.warning(f"Reconciled song_count of {fixed} collections")
+    return fixed
+
+
+def record_chord_usage(
+    chord_ids: Iterable[int], session_factory: Callable[[], Session] = SessionLocal
+) -> None:
+    """
+    Add one use to each chord, after the response has been sent.
+
+    Runs as a background task, outside the request's query budget; a
+    failure only loses the counts.
+    """
+    token = set_request_context(None)
+    db = session_factory()
+    try:
+        custom_chord_service.increment_usage_counts(db, ids=chord_ids)
+    except Exception:
+        logger.error("Recording chord usage failed", exc_info=True)
+    finally:
+        db.close()
+        reset_request_context(token)
+
+
+def record_song_view(song_id: int, session_factory: Callable[[], Session] = SessionLocal) -> None:
+    """
+    Add one view to a song, after the response has been sent.
+
+    Like ``record_chord_usage``, this writes to the primary from a
+    background task so song reads can stay on a replica session.
+    """
+    token = set_request_context(None)
+    db = session_factory()
+    try:
+        song_service.increment_view_count(db, song_id=song_id)
+    except Exception:
+        logger.error("Recording song view failed", exc_info=True)
+    finally:
+        db.close()
+        reset_request_context(token)
+
+
+async def _run_periodically(interval: int) -> None:
+    """Run the maintenance jobs every ``interval`` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(reconcile_song_counts)
+        except Exception:
+            logger.error("Song count reconciliation failed", exc_info=True)
+
+
+def start_maintenance() -> None:
+    """Schedule the jobs on the running loop unless disabled."""
+    global _task
+    interval = settings.SONG_COUNT_RECONCILE_INTERVAL
+    if interval > 0 and _task is None:
+        _task = asyncio.get_running_loop().create_task(_run_periodically(interval))
+
+
+def stop_maintenance() -> None:
+    """Cancel the scheduled jobs."""
+    global _task
+    if _task is not None:
+        _task.cancel()
+        _task = None
@@ -7,9 +7,9 @@ from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from app.models.rating import Rating
-from app.models.song import Song
 from app.schemas.rating import RatingCreate, RatingUpdate
 from app.services.base import CRUDBase
+from app.services.song import song_service
 
 
 class RatingService(CRUDBase[Rating, RatingCreate, RatingUpdate]):
@@ -21,9 +21,7 @@ class RatingService(CRUDBase[Rating, RatingCreate, RatingUpdate]):
         """Create rating with user."""
         obj_in_data = obj_in.dict()
         db_obj = self.model(**obj_in_data, user_id=user_id)
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        self.save(db, db_obj=db_obj)
         
         # Update song rating statistics
         self._update_song_rating_stats(db, song_id=db_obj.song_id)
@@ -102,13 +100,9 @@ class RatingService(CRUDBase[Rating, RatingCreate, RatingUpdate]):
         average_rating = float(result.average) if result.average else 0.0
         rating_count = int(result.count) if result.count else 0
         
-        # Update song
-        song = db.query(Song).filter(Song.id == song_id).first()
-        if song:
-            song.average_rating = average_rating
-            song.rating_count = rating_count
-            db.add(song)
-            db.commit()
+        song_service.update_rating_stats(
+            db, song_id=song_id, new_average=average_rating, new_count=rating_count
+        )
 
     def get_song_rating_stats(self, db: Session, *, song_id: int) -> dict:
         """Get detailed rating statistics for a song."""
@@ -1,14 +1,104 @@
 """
 Song service for song management operations.
 """
-from typing import Any, Dict, List, Optional, Union
+from collections import OrderedDict
+from datetime import datetime
+from itertools import accumulate
+from threading import Lock
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, Union
 
-from sqlalchemy import and_, or_
-from sqlalchemy.orm import Session
+from pydantic import BaseModel
+from sqlalchemy import and_, bindparam, delete, func, insert, or_, select, update
+from sqlalchemy.orm import Session, defer
 
-from app.models.song import Song
+from app.models.collection import Collection
+from app.models.rating import Rating
+from app.models.song import Song, collection_songs, song_ngrams
+from app.schemas.bulk import BulkOperationResult
 from app.schemas.song import SongCreate, SongUpdate, SongSearch
+from app.core.metrics import record_cache
 from app.services.base import CRUDBase
+from app.utils.harmony import ProgressionAnalysis, analyze_progression, parse_key
+from app.utils.music_theory import extract_sheet_chords, extract_sheet_lines
+from app.utils.progressions import progression_ngrams
+from app.utils.vocabulary import (
+    FULL_MASK,
+    UNREPRESENTABLE,
+    transpose_vocabulary,
+    vocabulary_mask,
+)
+
+# Large text/JSON columns not needed to render a song sheet
+SONG_EXTRA_COLUMNS = (
+    Song.tablature,
+    Song.chord_definitions,
+    Song.song_structure,
+    Song.description,
+)
+# Loader options for list views (``schemas.SongSummary``) and for song sheets.
+# Touching a deferred column raises instead of silently issuing a query per song.
+SONG_SUMMARY_OPTIONS = [
+    defer(column, raiseload=True)
+    for column in (Song.lyrics_and_chords, *SONG_EXTRA_COLUMNS)
+]
+SONG_SHEET_OPTIONS = [defer(column, raiseload=True) for column in SONG_EXTRA_COLUMNS]
+
+ANALYSIS_CACHE_SIZE = 4096
+AnalysisKey = Tuple[int, datetime, Optional[str]]
+
+
+class AnalysisCache:
+    """Bounded LRU of song analyses keyed by (song id, updated_at, key)."""
+
+    def __init__(self, maxsize: int = ANALYSIS_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[AnalysisKey, ProgressionAnalysis]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: AnalysisKey) -> Optional[ProgressionAnalysis]:
+        with self._lock:
+            analysis = self._entries.get(key)
+            if analysis is not None:
+                self._entries.move_to_end(key)
+        record_cache("song_analysis", analysis is not None)
+        return analysis
+
+    def put(self, key: AnalysisKey, analysis: ProgressionAnalysis) -> None:
+        with self._lock:
+            self._entries[key] = analysis
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+analysis_cache = AnalysisCache()
+
+
+def sheet_vocabulary(text: str) -> int:
+    """Chord vocabulary mask of a lyrics-and-chords text."""
+    return vocabulary_mask(extract_sheet_chords(text))
+
+
+def analyze_sheet(text: str, key: Optional[str] = None) -> ProgressionAnalysis:
+    """
+    Analyse the chords of a lyrics-and-chords text.
+
+    Each chord line is a phrase for half cadences. A ``key`` that is not a
+    major or minor key is ignored in favour of the detected one.
+    """
+    lines = extract_sheet_lines(text)
+    chords = [chord for line in lines for chord in line]
+    phrase_ends = [end - 1 for end in accumulate(len(line) for line in lines)]
+    if key is not None:
+        try:
+            parse_key(key)
+        except ValueError:
+            key = None
+    return analyze_progression(chords, key, phrase_ends)
 
 
 class SongService(CRUDBase[Song, SongCreate, SongUpdate]):
@@ -17,14 +107,247 @@ class SongService(CRUDBase[Song, SongCreate, SongUpdate]):
     def create_with_owner(
         self, db: Session, *, obj_in: SongCreate, owner_id: int
     ) -> Song:
-        """Create song with owner."""
+        """Create song with owner, indexing its progression."""
         obj_in_data = obj_in.dict()
         db_obj = self.model(**obj_in_data, owner_id=owner_id)
+        db_obj.chord_vocabulary = sheet_vocabulary(db_obj.lyrics_and_chords)
         db.add(db_obj)
+        db.flush()
+        self._write_ngrams(db, [(db_obj.id, db_obj.lyrics_and_chords)])
         db.commit()
-        db.refresh(db_obj)
         return db_obj
 
+    def update(
+        self,
+        db: Session,
+        *,
+        db_obj: Song,
+        obj_in: Union[SongUpdate, Dict[str, Any]]
+    ) -> Song:
+        """Update a song, re-indexing its chords when they change."""
+        update_data = obj_in if isinstance(obj_in, dict) else obj_in.dict(exclude_unset=True)
+        if "lyrics_and_chords" in update_data:
+            db_obj.chord_vocabulary = sheet_vocabulary(update_data["lyrics_and_chords"])
+            self._write_ngrams(db, [(db_obj.id, update_data["lyrics_and_chords"])])
+        return super().update(db, db_obj=db_obj, obj_in=obj_in)
+
+    def _row_data(
+        self,
+        obj_in: Union[BaseModel, Dict[str, Any]],
+        extra: Optional[Dict[str, Any]] = None,
+        exclude_unset: bool = True,
+    ) -> Dict[str, Any]:
+        """Bulk rows carry the chord vocabulary whenever they carry the sheet."""
+        row = super()._row_data(obj_in, extra, exclude_unset)
+        row.pop("chord_vocabulary", None)
+        if "lyrics_and_chords" in row:
+            row["chord_vocabulary"] = sheet_vocabulary(row["lyrics_and_chords"])
+        return row
+
+    def backfill_chord_vocabularies(
+        self, db: Session, *, only_missing: bool = False, batch_size: int = 1000
+    ) -> int:
+        """
+        Compute stored songs' chord vocabularies in id-ordered batches;
+        returns rows changed.
+
+        Each batch's changes are one executemany UPDATE committed on its own.
+        """
+        table = self.model.__table__
+        stmt = update(table).where(table.c.id == bindparam("b_id")).values(
+            chord_vocabulary=bindparam("b_vocabulary")
+        )
+        changed = 0
+        last_id = 0
+        while True:
+            query = (
+                select(Song.id, Song.lyrics_and_chords, Song.chord_vocabulary)
+                .where(Song.id > last_id)
+                .order_by(Song.id)
+                .limit(batch_size)
+            )
+            if only_missing:
+                query = query.where(Song.chord_vocabulary.is_(None))
+            rows = db.execute(query).all()
+            if not rows:
+                return changed
+            last_id = rows[-1].id
+            updates = []
+            for row in rows:
+                vocabulary = sheet_vocabulary(row.lyrics_and_chords)
+                if vocabulary != row.chord_vocabulary:
+                    updates.append({"b_id": row.id, "b_vocabulary": vocabulary})
+            if updates:
+                db.execute(stmt, updates)
+                changed += len(updates)
+            db.commit()
+
+    def get_playable_songs(
+        self,
+        db: Session,
+        *,
+        chords: Sequence[str],
+        shifts: Sequence[int] = (0,),
+        skip: int = 0,
+        limit: int = 100,
+    ) -> List[Tuple[Song, int]]:
+        """
+        Public songs playable with only ``chords``, in id order.
+
+        A song qualifies when moving it by one of ``shifts`` semitones
+        leaves no chord outside ``chords``; each result carries the first
+        such shift. Songs with a chord that cannot be parsed never qualify. Vocabularies are tested with bitwise ANDs on
+        ``ix_songs_public``, which covers them, then the songs (list view
+        columns) are loaded.
+        """
+        # Unparseable known chords match nothing, and must not unlock
+        # songs with unrepresentable chords
+        known = vocabulary_mask(chords) & FULL_MASK
+        if not known:
+            return []
+        # Moving the song up by ``shift`` fits ``known`` iff it fits ``known`` moved down
+        allowed = {shift: transpose_vocabulary(known, -shift) for shift in shifts}
+        rows = db.execute(
+            select(Song.id, Song.chord_vocabulary)
+            .where(
+                Song.is_public == True,
+                Song.chord_vocabulary > 0,
+                or_(
+                    *(
+                        Song.chord_vocabulary.bitwise_and((FULL_MASK | UNREPRESENTABLE) ^ mask)
+                        == 0
+                        for mask in set(allowed.values())
+                    )
+                ),
+            )
+            .order_by(Song.id)
+            .offset(skip)
+            .limit(limit)
+        ).all()
+        if not rows:
+            return []
+        songs = {
+            song.id: song
+            for song in db.query(self.model)
+            .options(*SONG_SUMMARY_OPTIONS)
+            .filter(Song.id.in_([row.id for row in rows]))
+        }
+        return [
+            (
+                songs[row.id],
+                next(shift for shift in shifts if row.chord_vocabulary & ~allowed[shift] == 0),
+            )
+            for row in rows
+        ]
+
+    def create_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Union[SongCreate, Dict[str, Any]]],
+        extra: Optional[Dict[str, Any]] = None,
+        chunk_size: Optional[int] = None,
+    ) -> BulkOperationResult:
+        """Bulk insert, then index the new songs' progressions."""
+        result = super().create_many(db, objs_in=objs_in, extra=extra, chunk_size=chunk_size)
+        self.reindex_progressions(db, ids=result.ids)
+        return result
+
+    def update_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Dict[str, Any]],
+        scope: Optional[Dict[str, Any]] = None,
+        chunk_size: Optional[int] = None,
+    ) -> BulkOperationResult:
+        """Bulk update, then re-index the songs whose chords changed."""
+        result = super().update_many(db, objs_in=objs_in, scope=scope, chunk_size=chunk_size)
+        changed = {obj.get("id") for obj in objs_in if "lyrics_and_chords" in obj}
+        self.reindex_progressions(db, ids=[id for id in result.ids if id in changed])
+        return result
+
+    def _write_ngrams(self, db: Session, songs: Sequence[Tuple[int, str]]) -> None:
+        """Replace the progression index rows of ``(song id, lyrics_and_chords)`` pairs."""
+        db.execute(delete(song_ngrams).where(song_ngrams.c.song_id.in_([id for id, _ in songs])))
+        rows = [
+            {"ngram": ngram, "song_id": song_id}
+            for song_id, text in songs
+            for ngram in progression_ngrams(extract_sheet_chords(text))
+        ]
+        if rows:
+            db.execute(insert(song_ngrams), rows)
+
+    def reindex_progressions(self, db: Session, *, ids: Sequence[int]) -> None:
+        """Rebuild the progression index rows of the given songs and commit."""
+        if not ids:
+            return
+        songs = db.execute(
+            select(Song.id, Song.lyrics_and_chords).where(Song.id.in_(list(ids)))
+        ).all()
+        self._write_ngrams(db, songs)
+        db.commit()
+
+    def rebuild_progression_index(self, db: Session, *, batch_size: int = 1000) -> int:
+        """Re-index every song's progression in id-ordered batches; returns songs indexed."""
+        indexed = 0
+        last_id = 0
+        while True:
+            ids = list(
+                db.scalars(
+                    select(Song.id).where(Song.id > last_id).order_by(Song.id).limit(batch_size)
+                )
+            )
+            if not ids:
+                return indexed
+            self.reindex_progressions(db, ids=ids)
+            indexed += len(ids)
+            last_id = ids[-1]
+
+    def find_similar(
+        self,
+        db: Session,
+        *,
+        chords: Sequence[str],
+        user_id: int,
+        exclude_id: Optional[int] = None,
+        limit: int = 10,
+    ) -> List[Tuple[Song, float]]:
+        """
+        Songs sharing the most progression n-grams with ``chords``, in any key.
+
+        Scores are the fraction of the query's n-grams a song contains. The
+        index is probed in one query and the songs (list view columns)
+        loaded in a second.
+        """
+        ngrams = progression_ngrams(chords)
+        if not ngrams:
+            return []
+        shared = func.count().label("shared")
+        stmt = (
+            select(song_ngrams.c.song_id, shared)
+            .join(Song, Song.id == song_ngrams.c.song_id)
+            .where(
+                song_ngrams.c.ngram.in_(ngrams),
+                or_(Song.is_public == True, Song.owner_id == user_id),
+            )
+            .group_by(song_ngrams.c.song_id)
+            .order_by(shared.desc(), song_ngrams.c.song_id)
+            .limit(limit)
+        )
+        if exclude_id is not None:
+            stmt = stmt.where(song_ngrams.c.song_id != exclude_id)
+        matches = db.execute(stmt).all()
+        if not matches:
+            return []
+        songs = {
+            song.id: song
+            for song in db.query(self.model)
+            .options(*SONG_SUMMARY_OPTIONS)
+            .filter(Song.id.in_([song_id for song_id, _ in matches]))
+        }
+        return [(songs[song_id], count / len(ngrams)) for song_id, count in matches]
+
     def get_multi_by_owner(
         self, db: Session, *, owner_id: int, skip: int = 0, limit: int = 100
     ) -> List[Song]:
@@ -37,6 +360,15 @@ class SongService(CRUDBase[Song, SongCreate, SongUpdate]):
             .all()
         )
 
+    def get_accessible_ids(
+        self, db: Session, *, ids: Sequence[int], user_id: int
+    ) -> Set[int]:
+        """IDs among ``ids`` of songs that exist and are public or owned by the user."""
+        stmt = select(Song.id).where(
+            Song.id.in_(ids), or_(Song.is_public == True, Song.owner_id == user_id)
+        )
+        return set(db.execute(stmt).scalars())
+
     def get_public_songs(
         self, db: Session, *, skip: int = 0, limit: int = 100
     ) -> List[Song]:
@@ -44,6 +376,7 @@ class SongService(CRUDBase[Song, SongCreate, SongUpdate]):
         return (
             db.query(self.model)
             .filter(Song.is_public == True)
+            .order_by(Song.id)
             .offset(skip)
             .limit(limit)
             .all()
@@ -113,28 +446,123 @@ class SongService(CRUDBase[Song, SongCreate, SongUpdate]):
             .all()
         )
 
-    def increment_view_count(self, db: Session, *, song_id: int) -> Song:
-        """Increment view count for a song."""
-        song = self.get(db, id=song_id)
-        if song:
-            song.view_count += 1
-            db.add(song)
-            db.commit()
-            db.refresh(song)
-        return song
+    def get_analysis(self, song: Song, *, key: Optional[str] = None) -> ProgressionAnalysis:
+        """
+        Harmonic analysis of a song in ``key``, else its declared key, else
+        the detected one. Memoized until the song is updated; view and
+        rating counters do not count as updates.
+        """
+        cache_key = (song.id, song.updated_at, key)
+        analysis = analysis_cache.get(cache_key)
+        if analysis is None:
+            analysis = analyze_sheet(song.lyrics_and_chords, key or song.key)
+            analysis_cache.put(cache_key, analysis)
+        return analysis
+
+    def get_analyses(
+        self, db: Session, *, ids: Sequence[int], user_id: int
+    ) -> Dict[int, ProgressionAnalysis]:
+        """
+        Analyses of the songs among ``ids`` the user may read.
+
+        Song texts are loaded, in one query, only for analyses not cached.
+        """
+        songs = db.execute(
+            select(Song.id, Song.updated_at, Song.key).where(
+                Song.id.in_(list(ids)), or_(Song.is_public == True, Song.owner_id == user_id)
+            )
+        ).all()
+        analyses: Dict[int, ProgressionAnalysis] = {}
+        missing = {}
+        for song in songs:
+            analysis = analysis_cache.get((song.id, song.updated_at, None))
+            if analysis is None:
+                missing[song.id] = song
+            else:
+                analyses[song.id] = analysis
+        if missing:
+            texts = db.execute(
+                select(Song.id, Song.lyrics_and_chords).where(Song.id.in_(list(missing)))
+            )
+            for song_id, text in texts:
+                song = missing[song_id]
+                analysis = analyze_sheet(text, song.key)
+                analysis_cache.put((song_id, song.updated_at, None), analysis)
+                analyses[song_id] = analysis
+        return analyses
+
+    def _update_counters(self, db: Session, *, song_id: int, **values: Any) -> None:
+        """
+        Write counter columns with one UPDATE and commit.
+
+        ``updated_at`` is set to itself, keeping the onupdate default out:
+        it versions the song's content (see ``get_analysis``). Loaded
+        ``Song`` objects are not refreshed.
+        """
+        table = self.model.__table__
+        db.execute(
+            update(table)
+            .where(table.c.id == song_id)
+            .values(updated_at=table.c.updated_at, **values)
+        )
+        db.commit()
+
+    def increment_view_count(self, db: Session, *, song_id: int) -> None:
+        """Increment view count for a song, atomically."""
+        table = self.model.__table__
+        self._update_counters(db, song_id=song_id, view_count=table.c.view_count + 1)
 
     def update_rating_stats(
         self, db: Session, *, song_id: int, new_average: float, new_count: int
-    ) -> Song:
+    ) -> None:
         """Update rating statistics for a song."""
-        song = self.get(db, id=song_id)
-        if song:
-            song.average_rating = new_average
-            song.rating_count = new_count
-            db.add(song)
-            db.commit()
-            db.refresh(song)
-        return song
+        self._update_counters(
+            db, song_id=song_id, average_rating=new_average, rating_count=new_count
+        )
+
+    def remove(self, db: Session, *, id: int) -> Song:
+        """Delete a song, decrementing the song count of its collections."""
+        self._detach_from_collections(db, ids=[id])
+        db.execute(delete(song_ngrams).where(song_ngrams.c.song_id == id))
+        return super().remove(db, id=id)
+
+    def _detach_from_collections(self, db: Session, *, ids: List[int]) -> None:
+        """
+        Remove songs from every collection, adjusting ``song_count`` in the
+        same transaction as the association rows.
+        """
+        removed_per_collection = (
+            select(func.count())
+            .select_from(collection_songs)
+            .where(
+                collection_songs.c.collection_id == Collection.id,
+                collection_songs.c.song_id.in_(ids),
+            )
+            .scalar_subquery()
+        )
+        db.execute(
+            update(Collection)
+            .where(
+                Collection.id.in_(
+                    select(collection_songs.c.collection_id).where(
+                        collection_songs.c.song_id.in_(ids)
+                    )
+                )
+            )
+            .values(song_count=Collection.song_count - removed_per_collection)
+            .execution_options(synchronize_session=False)
+        )
+        db.execute(delete(collection_songs).where(collection_songs.c.song_id.in_(ids)))
+
+    def _before_remove_many(self, db: Session, *, ids: List[int]) -> None:
+        """Delete ratings, collection entries and index rows of songs being bulk-removed."""
+        self._detach_from_collections(db, ids=ids)
+        db.execute(delete(song_ngrams).where(song_ngrams.c.song_id.in_(ids)))
+        db.execute(
+            delete(Rating)
+            .where(Rating.song_id.in_(ids))
+            .execution_options(synchronize_session=False)
+        )
 
 
 song_service = SongService(Song)
\ No newline at end of file
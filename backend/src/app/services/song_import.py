@@ -0,0 +1,266 @@
+"""
+Streaming bulk song import from NDJSON files and chord-sheet archives.
+"""
+import io
+import json
+import multiprocessing
+import re
+import threading
+import uuid
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path, PurePosixPath
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.schemas.bulk import BulkItemError
+from app.schemas.song import SongCreate
+from app.services.song import song_service
+from app.utils.logger import get_logger
+from app.utils.music_theory import detect_song_key
+
+logger = get_logger("song_import")
+
+CHORD_SHEET_SUFFIXES = {".txt", ".cho", ".chopro", ".crd", ".pro"}
+CHORDPRO_DIRECTIVE_RE = re.compile(r"^\s*\{(\w+)\s*:\s*(.*?)\s*\}\s*$")
+CHORDPRO_FIELDS = {
+    "title": "title", "t": "title",
+    "artist": "artist", "a": "artist",
+    "album": "album",
+    "key": "key",
+    "capo": "capo",
+    "tempo": "bpm",
+    "year": "year",
+}
+
+# A record is (record number, parsed data or None, error message or None)
+Record = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+
+class ImportJob:
+    """Progress of one import, kept in memory by the process that runs it."""
+
+    def __init__(self, filename: str, owner_id: int):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.owner_id = owner_id
+        self.status = "pending"
+        self.processed = 0
+        self.created = 0
+        self.failed = 0
+        self.errors: List[BulkItemError] = []
+        self.created_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+
+    def add_error(self, index: int, error: str) -> None:
+        """Record a failed record, keeping at most IMPORT_MAX_ERRORS messages."""
+        self.failed += 1
+        if len(self.errors) < settings.IMPORT_MAX_ERRORS:
+            self.errors.append(BulkItemError(index=index, error=error))
+
+
+class ImportJobRegistry:
+    """Bounded registry of recent import jobs."""
+
+    def __init__(self, max_jobs: int):
+        self.max_jobs = max_jobs
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, ImportJob]" = OrderedDict()
+
+    def add(self, job: ImportJob) -> ImportJob:
+        """Register a job, evicting the oldest ones when full."""
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+        return job
+
+    def get(self, job_id: str) -> Optional[ImportJob]:
+        """Look up a job by id."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+
+import_jobs = ImportJobRegistry(settings.IMPORT_MAX_JOBS)
+
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> Optional[Executor]:
+    """Shared process pool for CPU-bound analysis (None runs in-process)."""
+    global _executor
+    if settings.IMPORT_WORKERS <= 0:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            # Spawned workers only import the music theory module, and avoid
+            # forking a process that already runs server threads.
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.IMPORT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+    return _executor
+
+
+def shutdown_executor() -> None:
+    """Stop the worker processes, if the pool was started; run at app shutdown."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(cancel_futures=True)
+
+
+def parse_chord_sheet(text: str, filename: str) -> Dict[str, Any]:
+    """
+    Turn a plain-text or ChordPro chord sheet into song fields.
+
+    ChordPro directives such as ``{title: ...}`` fill metadata; otherwise the
+    file name is read as ``Artist - Title``.
+    """
+    data: Dict[str, Any] = {}
+    body: List[str] = []
+    for line in text.splitlines():
+        match = CHORDPRO_DIRECTIVE_RE.match(line)
+        if match and match.group(1).lower() in CHORDPRO_FIELDS:
+            data[CHORDPRO_FIELDS[match.group(1).lower()]] = match.group(2)
+        else:
+            body.append(line)
+    stem = PurePosixPath(filename).stem
+    if " - " in stem:
+        artist, title = stem.split(" - ", 1)
+        data.setdefault("artist", artist.strip())
+        data.setdefault("title", title.strip())
+    else:
+        data.setdefault("title", stem)
+    data["lyrics_and_chords"] = "\n".join(body).strip("\n")
+    return data
+
+
+def iter_ndjson(stream: io.BufferedIOBase, start: int = 0) -> Iterator[Record]:
+    """Yield one record per non-empty line of an NDJSON stream."""
+    number = start
+    for raw in stream:
+        line = raw.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+            if not isinstance(item, dict):
+                raise ValueError("Each line must be a JSON object")
+            yield number, item, None
+        except ValueError as e:
+            yield number, None, f"Invalid JSON: {e}"
+        number += 1
+
+
+def iter_archive(path: Path) -> Iterator[Record]:
+    """Yield records from a zip of chord sheets, JSON or NDJSON files."""
+    number = 0
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            suffix = PurePosixPath(info.filename).suffix.lower()
+            with archive.open(info) as member:
+                if suffix in (".ndjson", ".jsonl"):
+                    for record in iter_ndjson(member, start=number):
+                        number = record[0] + 1
+                        yield record
+                    continue
+                if suffix == ".json":
+                    try:
+                        item = json.load(member)
+                        if not isinstance(item, dict):
+                            raise ValueError("File must contain a JSON object")
+                        yield number, item, None
+                    except ValueError as e:
+                        yield number, None, f"{info.filename}: invalid JSON: {e}"
+                elif suffix in CHORD_SHEET_SUFFIXES:
+                    text = member.read().decode("utf-8", errors="replace")
+                    yield number, parse_chord_sheet(text, info.filename), None
+                else:
+                    continue
+            number += 1
+
+
+def iter_records(path: Path, filename: str) -> Iterator[Record]:
+    """Pick the reader for an uploaded file."""
+    if zipfile.is_zipfile(path):
+        return iter_archive(path)
+    if filename.lower().endswith(tuple(CHORD_SHEET_SUFFIXES)):
+        text = path.read_text(encoding="utf-8", errors="replace")
+        return iter([(0, parse_chord_sheet(text, filename), None)])
+
+    def read() -> Iterator[Record]:
+        with open(path, "rb") as stream:
+            yield from iter_ndjson(stream)
+
+    return read()
+
+
+def _flush_batch(db, job: ImportJob, batch: List[Tuple[int, SongCreate]]) -> None:
+    """Detect missing keys and write one batch of validated songs."""
+    indexes = [index for index, _ in batch]
+    rows = [song.dict() for _, song in batch]
+    pending = [row for row in rows if not row.get("key")]
+    texts = [row["lyrics_and_chords"] for row in pending]
+    executor = get_executor()
+    if executor is not None and len(texts) > 1:
+        chunk = max(1, len(texts) // (settings.IMPORT_WORKERS * 4))
+        keys = executor.map(detect_song_key, texts, chunksize=chunk)
+    else:
+        keys = map(detect_song_key, texts)
+    for row, key in zip(pending, keys):
+        row["key"] = key
+    result = song_service.create_many(
+        db, objs_in=rows, extra={"owner_id": job.owner_id}, chunk_size=len(rows)
+    )
+    job.created += len(result.ids)
+    for error in result.errors:
+        job.add_error(indexes[error.index], error.error)
+    job.processed += len(batch)
+
+
+def run_import(job: ImportJob, path: Path, session_factory=SessionLocal) -> None:
+    """
+    Stream records from ``path`` into the database in batches.
+
+    Memory is bounded by the batch size: records are read lazily, validated
+    with ``SongCreate`` and written ``BULK_CHUNK_SIZE`` at a time, one
+    transaction per batch. The temporary upload is removed afterwards.
+    """
+    job.status = "running"
+    db = session_factory()
+    batch: List[Tuple[int, SongCreate]] = []
+    try:
+        for number, item, error in iter_records(path, job.filename):
+            if error is not None:
+                job.add_error(number, error)
+                job.processed += 1
+                continue
+            try:
+                batch.append((number, SongCreate(**item)))
+            except ValidationError as e:
+                job.add_error(number, e.errors()[0]["msg"])
+                job.processed += 1
+                continue
+            if len(batch) >= settings.BULK_CHUNK_SIZE:
+                _flush_batch(db, job, batch)
+                batch = []
+        if batch:
+            _flush_batch(db, job, batch)
+        job.status = "completed"
+    except Exception:
+        logger.error(f"Import {job.id} failed", exc_info=True)
+        job.status = "failed"
+    finally:
+        job.finished_at = datetime.utcnow()
+        db.close()
+        path.unlink(missing_ok=True)
@@ -0,0 +1,265 @@
+"""
+SVG chord diagrams.
+
+Diagrams are a pure function of ``DiagramSpec``, so each one is rendered
+once per process and identified by a hash of its spec. That hash is the
+diagram's strong ETag and its symbol id inside song sprite sheets.
+"""
+import hashlib
+import json
+from functools import lru_cache
+from typing import Any, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+from xml.sax.saxutils import escape
+
+from app.core.config import settings
+from app.core.metrics import function_caches
+from app.utils.music_theory import STANDARD_TUNING, resolve_tuning
+from app.utils.voicings import Voicing
+
+MUTED = -1
+MIN_FRETS_SHOWN = 4
+MAX_FINGER = 4  # index to little finger; 0 is no finger
+
+# Layout, in SVG user units
+STRING_GAP = 20
+FRET_GAP = 24
+SIDE = 24  # room for the starting fret label
+TOP = 28  # room for open / muted markers
+BOTTOM = 20  # room for tuning labels
+DOT_RADIUS = 8
+
+SPRITE_COLUMNS = 6
+LABEL_HEIGHT = 20
+
+
+class DiagramSpec(NamedTuple):
+    """Everything a diagram depends on; frets are relative to ``starting_fret``."""
+    frets: Tuple[int, ...]
+    fingers: Optional[Tuple[int, ...]]
+    starting_fret: int
+    tuning: Tuple[str, ...]
+
+    @property
+    def key(self) -> str:
+        """Content hash of the spec."""
+        return diagram_key(self)
+
+
+class RenderedDiagram(NamedTuple):
+    svg: str
+    etag: str
+
+
+def make_spec(
+    frets: Sequence[int],
+    fingers: Optional[Sequence[int]] = None,
+    starting_fret: int = 1,
+    tuning: Union[str, Sequence[str]] = STANDARD_TUNING,
+) -> DiagramSpec:
+    """
+    Normalized diagram spec.
+
+    Raises:
+        ValueError: for unknown tunings, positions that do not fit them or
+            lie above ``settings.MAX_CHORD_POSITIONS``, and unknown fingers
+    """
+    tuning = resolve_tuning(tuning)
+    if len(frets) != len(tuning):
+        raise ValueError("Need one fret position per string of the tuning")
+    if fingers is not None and len(fingers) != len(frets):
+        raise ValueError("Need one finger position per string")
+    if (
+        not 1 <= starting_fret <= settings.MAX_CHORD_POSITIONS
+        or any(fret < MUTED for fret in frets)
+        or max(frets, default=0) + starting_fret - 1 > settings.MAX_CHORD_POSITIONS
+    ):
+        raise ValueError("Invalid fret positions")
+    if fingers is not None and any(not 0 <= finger <= MAX_FINGER for finger in fingers):
+        raise ValueError("Invalid finger positions")
+    return DiagramSpec(
+        tuple(frets),
+        tuple(fingers) if fingers is not None and any(fingers) else None,
+        starting_fret,
+        tuning,
+    )
+
+
+def spec_from_definition(
+    definition: Any, tuning: Union[str, Sequence[str]] = STANDARD_TUNING
+) -> Optional[DiagramSpec]:
+    """
+    Spec for a stored chord definition, or None if it is not a diagram.
+
+    Accepts a bare list of frets or a mapping with ``fret_positions`` and
+    optional ``finger_positions`` / ``starting_fret`` (the ``CustomChord``
+    fields), as stored in ``Song.chord_definitions``.
+    """
+    if isinstance(definition, dict):
+        frets = definition.get("fret_positions")
+        fingers = definition.get("finger_positions")
+        starting_fret = definition.get("starting_fret") or 1
+    else:
+        frets, fingers, starting_fret = definition, None, 1
+    if not isinstance(frets, list) or not all(isinstance(fret, int) for fret in frets):
+        return None
+    try:
+        return make_spec(frets, fingers, starting_fret, tuning)
+    except (TypeError, ValueError):
+        return None
+
+
+def spec_from_voicing(
+    voicing: Voicing, tuning: Union[str, Sequence[str]] = STANDARD_TUNING
+) -> DiagramSpec:
+    """Spec for a generated voicing, moved up the neck when it sits high."""
+    starting_fret = 1
+    if max(voicing.frets) > MIN_FRETS_SHOWN:
+        starting_fret = voicing.base_fret
+    frets = [fret - starting_fret + 1 if fret > 0 else fret for fret in voicing.frets]
+    return make_spec(frets, None, starting_fret, tuning)
+
+
+def diagram_key(spec: DiagramSpec) -> str:
+    """Stable content hash of a spec."""
+    payload = json.dumps(
+        [spec.frets, spec.fingers, spec.starting_fret, spec.tuning], separators=(",", ":")
+    )
+    return hashlib.blake2b(payload.encode(), digest_size=12).hexdigest()
+
+
+def _size(spec: DiagramSpec) -> Tuple[int, int, int]:
+    """(width, height, frets shown) of a diagram."""
+    frets_shown = max(MIN_FRETS_SHOWN, max(spec.frets))
+    width = SIDE * 2 + STRING_GAP * (len(spec.tuning) - 1)
+    height = TOP + FRET_GAP * frets_shown + BOTTOM
+    return width, height, frets_shown
+
+
+def _body(spec: DiagramSpec) -> List[str]:
+    """SVG elements of a diagram at the origin."""
+    width, height, frets_shown = _size(spec)
+    strings = len(spec.tuning)
+    left = SIDE
+    right = SIDE + STRING_GAP * (strings - 1)
+    bottom = TOP + FRET_GAP * frets_shown
+    x = [SIDE + STRING_GAP * string for string in range(strings)]
+
+    parts = ['<g stroke="#000" stroke-width="1">']
+    parts.extend(f'<line x1="{sx}" y1="{TOP}" x2="{sx}" y2="{bottom}"/>' for sx in x)
+    parts.extend(
+        f'<line x1="{left}" y1="{TOP + FRET_GAP * fret}" x2="{right}" y2="{TOP + FRET_GAP * fret}"/>'
+        for fret in range(frets_shown + 1)
+    )
+    parts.append("</g>")
+    if spec.starting_fret == 1:
+        parts.append(f'<rect x="{left}" y="{TOP - 3}" width="{right - left}" height="4"/>')
+    else:
+        parts.append(
+            f'<text x="{left - 6}" y="{TOP + FRET_GAP // 2 + 4}" font-size="11" '
+            f'text-anchor="end">{spec.starting_fret}fr</text>'
+        )
+
+    fingers = spec.fingers or (0,) * strings
+    # Barres: one finger holding the same fret on several strings
+    barred = set()
+    for finger in set(fingers) - {0}:
+        held = [s for s in range(strings) if fingers[s] == finger and spec.frets[s] > 0]
+        if len(held) >= 2 and len({spec.frets[s] for s in held}) == 1:
+            y = TOP + FRET_GAP * spec.frets[held[0]] - FRET_GAP // 2
+            parts.append(
+                f'<rect x="{x[held[0]] - DOT_RADIUS}" y="{y - DOT_RADIUS}" '
+                f'width="{x[held[-1]] - x[held[0]] + 2 * DOT_RADIUS}" height="{2 * DOT_RADIUS}" '
+                f'rx="{DOT_RADIUS}"/>'
+            )
+            barred.update(held)
+
+    for string, fret in enumerate(spec.frets):
+        sx = x[string]
+        if fret == MUTED:
+            parts.append(f'<text x="{sx}" y="{TOP - 8}" font-size="12" text-anchor="middle">x</text>')
+        elif fret == 0:
+            parts.append(f'<circle cx="{sx}" cy="{TOP - 12}" r="4" fill="none" stroke="#000"/>')
+        else:
+            y = TOP + FRET_GAP * fret - FRET_GAP // 2
+            if string not in barred:
+                parts.append(f'<circle cx="{sx}" cy="{y}" r="{DOT_RADIUS}"/>')
+            if fingers[string]:
+                parts.append(
+                    f'<text x="{sx}" y="{y + 4}" font-size="11" fill="#fff" '
+                    f'text-anchor="middle">{fingers[string]}</text>'
+                )
+
+    parts.extend(
+        f'<text x="{sx}" y="{height - 6}" font-size="10" text-anchor="middle">{escape(note)}</text>'
+        for sx, note in zip(x, spec.tuning)
+    )
+    return parts
+
+
+@lru_cache(maxsize=4096)
+def render_diagram(spec: DiagramSpec) -> RenderedDiagram:
+    """Standalone SVG document for a diagram, with its ETag."""
+    width, height, _ = _size(spec)
+    svg = (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}" font-family="sans-serif">'
+        + "".join(_body(spec))
+        + "</svg>"
+    )
+    return RenderedDiagram(svg, spec.key)
+
+
+function_caches.register("render_diagram", render_diagram)
+
+
+@lru_cache(maxsize=4096)
+def _symbol(spec: DiagramSpec) -> str:
+    width, height, _ = _size(spec)
+    return (
+        f'<symbol id="d-{spec.key}" viewBox="0 0 {width} {height}">'
+        + "".join(_body(spec))
+        + "</symbol>"
+    )
+
+
+def render_sprite_sheet(diagrams: Iterable[Tuple[str, DiagramSpec]]) -> RenderedDiagram:
+    """
+    One SVG holding several named diagrams.
+
+    Each distinct diagram is a ``<symbol id="d-<key>">`` (usable with
+    ``<use href="#d-<key>">``) and the sheet also lays them out in a
+    labelled grid for printing. The ETag covers the names and keys.
+    """
+    diagrams = list(diagrams)
+    cell_width = max((_size(spec)[0] for _, spec in diagrams), default=0)
+    cell_height = max((_size(spec)[1] for _, spec in diagrams), default=0) + LABEL_HEIGHT
+    columns = min(SPRITE_COLUMNS, len(diagrams)) or 1
+    rows = -(-len(diagrams) // columns)
+
+    symbols = {}
+    uses = []
+    for index, (name, spec) in enumerate(diagrams):
+        symbols.setdefault(spec.key, _symbol(spec))
+        width, height, _ = _size(spec)
+        cx = (index % columns) * cell_width
+        cy = (index // columns) * cell_height
+        uses.append(
+            f'<text x="{cx + cell_width // 2}" y="{cy + LABEL_HEIGHT - 4}" font-size="14" '
+            f'text-anchor="middle">{escape(name)}</text>'
+            f'<use href="#d-{spec.key}" x="{cx}" y="{cy + LABEL_HEIGHT}" '
+            f'width="{width}" height="{height}"/>'
+        )
+
+    total_width = columns * cell_width
+    total_height = rows * cell_height
+    svg = (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{total_width}" height="{total_height}" '
+        f'viewBox="0 0 {total_width} {total_height}" font-family="sans-serif">'
+        f'<defs>{"".join(symbols.values())}</defs>'
+        + "".join(uses)
+        + "</svg>"
+    )
+    etag = hashlib.blake2b(
+        json.dumps([[name, spec.key] for name, spec in diagrams]).encode(), digest_size=12
+    ).hexdigest()
+    return RenderedDiagram(svg, etag)
@@ -0,0 +1,178 @@
+"""
+Chord identification from fret positions.
+
+Every chord in ``CHORD_PATTERNS``, in all twelve keys and optionally without
+its fifth, is precomputed into a table keyed by its 12-bit pitch-class mask.
+Naming a diagram is then a handful of integer operations and a dictionary
+lookup.
+"""
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from app.core.metrics import function_caches
+from app.utils.music_theory import (
+    CHORD_PATTERNS,
+    CHROMATIC_SCALE,
+    QUALITY_SUFFIXES,
+    STANDARD_TUNING,
+    resolve_tuning,
+)
+
+MUTED = -1
+
+_PATTERN_ORDER = {quality: order for order, quality in enumerate(CHORD_PATTERNS)}
+
+
+class ChordMatch(NamedTuple):
+    """One candidate name for a set of sounding notes."""
+    name: str
+    root: str
+    quality: str
+    bass: str
+    score: float
+
+
+def _build_table() -> Dict[int, List[Tuple[int, str, bool]]]:
+    """Pitch-class mask -> (root, quality, has all its notes) candidates."""
+    table: Dict[int, List[Tuple[int, str, bool]]] = {}
+    for quality, intervals in CHORD_PATTERNS.items():
+        for root in range(12):
+            mask = 0
+            for interval in intervals:
+                mask |= 1 << ((root + interval) % 12)
+            table.setdefault(mask, []).append((root, quality, True))
+            if len(intervals) >= 4 and 7 in intervals:
+                no_fifth = mask & ~(1 << ((root + 7) % 12))
+                table.setdefault(no_fifth, []).append((root, quality, False))
+    return table
+
+
+CHORD_TABLE = _build_table()
+
+
+def chord_name(root: int, quality: str, bass: int) -> str:
+    """Chord symbol from pitch classes, as a slash chord off the root."""
+    name = CHROMATIC_SCALE[root] + QUALITY_SUFFIXES.get(quality, quality)
+    if bass != root:
+        name += '/' + CHROMATIC_SCALE[bass]
+    return name
+
+
+def to_absolute(frets: Sequence[int], starting_fret: int = 1) -> Tuple[int, ...]:
+    """
+    Absolute frets of a diagram.
+
+    Diagrams drawn higher up the neck give fretted notes relative to
+    ``starting_fret`` (1 is the first drawn fret); open and muted strings
+    are unchanged.
+    """
+    offset = starting_fret - 1
+    return tuple(fret + offset if fret > 0 else fret for fret in frets)
+
+
+@lru_cache(maxsize=16)
+def tuning_pitch_classes(tuning: Tuple[str, ...]) -> Tuple[int, ...]:
+    """Open-string pitch classes of a resolved tuning, low string first."""
+    return tuple(CHROMATIC_SCALE.index(note) for note in tuning)
+
+
+def sounding_mask(frets: Sequence[int], open_pitch_classes: Sequence[int]) -> Tuple[int, int]:
+    """``(pitch-class mask, bass pitch class)`` of absolute frets; bass is -1 if silent."""
+    mask = 0
+    bass = -1
+    for open_pc, fret in zip(open_pitch_classes, frets):
+        if fret == MUTED:
+            continue
+        pc = (open_pc + fret) % 12
+        mask |= 1 << pc
+        if bass < 0:
+            bass = pc
+    return mask, bass
+
+
+def _candidates(mask: int, bass: int) -> List[ChordMatch]:
+    matches = []
+    for root, quality, complete in CHORD_TABLE.get(mask, ()):
+        score = (
+            (2.0 if root == bass else 0.0)
+            + (1.0 if complete else 0.0)
+            - len(CHORD_PATTERNS[quality]) * 0.1
+            - _PATTERN_ORDER[quality] * 0.01
+        )
+        matches.append(_match(root, quality, bass, score))
+    if not matches:
+        # Otherwise try a bass note outside the chord, e.g. C over a D
+        without_bass = mask & ~(1 << bass)
+        for root, quality, complete in CHORD_TABLE.get(without_bass, ()):
+            score = (
+                -1.0
+                + (1.0 if complete else 0.0)
+                - len(CHORD_PATTERNS[quality]) * 0.1
+                - _PATTERN_ORDER[quality] * 0.01
+            )
+            matches.append(_match(root, quality, bass, score))
+    matches.sort(key=lambda match: -match.score)
+    return matches
+
+
+def _match(root: int, quality: str, bass: int, score: float) -> ChordMatch:
+    return ChordMatch(
+        name=chord_name(root, quality, bass),
+        root=CHROMATIC_SCALE[root],
+        quality=quality,
+        bass=CHROMATIC_SCALE[bass],
+        score=round(score, 2),
+    )
+
+
+@lru_cache(maxsize=8192)
+def _identify(frets: Tuple[int, ...], tuning: Tuple[str, ...]) -> Tuple[ChordMatch, ...]:
+    mask, bass = sounding_mask(frets, tuning_pitch_classes(tuning))
+    if bass < 0:
+        return ()
+    return tuple(_candidates(mask, bass))
+
+
+function_caches.register("identify_chord", _identify)
+
+
+def identify_chord(
+    frets: Sequence[int],
+    starting_fret: int = 1,
+    tuning: Union[str, Sequence[str]] = STANDARD_TUNING,
+    limit: int = 5,
+) -> List[ChordMatch]:
+    """
+    Ranked chord names for a fret diagram, best first.
+
+    ``tuning`` is a ``TUNINGS`` name or note list. Root-position, complete
+    and simpler chords rank higher. Returns [] when the sounding notes are
+    not a known chord.
+    """
+    return list(_identify(to_absolute(frets, starting_fret), resolve_tuning(tuning))[:limit])
+
+
+def identify_chord_name(
+    frets: Sequence[int],
+    starting_fret: int = 1,
+    tuning: Union[str, Sequence[str]] = STANDARD_TUNING,
+) -> Optional[str]:
+    """Best chord name for a diagram, or None."""
+    matches = identify_chord(frets, starting_fret, tuning, limit=1)
+    return matches[0].name if matches else None
+
+
+def shape_fingerprint(
+    frets: Sequence[int],
+    starting_fret: int = 1,
+    tuning: Union[str, Sequence[str]] = STANDARD_TUNING,
+) -> str:
+    """
+    Key shared by every diagram of the same physical shape.
+
+    Frets are made absolute, so ``[1, 3, 3, 2, 1, 1]`` from fret 5 and
+    ``[5, 7, 7, 6, 5, 5]`` from fret 1 fingerprint alike, e.g.
+    ``"E-A-D-G-B-E:5,7,7,6,5,5"``.
+    """
+    absolute = to_absolute(frets, starting_fret)
+    return "-".join(resolve_tuning(tuning)) + ":" + ",".join(map(str, absolute))
@@ -0,0 +1,234 @@
+"""
+Roman numeral analysis of chord progressions.
+
+Chords are parsed once into integer pitch classes and analysed relative to
+a tonic by rotating their 12-bit masks, so a progression costs a few
+integer operations per chord once its chord names have been seen.
+"""
+from functools import lru_cache
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.core.metrics import function_caches
+from app.utils.music_theory import (
+    CHROMATIC_SCALE,
+    QUALITY_ALIASES,
+    chord_pitch_classes,
+    detect_key,
+    parse_chord,
+)
+from app.utils.voicings import rotate_mask
+
+
+def _scale_mask(degrees: Iterable[int]) -> int:
+    mask = 0
+    for degree in degrees:
+        mask |= 1 << degree
+    return mask
+
+
+MAJOR_SCALE = _scale_mask([0, 2, 4, 5, 7, 9, 11])
+# Natural minor plus the raised seventh of harmonic minor, so V and vii° are diatonic
+MINOR_SCALE = _scale_mask([0, 2, 3, 5, 7, 8, 10, 11])
+NATURAL_MINOR_SCALE = _scale_mask([0, 2, 3, 5, 7, 8, 10])
+
+# Semitones above the tonic -> numeral, with accidentals relative to each mode's scale
+MAJOR_NUMERALS = ['I', 'bII', 'II', 'bIII', 'III', 'IV', '#IV', 'V', 'bVI', 'VI', 'bVII', 'VII']
+MINOR_NUMERALS = ['I', 'bII', 'II', 'III', '#III', 'IV', '#IV', 'V', 'VI', '#VI', 'VII', '#VII']
+
+# CHORD_PATTERNS key -> (lower case numeral, suffix)
+NUMERAL_QUALITIES = {
+    'major': (False, ''), 'minor': (True, ''), 'dim': (True, '°'), 'aug': (False, '+'),
+    '7': (False, '7'), 'maj7': (False, 'maj7'), 'm7': (True, '7'), 'dim7': (True, '°7'),
+    'sus2': (False, 'sus2'), 'sus4': (False, 'sus4'), 'add9': (False, 'add9'),
+    '6': (False, '6'), 'm6': (True, '6'), '5': (False, '5'), '9': (False, '9'),
+    'm9': (True, '9'), 'maj9': (False, 'maj9'), '7sus4': (False, '7sus4'), 'm7b5': (True, 'ø7'),
+}
+
+# Harmonic function of diatonic roots by mode
+FUNCTIONS = {
+    'major': {0: 'tonic', 4: 'tonic', 9: 'tonic', 2: 'predominant', 5: 'predominant',
+              7: 'dominant', 11: 'dominant'},
+    'minor': {0: 'tonic', 3: 'tonic', 8: 'predominant', 2: 'predominant', 5: 'predominant',
+              7: 'dominant', 10: 'dominant', 11: 'dominant'},
+}
+
+MAJOR_THIRD = 1 << 4
+
+
+class AnalyzedChord(NamedTuple):
+    """One chord of a progression relative to the key; fields are None if unparseable."""
+    chord: str
+    degree: Optional[int]  # semitones above the tonic
+    numeral: Optional[str]
+    function: Optional[str]  # "tonic", "predominant", "dominant", "secondary dominant"
+    diatonic: bool = False
+    borrowed_from: Optional[str] = None  # the parallel mode a chromatic chord comes from
+
+
+class Cadence(NamedTuple):
+    """A cadence arriving on the chord at ``index``."""
+    index: int
+    kind: str  # "authentic", "plagal", "deceptive" or "half"
+
+
+class ProgressionAnalysis(NamedTuple):
+    """A progression's key, chords relative to it, and cadences."""
+    key: Optional[str]
+    chords: Tuple[AnalyzedChord, ...]
+    cadences: Tuple[Cadence, ...]
+
+    @property
+    def borrowed(self) -> List[int]:
+        """Indices of chords borrowed from the parallel mode."""
+        return [index for index, chord in enumerate(self.chords) if chord.borrowed_from]
+
+
+def parse_key(key: str) -> Tuple[int, str]:
+    """
+    ``(tonic pitch class, "major" | "minor")`` of a key name such as "Eb" or "F#m".
+
+    Raises:
+        ValueError: for anything but a major or minor key
+    """
+    root, quality, bass = parse_chord(key)
+    mode = QUALITY_ALIASES.get(quality)
+    if bass or mode not in ('major', 'minor') or root not in CHROMATIC_SCALE:
+        raise ValueError(f"Invalid key: {key}")
+    return CHROMATIC_SCALE.index(root), mode
+
+
+@lru_cache(maxsize=4096)
+def _chord_parts(chord: str) -> Optional[Tuple[int, str, int]]:
+    """``(root, pattern, mask)`` of a chord, or None."""
+    try:
+        root, mask, _ = chord_pitch_classes(chord)
+        pattern = QUALITY_ALIASES[parse_chord(chord)[1]]
+    except ValueError:
+        return None
+    return root, pattern, mask
+
+
+@lru_cache(maxsize=8192)
+def _analyze_chord(chord: str, tonic: int, mode: str) -> AnalyzedChord:
+    parts = _chord_parts(chord)
+    if parts is None:
+        return AnalyzedChord(chord, None, None, None)
+    root, pattern, mask = parts
+    degree = (root - tonic) % 12
+    relative = rotate_mask(mask, -tonic)
+    lower, suffix = NUMERAL_QUALITIES[pattern]
+    numeral = (MAJOR_NUMERALS if mode == 'major' else MINOR_NUMERALS)[degree]
+    numeral = (numeral.lower() if lower else numeral) + suffix
+
+    if mode == 'major':
+        scale, parallel = MAJOR_SCALE, NATURAL_MINOR_SCALE
+    else:
+        scale, parallel = MINOR_SCALE, MAJOR_SCALE
+    diatonic = relative & ~scale == 0
+    borrowed_from = None
+    if not diatonic and relative & ~parallel == 0:
+        borrowed_from = 'minor' if mode == 'major' else 'major'
+    function = FUNCTIONS[mode].get(degree) if diatonic else None
+    return AnalyzedChord(chord, degree, numeral, function, diatonic, borrowed_from)
+
+
+function_caches.register("analyze_chord", _analyze_chord)
+
+
+def _is_dominant(chord: AnalyzedChord) -> bool:
+    """V with a major third, or a leading-tone diminished chord."""
+    parts = _chord_parts(chord.chord)
+    if parts is None:
+        return False
+    root, pattern, mask = parts
+    if chord.degree == 7:
+        return bool(rotate_mask(mask, -root) & MAJOR_THIRD)
+    return chord.degree == 11 and pattern in ('dim', 'dim7', 'm7b5')
+
+
+def _secondary_dominant(
+    chord: AnalyzedChord, target: AnalyzedChord, mode: str
+) -> Optional[str]:
+    """``"V/x"`` when a chromatic major chord resolves down a fifth to diatonic ``x``."""
+    parts = _chord_parts(chord.chord)
+    target_parts = _chord_parts(target.chord)
+    if (
+        parts is None
+        or target_parts is None
+        or chord.diatonic
+        or not target.diatonic
+        or target.degree in (None, 0)
+        or (chord.degree - target.degree) % 12 != 7
+    ):
+        return None
+    root, pattern, mask = parts
+    if not rotate_mask(mask, -root) & MAJOR_THIRD:
+        return None
+    suffix = '7' if pattern in ('7', '9') else ''
+    # The bare degree of the target, cased by its quality but without extensions
+    target_numeral = (MAJOR_NUMERALS if mode == 'major' else MINOR_NUMERALS)[target.degree]
+    if NUMERAL_QUALITIES[target_parts[1]][0]:
+        target_numeral = target_numeral.lower()
+    return 'V' + suffix + '/' + target_numeral
+
+
+def _cadence(previous: AnalyzedChord, chord: AnalyzedChord, mode: str) -> Optional[str]:
+    if chord.degree == 0:
+        if _is_dominant(previous):
+            return 'authentic'
+        if previous.degree == 5:
+            return 'plagal'
+    elif chord.degree == (9 if mode == 'major' else 8) and _is_dominant(previous):
+        return 'deceptive'
+    return None
+
+
+def analyze_progression(
+    chords: Sequence[str],
+    key: Optional[str] = None,
+    phrase_ends: Optional[Iterable[int]] = None,
+) -> ProgressionAnalysis:
+    """
+    Roman numeral analysis of a chord sequence.
+
+    ``key`` defaults to ``detect_key``. Cadences are found between
+    consecutive different chords; half cadences only at ``phrase_ends``
+    (indices of the last chord of each phrase, by default just the last
+    chord). Unparseable chords are kept with empty fields and break the
+    chain.
+
+    Raises:
+        ValueError: for an invalid ``key``
+    """
+    if key is None:
+        key = detect_key(list(chords))
+        if key is None:
+            return ProgressionAnalysis(None, tuple(AnalyzedChord(c, None, None, None) for c in chords), ())
+    tonic, mode = parse_key(key)
+    analyzed = [_analyze_chord(chord, tonic, mode) for chord in chords]
+    ends = set(phrase_ends) if phrase_ends is not None else {len(analyzed) - 1}
+
+    cadences = []
+    run_start = None  # first index of the run of the previous different chord
+    for index, chord in enumerate(analyzed):
+        if chord.degree is None:
+            run_start = None
+            continue
+        if run_start is not None and analyzed[run_start].chord != chord.chord:
+            previous = analyzed[run_start]
+            kind = _cadence(previous, chord, mode)
+            if kind:
+                cadences.append(Cadence(index, kind))
+            secondary = _secondary_dominant(previous, chord, mode)
+            if secondary:
+                for position in range(run_start, index):
+                    analyzed[position] = analyzed[position]._replace(
+                        numeral=secondary, function='secondary dominant'
+                    )
+        if index in ends and chord.degree == 7 and _is_dominant(chord) and not (
+            cadences and cadences[-1].index == index
+        ):
+            cadences.append(Cadence(index, 'half'))
+        if run_start is None or analyzed[run_start].chord != chord.chord:
+            run_start = index
+    return ProgressionAnalysis(key, tuple(analyzed), tuple(cadences))
@@ -1,68 +1,197 @@
 """
 Logging configuration for the application.
+
+Records are handed to a ``QueueHandler`` on the calling thread (the event loop
+included) and written by a background ``QueueListener``, so console and file
+I/O never block request handling.
 """
+import atexit
+import copy
 import logging
+import queue
 import sys
+import threading
+import time
+import zlib
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
+from typing import Optional
+
+import structlog
 
 from app.core.config import settings
 
+_listener: Optional[QueueListener] = None
+
+
+class RequestLogSampler(logging.Filter):
+    """
+    Sample per-request INFO records once traffic exceeds a threshold.
+
+    Up to ``threshold`` request records per second are always kept; beyond
+    that only one request in ``rate`` is logged. The decision is made from
+    the request ID so a request's "started" and "completed" records are kept
+    or dropped together. Warnings, errors and 5xx completions always pass.
+    """
+
+    def __init__(self, threshold: int, rate: int):
+        super().__init__()
+        self.threshold = threshold
+        self.rate = max(1, rate)
+        self._lock = threading.Lock()
+        self._window = 0
+        self._count = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        request_id = getattr(record, "request_id", None)
+        if request_id is None or record.levelno > logging.INFO:
+            return True
+        if (getattr(record, "status_code", None) or 0) >= 500:
+            return True
+        now = int(time.monotonic())
+        with self._lock:
+            if now != self._window:
+                self._window = now
+                self._count = 0
+            self._count += 1
+            busy = self._count > self.threshold
+        if not busy:
+            return True
+        return zlib.crc32(request_id.encode()) % self.rate == 0
+
+
+class DeferredFormattingQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread.
+
+    Only the message arguments are merged up front (so later mutation of
+    arguments cannot change the record); tracebacks and extras are rendered
+    by the handlers' formatter.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def _build_formatter() -> logging.Formatter:
+    """JSON formatter via structlog, or the plain LOG_FORMAT."""
+    if not settings.LOG_JSON:
+        return logging.Formatter(settings.LOG_FORMAT)
+    return structlog.stdlib.ProcessorFormatter(
+        processors=[
+            structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+            structlog.processors.format_exc_info,
+            structlog.processors.JSONRenderer(),
+        ],
+        foreign_pre_chain=[
+            structlog.stdlib.add_log_level,
+            structlog.stdlib.add_logger_name,
+            structlog.stdlib.ExtraAdder(),
+            structlog.processors.TimeStamper(fmt="iso", utc=True),
+        ],
+    )
+
 
 def setup_logging():
     """Setup application logging configuration."""
-    
+    global _listener
+
     # Create logs directory if it doesn't exist
     log_dir = Path("logs")
     log_dir.mkdir(exist_ok=True)
-    
+
     # Create formatter
-    formatter = logging.Formatter(settings.LOG_FORMAT)
-    
-    # Configure root logger
-    root_logger = logging.getLogger()
-    root_logger.setLevel(getattr(logging, settings.LOG_LEVEL.upper()))
-    
-    # Remove existing handlers
-    for handler in root_logger.handlers[:]:
-        root_logger.removeHandler(handler)
-    
+    formatter = _build_formatter()
+
     # Console handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
-    
+
     # File handler for application logs
-    file_handler = logging.FileHandler(log_dir / "app.log")
+    file_handler = RotatingFileHandler(
+        log_dir / "app.log",
+        maxBytes=settings.LOG_MAX_BYTES,
+        backupCount=settings.LOG_BACKUP_COUNT,
+    )
     file_handler.setFormatter(formatter)
-    root_logger.addHandler(file_handler)
-    
+
     # Error file handler
-    error_handler = logging.FileHandler(log_dir / "error.log")
+    error_handler = RotatingFileHandler(
+        log_dir / "error.log",
+        maxBytes=settings.LOG_MAX_BYTES,
+        backupCount=settings.LOG_BACKUP_COUNT,
+    )
     error_handler.setLevel(logging.ERROR)
     error_handler.setFormatter(formatter)
-    root_logger.addHandler(error_handler)
-    
+
+    # Writers run on the listener thread; loggers only enqueue records
+    if _listener is not None:
+        _listener.stop()
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    _listener = QueueListener(
+        log_queue,
+        console_handler,
+        file_handler,
+        error_handler,
+        respect_handler_level=True,
+    )
+    _listener.start()
+
+    # Configure root logger
+    root_logger = logging.getLogger()
+    root_logger.setLevel(getattr(logging, settings.LOG_LEVEL.upper()))
+
+    # Remove existing handlers
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+    root_logger.addHandler(DeferredFormattingQueueHandler(log_queue))
+
     # Configure specific loggers
-    
+
     # SQLAlchemy logger
     sqlalchemy_logger = logging.getLogger("sqlalchemy.engine")
     sqlalchemy_logger.setLevel(logging.WARNING)
-    
+
     # FastAPI logger
     fastapi_logger = logging.getLogger("fastapi")
     fastapi_logger.setLevel(logging.INFO)
-    
+
     # Application logger
     app_logger = logging.getLogger("app")
     app_logger.setLevel(getattr(logging, settings.LOG_LEVEL.upper()))
-    
+
+    # Request logs are sampled under load
+    middleware_logger = logging.getLogger("app.middleware")
+    for log_filter in middleware_logger.filters[:]:
+        if isinstance(log_filter, RequestLogSampler):
+            middleware_logger.removeFilter(log_filter)
+    middleware_logger.addFilter(
+        RequestLogSampler(
+            threshold=settings.LOG_REQUEST_SAMPLE_THRESHOLD,
+            rate=settings.LOG_REQUEST_SAMPLE_RATE,
+        )
+    )
+
     return root_logger
 
 
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
 def get_logger(name: str) -> logging.Logger:
     """Get a logger for a specific module."""
     return logging.getLogger(f"app.{name}")
 
 
+atexit.register(shutdown_logging)
+
 # Setup logging when module is imported
-setup_logging()
\ No newline at end of file
+setup_logging()
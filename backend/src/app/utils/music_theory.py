@@ -2,7 +2,11 @@
 Music theory utilities for chord transposition and musical calculations.
 """
 import re
-from typing import Dict, List, Optional, Tuple
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from app.core.metrics import CHORDS_PARSED, CHORDS_TRANSPOSED, function_caches
 
 # Musical constants
 CHROMATIC_SCALE = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
@@ -25,11 +29,73 @@ CHORD_PATTERNS = {
     'add9': [0, 4, 7, 14],
     '6': [0, 4, 7, 9],
     'm6': [0, 3, 7, 9],
+    '5': [0, 7],
+    '9': [0, 4, 7, 10, 14],
+    'm9': [0, 3, 7, 10, 14],
+    'maj9': [0, 4, 7, 11, 14],
+    '7sus4': [0, 5, 7, 10],
+    'm7b5': [0, 3, 6, 10],
+}
+
+# Chord quality spellings -> CHORD_PATTERNS key
+QUALITY_ALIASES = {
+    '': 'major', 'maj': 'major', 'M': 'major',
+    'm': 'minor', 'min': 'minor', '-': 'minor',
+    'dim': 'dim', 'o': 'dim',
+    'aug': 'aug', '+': 'aug',
+    '7': '7', 'dom7': '7',
+    'maj7': 'maj7', 'M7': 'maj7', 'M9': 'maj9',
+    'm7': 'm7', 'min7': 'm7', '-7': 'm7',
+    'dim7': 'dim7', 'o7': 'dim7',
+    'sus': 'sus4', 'sus2': 'sus2', 'sus4': 'sus4',
+    'add9': 'add9', '6': '6', 'm6': 'm6', '5': '5',
+    '9': '9', 'm9': 'm9', 'maj9': 'maj9',
+    '7sus4': '7sus4', '7sus': '7sus4',
+    'm7b5': 'm7b5', 'm7-5': 'm7b5',
 }
 
+# CHORD_PATTERNS key -> suffix used in chord names (others use the key)
+QUALITY_SUFFIXES = {'major': '', 'minor': 'm'}
+
+# Diatonic triads by scale degree (semitones above tonic)
+MAJOR_KEY_TRIADS = {0: 'major', 2: 'minor', 4: 'minor', 5: 'major', 7: 'major', 9: 'minor', 11: 'dim'}
+MINOR_KEY_TRIADS = {0: 'minor', 2: 'dim', 3: 'major', 5: 'minor', 7: 'minor', 8: 'major', 10: 'major'}
+
+# Enhanced chord regex to match common chord patterns
+CHORD_TOKEN_RE = re.compile(
+    r'\b([A-G]#?b?(?:maj|min|m|dim|aug|sus[24]?|add[9]?|[67]|maj7|m7|dim7|sus2|sus4|add9|6|m6|9|11|13)?(?:/[A-G]#?b?)?)\b',
+    re.IGNORECASE,
+)
+
+# A whole whitespace-delimited token that is a chord name (case-sensitive)
+CHORD_NAME_RE = re.compile(
+    r'[A-G][#b]?(?:maj|min|m|dim|aug|sus|add|[0-9]|[#b+\-()])*(?:/[A-G][#b]?)?'
+)
+# ChordPro-style inline chord, e.g. "[Am]"
+INLINE_CHORD_RE = re.compile(r'\[([^\]\s]+)\]')
+
 # Standard guitar tuning (low to high)
 STANDARD_TUNING = ['E', 'A', 'D', 'G', 'B', 'E']
 
+# Named guitar tunings (low to high)
+TUNINGS = {
+    'standard': STANDARD_TUNING,
+    'half_step_down': ['D#', 'G#', 'C#', 'F#', 'A#', 'D#'],
+    'drop_d': ['D', 'A', 'D', 'G', 'B', 'E'],
+    'double_drop_d': ['D', 'A', 'D', 'G', 'B', 'D'],
+    'drop_c': ['C', 'G', 'C', 'F', 'A', 'D'],
+    'dadgad': ['D', 'A', 'D', 'G', 'A', 'D'],
+    'open_d': ['D', 'A', 'D', 'F#', 'A', 'D'],
+    'open_e': ['E', 'B', 'E', 'G#', 'B', 'E'],
+    'open_g': ['D', 'G', 'D', 'G', 'B', 'D'],
+    'open_c': ['C', 'G', 'C', 'G', 'C', 'E'],
+}
+
+# String counts accepted for custom tunings; each distinct tuning builds a
+# fretboard index, so arbitrary note lists are refused
+MIN_TUNING_STRINGS = 4
+MAX_TUNING_STRINGS = 8
+
 
 def normalize_chord_name(chord: str) -> str:
     """Normalize chord name by converting flats to sharps."""
@@ -48,6 +114,13 @@ def parse_chord(chord_str: str) -> Tuple[str, str, Optional[str]]:
     - "C/E" -> ("C", "", "E")
     - "Dm7/F" -> ("D", "m7", "F")
     """
+    CHORDS_PARSED.inc()
+    return _parse_chord(chord_str)
+
+
+@lru_cache(maxsize=4096)
+def _parse_chord(chord_str: str) -> Tuple[str, str, Optional[str]]:
+    """Memoized body of ``parse_chord``; songs reuse a small chord vocabulary."""
     chord_str = normalize_chord_name(chord_str.strip())
     
     # Check for slash chord (bass note)
@@ -67,6 +140,9 @@ def parse_chord(chord_str: str) -> Tuple[str, str, Optional[str]]:
     return root, quality, bass_note
 
 
+function_caches.register("parse_chord", _parse_chord)
+
+
 def transpose_note(note: str, semitones: int) -> str:
     """Transpose a single note by a number of semitones."""
     note = normalize_chord_name(note)
@@ -90,6 +166,7 @@ def transpose_chord(chord_str: str, semitones: int) -> str:
     Returns:
         Transposed chord string
     """
+    CHORDS_TRANSPOSED.inc()
     try:
         root, quality, bass_note = parse_chord(chord_str)
         
@@ -159,6 +236,94 @@ def transpose_chord_progression(chords: List[str], semitones: int) -> List[str]:
     return [transpose_chord(chord, semitones) for chord in chords]
 
 
+def is_chord_line(line: str) -> bool:
+    """Whether a line holds only chord names (a chord line above lyrics)."""
+    tokens = line.split()
+    return bool(tokens) and all(CHORD_NAME_RE.fullmatch(token) for token in tokens)
+
+
+def resolve_tuning(tuning: Union[str, Sequence[str]]) -> Tuple[str, ...]:
+    """
+    Normalized open-string notes of a tuning.
+    
+    Args:
+        tuning: A ``TUNINGS`` name or a list of notes, low string first
+    
+    Raises:
+        ValueError: for unknown names, invalid notes or an unsupported
+            number of strings
+    """
+    if isinstance(tuning, str):
+        if tuning not in TUNINGS:
+            raise ValueError(f"Unknown tuning: {tuning}")
+        tuning = TUNINGS[tuning]
+    if not MIN_TUNING_STRINGS <= len(tuning) <= MAX_TUNING_STRINGS:
+        raise ValueError(
+            f"Tuning must have {MIN_TUNING_STRINGS} to {MAX_TUNING_STRINGS} strings"
+        )
+    notes = tuple(normalize_chord_name(note) for note in tuning)
+    if any(note not in CHROMATIC_SCALE for note in notes):
+        raise ValueError("Tuning must be a list of note names")
+    return notes
+
+
+def extract_sheet_lines(text: str) -> List[List[str]]:
+    """
+    Chords of a lyrics-and-chords text, one list per line that has any.
+    
+    Uses the same notion of a chord as ``transpose_text``: every token of a
+    chord line, and inline ``[Chord]`` markers elsewhere.
+    """
+    lines = []
+    for line in text.split('\n'):
+        if is_chord_line(line):
+            chords = line.split()
+        else:
+            chords = INLINE_CHORD_RE.findall(line)
+        if chords:
+            lines.append(chords)
+    return lines
+
+
+def extract_sheet_chords(text: str) -> List[str]:
+    """Chords of a lyrics-and-chords text in order of appearance."""
+    return [chord for line in extract_sheet_lines(text) for chord in line]
+
+
+def transpose_text(text: str, semitones: int) -> str:
+    """
+    Transpose the chords of a lyrics-and-chords text.
+    
+    Chord lines are transposed keeping each chord at its column where the
+    new names leave room, so chords stay above the right syllables. Inline
+    ``[Chord]`` markers are transposed anywhere; lyric words are untouched.
+    
+    Args:
+        text: Text containing chords above lyrics
+        semitones: Number of semitones to transpose
+    
+    Returns:
+        Transposed text
+    """
+    if semitones % 12 == 0:
+        return text
+    
+    lines = []
+    for line in text.split('\n'):
+        if is_chord_line(line):
+            out = ''
+            for match in re.finditer(r'\S+', line):
+                start = max(match.start(), len(out) + 1) if out else match.start()
+                out = out.ljust(start) + transpose_chord(match.group(0), semitones)
+            line = out
+        else:
+            line = INLINE_CHORD_RE.sub(
+                lambda match: f"[{transpose_chord(match.group(1), semitones)}]", line
+            )
+        lines.append(line)
+    return '\n'.join(lines)
+
+
 def calculate_capo_transposition(original_key: str, capo_fret: int) -> str:
     """
     Calculate the effective key when using a capo.
@@ -245,20 +410,85 @@ def get_chord_intervals(chord_str: str) -> List[int]:
         return CHORD_PATTERNS['major']
 
 
-def extract_chords_from_text(text: str) -> List[str]:
+@lru_cache(maxsize=4096)
+def chord_pitch_classes(chord_str: str) -> Tuple[int, int, int]:
     """
-    Extract chord names from lyrics and chords text.
+    Parse a chord into integer pitch classes.
+    
+    Returns ``(root, mask, bass)`` where ``mask`` is a 12-bit set with bit
+    ``n`` set when pitch class ``n`` (C = 0) is in the chord, and ``bass`` is
+    the slash bass or the root.
+    
+    Raises:
+        ValueError: for unparseable chords or unknown qualities
+    """
+    root, quality, bass_note = parse_chord(chord_str)
+    pattern = QUALITY_ALIASES.get(quality)
+    if pattern is None:
+        raise ValueError(f"Unknown chord quality: {quality}")
+    root_pc = CHROMATIC_SCALE.index(root)
+    mask = 0
+    for interval in CHORD_PATTERNS[pattern]:
+        mask |= 1 << ((root_pc + interval) % 12)
+    bass_pc = root_pc
+    if bass_note:
+        bass_note = normalize_chord_name(bass_note)
+        if bass_note not in CHROMATIC_SCALE:
+            raise ValueError(f"Invalid bass note: {bass_note}")
+        bass_pc = CHROMATIC_SCALE.index(bass_note)
+        mask |= 1 << bass_pc
+    return root_pc, mask, bass_pc
+
+
+function_caches.register("chord_pitch_classes", chord_pitch_classes)
+
+
+def canonical_chord_name(chord_str: str) -> str:
+    """
+    Spelling-independent form of a chord name.
+    
+    Roots and bass notes use sharps and each known quality has a single
+    spelling, so "Dbmin7", "C#-7" and "C#m7" are all "C#m7".
+    
+    Raises:
+        ValueError: for unparseable chords
+    """
+    root, quality, bass_note = parse_chord(chord_str)
+    pattern = QUALITY_ALIASES.get(quality)
+    suffix = QUALITY_SUFFIXES.get(pattern, pattern) if pattern else quality
+    name = root + suffix
+    if bass_note:
+        name += '/' + normalize_chord_name(bass_note)
+    return name
+
+
+def chord_lookup_key(name: str) -> str:
+    """
+    Case-folded canonical name used to index and search chord names.
+    
+    Names that are not chords are indexed as typed (with sharps).
+    """
+    text = name.strip()
+    if text:
+        text = text[0].upper() + text[1:]
+    try:
+        key = canonical_chord_name(text)
+    except ValueError:
+        key = normalize_chord_name(text)
+    return key.lower()
+
+
+def extract_chord_sequence(text: str) -> List[str]:
+    """
+    Extract chord names from lyrics and chords text in order of appearance.
     
     Args:
         text: Text containing chords above lyrics
     
     Returns:
-        List of unique chord names found
+        List of chord names, including repeats
     """
-    # Enhanced chord regex to match common chord patterns
-    chord_pattern = r'\b([A-G]#?b?(?:maj|min|m|dim|aug|sus[24]?|add[9]?|[67]|maj7|m7|dim7|sus2|sus4|add9|6|m6|9|11|13)?(?:/[A-G]#?b?)?)\b'
-    
-    matches = re.findall(chord_pattern, text, re.IGNORECASE)
+    matches = CHORD_TOKEN_RE.findall(text)
     
     # Clean and normalize chord names
     chords = []
@@ -268,7 +498,93 @@ def extract_chords_from_text(text: str) -> List[str]:
         if len(chord) >= 1 and not chord.lower() in ['a', 'i', 'am', 'is', 'as', 'me', 'go', 'be', 'do']:
             chords.append(normalize_chord_name(chord))
     
-    return list(set(chords))  # Return unique chords
+    return chords
+
+
+def extract_chords_from_text(text: str) -> List[str]:
+    """
+    Extract chord names from lyrics and chords text.
+    
+    Args:
+        text: Text containing chords above lyrics
+    
+    Returns:
+        List of unique chord names found
+    """
+    return list(set(extract_chord_sequence(text)))  # Return unique chords
+
+
+def _chord_root_and_kind(chord_str: str) -> Optional[Tuple[int, str]]:
+    """Return (root pitch class, 'major' | 'minor' | 'dim') for a chord."""
+    try:
+        root, quality, _ = parse_chord(chord_str)
+    except ValueError:
+        return None
+    if root not in CHROMATIC_SCALE:
+        return None
+    if quality.startswith('dim') or quality.startswith('m7b5'):
+        kind = 'dim'
+    elif quality.startswith('m') and not quality.startswith('maj'):
+        kind = 'minor'
+    else:
+        kind = 'major'
+    return CHROMATIC_SCALE.index(root), kind
+
+
+def detect_key(chords: List[str]) -> Optional[str]:
+    """
+    Guess the key of a chord sequence.
+    
+    Every major and minor key is scored by how many chords are diatonic to it,
+    with extra weight for the tonic chord and for sequences that start or end
+    on it.
+    
+    Args:
+        chords: Chord names in order of appearance
+    
+    Returns:
+        Key name such as "G" or "Em", or None if no chord could be parsed
+    """
+    # Parse and score each distinct chord once, weighted by how often it appears
+    parsed = {chord: _chord_root_and_kind(chord) for chord in set(chords)}
+    counts: Counter = Counter()
+    for chord, count in Counter(chords).items():
+        if parsed[chord]:
+            counts[parsed[chord]] += count
+    if not counts:
+        return None
+    first = next(parsed[c] for c in chords if parsed[c])
+    last = next(parsed[c] for c in reversed(chords) if parsed[c])
+    
+    best_key = None
+    best_score = 0.0
+    for tonic in range(12):
+        for mode, degrees in (('major', MAJOR_KEY_TRIADS), ('minor', MINOR_KEY_TRIADS)):
+            score = 0.0
+            for (root, kind), count in counts.items():
+                if degrees.get((root - tonic) % 12) == kind:
+                    score += count
+            tonic_kind = 'major' if mode == 'major' else 'minor'
+            for end in (first, last):
+                if end == (tonic, tonic_kind):
+                    score += 1.5
+            if score > best_score:
+                best_score = score
+                best_key = CHROMATIC_SCALE[tonic] + ('' if mode == 'major' else 'm')
+    return best_key
+
+
+def detect_song_key(text: str) -> Optional[str]:
+    """
+    Guess the key of a song from its lyrics and chords text.
+    
+    Args:
+        text: Text containing chords above lyrics
+    
+    Returns:
+        Key name, or None if no chords were found
+    """
+    return detect_key(extract_chord_sequence(text))
 
 
 def validate_chord_name(chord_str: str) -> bool:
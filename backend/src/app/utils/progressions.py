@@ -0,0 +1,74 @@
+"""
+Key-invariant chord progression fingerprints.
+
+A progression is reduced to root movements (semitones, mod 12) and coarse
+chord qualities, so the same progression in any key has the same
+fingerprint. Fingerprints are the distinct n-grams of that sequence, e.g.
+C-Am-F-G and D-Bm-G-A both contain ``"M9m8M2M"``.
+"""
+from functools import lru_cache
+from typing import Iterable, List, Optional, Set, Tuple
+
+from app.core.metrics import function_caches
+from app.utils.music_theory import CHROMATIC_SCALE, QUALITY_ALIASES, parse_chord
+
+# Chords per n-gram, and the most n-grams kept per song
+NGRAM_SIZE = 4
+MAX_NGRAMS = 256
+
+# CHORD_PATTERNS key -> quality class; extensions do not change the class
+QUALITY_CLASSES = {
+    'major': 'M', '7': 'M', 'maj7': 'M', '6': 'M', 'add9': 'M', '9': 'M', 'maj9': 'M',
+    'minor': 'm', 'm7': 'm', 'm6': 'm', 'm9': 'm',
+    'dim': 'd', 'dim7': 'd', 'm7b5': 'd',
+    'aug': 'a',
+    'sus2': 's', 'sus4': 's', '7sus4': 's',
+    '5': '5',
+}
+
+
+@lru_cache(maxsize=4096)
+def chord_token(chord: str) -> Optional[Tuple[int, str]]:
+    """``(root pitch class, quality class)`` of a chord, or None."""
+    try:
+        root, quality, _ = parse_chord(chord)
+    except ValueError:
+        return None
+    pattern = QUALITY_ALIASES.get(quality)
+    if pattern is None or root not in CHROMATIC_SCALE:
+        return None
+    return CHROMATIC_SCALE.index(root), QUALITY_CLASSES[pattern]
+
+
+function_caches.register("chord_token", chord_token)
+
+
+def progression_tokens(chords: Iterable[str]) -> List[Tuple[int, str]]:
+    """Parsed chords with repeats of the same chord and unparseable ones dropped."""
+    tokens: List[Tuple[int, str]] = []
+    for chord in chords:
+        token = chord_token(chord)
+        if token is not None and (not tokens or tokens[-1] != token):
+            tokens.append(token)
+    return tokens
+
+
+def progression_ngrams(chords: Iterable[str], n: int = NGRAM_SIZE) -> Set[str]:
+    """
+    Distinct key-invariant n-grams of a chord sequence, at most ``MAX_NGRAMS``
+    (the first ones to appear).
+
+    Each n-gram is the first chord's quality class, then for every
+    following chord the root movement as a hex digit and its quality class.
+    """
+    tokens = progression_tokens(chords)
+    ngrams: Set[str] = set()
+    for start in range(len(tokens) - n + 1):
+        window = tokens[start:start + n]
+        parts = [window[0][1]]
+        for (previous_root, _), (root, quality) in zip(window, window[1:]):
+            parts.append(format((root - previous_root) % 12, 'x') + quality)
+        ngrams.add(''.join(parts))
+        if len(ngrams) >= MAX_NGRAMS:
+            break
+    return ngrams
@@ -0,0 +1,78 @@
+"""
+Chord vocabularies as bitmaps.
+
+A vocabulary is a set of chords reduced to the shapes a player needs: a
+root and one of ``VOCABULARY_CLASSES``. Extensions fold into the nearest
+basic chord (Cmaj7 and Cadd9 are played as C) and slash basses are
+dropped. Each class is a 12-bit block of a 60-bit mask, so a vocabulary
+fits a BIGINT, "only chords I know" is ``song & ~known == 0`` and
+transposing is a rotation of every block. Chords that cannot be parsed set
+``UNREPRESENTABLE``, a bit no set of known chords contains.
+"""
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+from app.core.metrics import function_caches
+from app.utils.music_theory import CHROMATIC_SCALE, QUALITY_ALIASES, parse_chord
+from app.utils.voicings import rotate_mask
+
+# Order fixes the bit layout of stored vocabularies
+VOCABULARY_CLASSES = ('major', 'minor', '7', 'm7', 'dim')
+VOCABULARY_SUFFIXES = {'major': '', 'minor': 'm', '7': '7', 'm7': 'm7', 'dim': 'dim'}
+FULL_MASK = (1 << (12 * len(VOCABULARY_CLASSES))) - 1
+# Set for sheets with a chord outside every class, so no search matches them
+UNREPRESENTABLE = 1 << (12 * len(VOCABULARY_CLASSES))
+
+# CHORD_PATTERNS key -> vocabulary class
+PATTERN_CLASSES = {
+    'major': 'major', '6': 'major', 'add9': 'major', 'maj7': 'major', 'maj9': 'major',
+    'sus2': 'major', 'sus4': 'major', '5': 'major', 'aug': 'major',
+    'minor': 'minor', 'm6': 'minor',
+    '7': '7', '9': '7', '7sus4': '7',
+    'm7': 'm7', 'm9': 'm7',
+    'dim': 'dim', 'dim7': 'dim', 'm7b5': 'dim',
+}
+_CLASS_OFFSETS = {name: 12 * index for index, name in enumerate(VOCABULARY_CLASSES)}
+
+
+@lru_cache(maxsize=4096)
+def chord_bit(chord: str) -> Optional[int]:
+    """Bit of a chord in a vocabulary mask, or None if it cannot be parsed."""
+    try:
+        root, quality, _ = parse_chord(chord)
+    except ValueError:
+        return None
+    pattern = QUALITY_ALIASES.get(quality)
+    if pattern is None or root not in CHROMATIC_SCALE:
+        return None
+    return _CLASS_OFFSETS[PATTERN_CLASSES[pattern]] + CHROMATIC_SCALE.index(root)
+
+
+function_caches.register("chord_bit", chord_bit)
+
+
+def vocabulary_mask(chords: Iterable[str]) -> int:
+    """Mask of the chords, with ``UNREPRESENTABLE`` if any cannot be parsed."""
+    mask = 0
+    for chord in chords:
+        bit = chord_bit(chord)
+        mask |= UNREPRESENTABLE if bit is None else 1 << bit
+    return mask
+
+
+def vocabulary_chords(mask: int) -> List[str]:
+    """Chord names of a mask, by class then root."""
+    return [
+        CHROMATIC_SCALE[root] + VOCABULARY_SUFFIXES[name]
+        for name, offset in _CLASS_OFFSETS.items()
+        for root in range(12)
+        if mask >> (offset + root) & 1
+    ]
+
+
+def transpose_vocabulary(mask: int, semitones: int) -> int:
+    """Every chord of a mask moved up by ``semitones``."""
+    transposed = mask & UNREPRESENTABLE
+    for offset in _CLASS_OFFSETS.values():
+        transposed |= rotate_mask(mask >> offset & 0xFFF, semitones) << offset
+    return transposed
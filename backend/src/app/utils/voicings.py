@@ -0,0 +1,311 @@
+"""
+Guitar voicing generation.
+
+A ``Fretboard`` enumerates, once per tuning, every playable fingering whose
+pitch classes form a known chord (``CHORD_PATTERNS`` in any key, optionally
+without its fifth) and indexes them by ``(pitch-class mask, bass pitch
+class)``. Looking up a chord is then a dictionary access on the parsed
+chord's pitch classes, and a capo is a rotation of those pitch classes.
+"""
+import heapq
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from app.core.config import settings
+from app.core.metrics import function_caches
+from app.utils.music_theory import (
+    CHORD_PATTERNS,
+    CHROMATIC_SCALE,
+    STANDARD_TUNING,
+    chord_pitch_classes,
+    resolve_tuning,
+    transpose_chord,
+)
+
+MUTED = -1
+MAX_SPAN = 3  # frets between the lowest and highest fretted note
+MAX_FINGERS = 4
+MIN_STRINGS = 4  # sounding strings, unless the chord has fewer notes
+VOICINGS_PER_CHORD = 40  # kept per (mask, bass), easiest first
+OPEN_POSITION = 3  # highest fret of an open-position shape
+EASY_DIFFICULTY = 4.0  # open shapes at most this hard count as easy
+
+
+class Voicing(NamedTuple):
+    """One fingering; ``frets`` are absolute, low string first, -1 muted."""
+    frets: Tuple[int, ...]
+    difficulty: float
+    fingers: int
+    barre: Optional[int]
+
+    @property
+    def base_fret(self) -> int:
+        """Lowest fretted position, for drawing the diagram window."""
+        fretted = [fret for fret in self.frets if fret > 0]
+        return min(fretted) if fretted else 1
+
+
+def _chord_masks() -> Dict[int, int]:
+    """Every indexable pitch-class mask -> number of notes of its full chord."""
+    masks: Dict[int, int] = {}
+    for intervals in CHORD_PATTERNS.values():
+        for root in range(12):
+            full = 0
+            for interval in intervals:
+                full |= 1 << ((root + interval) % 12)
+            notes = bin(full).count("1")
+            masks[full] = notes
+            if notes >= 4 and 7 in intervals:
+                # Fifths are commonly dropped from four-note chords
+                masks.setdefault(full & ~(1 << ((root + 7) % 12)), notes)
+    return masks
+
+
+def _submasks(masks: Sequence[int]) -> frozenset:
+    """All subsets of the given masks, used to prune enumeration early."""
+    subsets = set()
+    for mask in masks:
+        sub = mask
+        while True:
+            subsets.add(sub)
+            if sub == 0:
+                break
+            sub = (sub - 1) & mask
+    return frozenset(subsets)
+
+
+def without_fifth(root: int, mask: int) -> int:
+    """Mask with the chord's fifth removed."""
+    return mask & ~(1 << ((root + 7) % 12))
+
+
+class Fretboard:
+    """Precomputed pitch classes and voicing index for one tuning."""
+
+    def __init__(self, tuning: Sequence[str], max_fret: int):
+        self.tuning = resolve_tuning(tuning)
+        self.max_fret = max_fret
+        self.open_pitch_classes = tuple(CHROMATIC_SCALE.index(note) for note in self.tuning)
+        # pitch_classes[string][fret]
+        self.pitch_classes = tuple(
+            tuple((open_pc + fret) % 12 for fret in range(max_fret + 1))
+            for open_pc in self.open_pitch_classes
+        )
+        self._chord_masks = _chord_masks()
+        self._partial_masks = _submasks(list(self._chord_masks))
+        self._index: Dict[Tuple[int, int], List[Voicing]] = {}
+        self._build()
+        # (mask, bass) -> difficulty of its easiest easy open shape
+        self._open_shapes: Dict[Tuple[int, int], float] = {}
+        for key, voicings in self._index.items():
+            for voicing in voicings:
+                if voicing.difficulty > EASY_DIFFICULTY:
+                    break
+                if is_open_shape(voicing):
+                    self._open_shapes[key] = voicing.difficulty
+                    break
+
+    def _build(self) -> None:
+        """Enumerate playable fingerings window by window."""
+        found: Dict[Tuple[int, int], List[Voicing]] = {}
+        for window in range(1, self.max_fret - MAX_SPAN + 1):
+            for frets, mask in self._enumerate(window):
+                voicing = self._score(frets, window)
+                if voicing is None:
+                    continue
+                bass = next(
+                    self.pitch_classes[string][fret]
+                    for string, fret in enumerate(frets)
+                    if fret != MUTED
+                )
+                found.setdefault((mask, bass), []).append(voicing)
+        self._index = {
+            key: heapq.nsmallest(VOICINGS_PER_CHORD, voicings, key=lambda v: v.difficulty)
+            for key, voicings in found.items()
+        }
+
+    def _enumerate(self, window: int) -> Iterator[Tuple[Tuple[int, ...], int]]:
+        """Fingerings whose lowest fretted note is at ``window`` (or all open at 1)."""
+        choices = [MUTED, 0, *range(window, min(window + MAX_SPAN, self.max_fret) + 1)]
+        strings = len(self.tuning)
+        frets: List[int] = []
+        partial = self._partial_masks
+        chords = self._chord_masks
+
+        def walk(string: int, mask: int, sounding: int, gaps: int) -> Iterator:
+            if string == strings:
+                if mask in chords and sounding >= min(MIN_STRINGS, chords[mask]):
+                    fretted = [fret for fret in frets if fret > 0]
+                    if (min(fretted) if fretted else 1) == window:
+                        yield tuple(frets), mask
+                return
+            for fret in choices:
+                if fret == MUTED:
+                    # Muted strings: any number below the chord, one gap inside it
+                    if sounding and gaps:
+                        continue
+                    frets.append(fret)
+                    yield from walk(string + 1, mask, sounding, gaps + (1 if sounding else 0))
+                else:
+                    new_mask = mask | (1 << self.pitch_classes[string][fret])
+                    if new_mask not in partial:
+                        continue
+                    frets.append(fret)
+                    yield from walk(string + 1, new_mask, sounding + 1, gaps)
+                frets.pop()
+
+        yield from walk(0, 0, 0, 0)
+
+    @staticmethod
+    def _score(frets: Tuple[int, ...], window: int) -> Optional[Voicing]:
+        """Fingers needed and difficulty, or None when unplayable."""
+        fretted = [fret for fret in frets if fret > 0]
+        lowest = min(fretted) if fretted else 0
+        barre = None
+        fingers = len(fretted)
+        if fingers > MAX_FINGERS and fretted.count(lowest) >= 2:
+            # Only when fingers run out: a barre covers every string from
+            # its first note upwards, so nothing above may be open or muted
+            first = frets.index(lowest)
+            if all(fret >= lowest for fret in frets[first:]):
+                barre = lowest
+                fingers = 1 + sum(1 for fret in fretted if fret > lowest)
+        if fingers > MAX_FINGERS:
+            return None
+        sounding = [fret for fret in frets if fret != MUTED]
+        first_sounding = frets.index(sounding[0])
+        inner_mutes = frets[first_sounding:].count(MUTED)
+        difficulty = (
+            (max(frets) - lowest if fretted else 0) * 1.0
+            + fingers * 0.5
+            + (1.5 if barre else 0.0)
+            + inner_mutes * 2.5
+            + (len(frets) - len(sounding)) * 0.5
+            + (window - 1) * 0.3
+            - (len(sounding) - len(fretted)) * 0.2
+        )
+        return Voicing(frets, round(difficulty, 2), fingers, barre)
+
+    def voicings(self, chord: str, limit: int = 5) -> List[Voicing]:
+        """Easiest voicings of a chord name, or [] for unknown chords."""
+        try:
+            root, mask, bass = chord_pitch_classes(chord)
+        except ValueError:
+            return []
+        return self.voicings_for_pitch_classes(root, mask, bass, limit=limit)
+
+    def voicings_for_pitch_classes(
+        self, root: int, mask: int, bass: int, limit: int = 5
+    ) -> List[Voicing]:
+        """Easiest voicings of a pitch-class set over a given bass."""
+        candidates = [self._index.get((mask, bass), [])]
+        reduced = without_fifth(root, mask)
+        if reduced != mask and bass != (root + 7) % 12:
+            candidates.append(self._index.get((reduced, bass), []))
+        merged = heapq.merge(*candidates, key=lambda voicing: voicing.difficulty)
+        return [voicing for _, voicing in zip(range(limit), merged)]
+
+    def open_shape_difficulty(self, root: int, mask: int, bass: int) -> Optional[float]:
+        """Difficulty of the easiest easy open shape of a chord, if it has one."""
+        difficulty = self._open_shapes.get((mask, bass))
+        reduced = without_fifth(root, mask)
+        if reduced != mask and bass != (root + 7) % 12:
+            other = self._open_shapes.get((reduced, bass))
+            if other is not None and (difficulty is None or other < difficulty):
+                difficulty = other
+        return difficulty
+
+
+def is_open_shape(voicing: Voicing) -> bool:
+    """Played in the first frets with ringing open strings and no barre."""
+    return (
+        voicing.barre is None
+        and 0 in voicing.frets
+        and max(voicing.frets) <= OPEN_POSITION
+    )
+
+
+def rotate_mask(mask: int, semitones: int) -> int:
+    """Shift every pitch class of a 12-bit mask up by ``semitones``."""
+    shift = semitones % 12
+    return ((mask << shift) | (mask >> (12 - shift))) & 0xFFF
+
+
+class CapoOption(NamedTuple):
+    """How a song plays with the capo at one fret."""
+    capo: int
+    open_chords: int  # chord occurrences that fall into easy open shapes
+    total_chords: int
+    difficulty: float  # mean difficulty per chord occurrence
+    shapes: Dict[str, str]  # chord as written -> shape played behind the capo
+
+
+@lru_cache(maxsize=16)
+def _fretboard(tuning: Tuple[str, ...]) -> Fretboard:
+    return Fretboard(tuning, max_fret=settings.MAX_CHORD_POSITIONS)
+
+
+function_caches.register("fretboard", _fretboard)
+
+
+def get_fretboard(tuning: Union[str, Sequence[str]] = STANDARD_TUNING) -> Fretboard:
+    """Shared fretboard for a tuning name or note list, built on first use."""
+    return _fretboard(resolve_tuning(tuning))
+
+
+def warm_fretboard() -> None:
+    """Build the standard-tuning index up front so the first lookup is fast."""
+    get_fretboard()
+
+
+# Chords with no voicing at all in a tuning count this much per occurrence
+UNPLAYABLE_DIFFICULTY = 10.0
+
+
+def rank_capo_positions(
+    chords: Iterable[str],
+    tuning: Union[str, Sequence[str]] = STANDARD_TUNING,
+    max_capo: int = 7,
+) -> List[CapoOption]:
+    """
+    Rank capo frets by how many of a song's chords become easy open shapes.
+
+    Each distinct chord is parsed once; every capo position is then a
+    rotation of its pitch classes and a lookup in the tuning's tables.
+    Ties go to the easier, then the lower, capo position.
+    """
+    fretboard = get_fretboard(tuning)
+    parsed = []
+    total = 0
+    for chord, count in Counter(chords).items():
+        try:
+            parsed.append((chord, chord_pitch_classes(chord), count))
+        except ValueError:
+            continue
+        total += count
+
+    options = []
+    for capo in range(max_capo + 1):
+        open_chords = 0
+        difficulty = 0.0
+        for chord, (root, mask, bass), count in parsed:
+            shape = ((root - capo) % 12, rotate_mask(mask, -capo), (bass - capo) % 12)
+            easy = fretboard.open_shape_difficulty(*shape)
+            if easy is not None:
+                open_chords += count
+                difficulty += easy * count
+                continue
+            best = fretboard.voicings_for_pitch_classes(*shape, limit=1)
+            difficulty += (best[0].difficulty if best else UNPLAYABLE_DIFFICULTY) * count
+        options.append(
+            CapoOption(
+                capo=capo,
+                open_chords=open_chords,
+                total_chords=total,
+                difficulty=round(difficulty / total, 2) if total else 0.0,
+                shapes={chord: transpose_chord(chord, -capo) for chord, _, _ in parsed},
+            )
+        )
+    options.sort(key=lambda option: (-option.open_chords, option.difficulty, option.capo))
+    return options
@@ -3,11 +3,16 @@ Pytest configuration and fixtures.
 """
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
+from app import schemas
+from app.core.config import settings
 from app.db.base import Base, get_db
 from app.main import app
+from app.models.base import Base as ModelBase
+from app.models.user import User
 
 # Test database URL - use SQLite for testing
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -29,6 +34,9 @@ def override_get_db():
 
 app.dependency_overrides[get_db] = override_get_db
 
+# Endpoints exceeding their declared query budget fail the test
+settings.QUERY_BUDGET_ENFORCE = True
+
 
 @pytest.fixture(scope="session")
 def db():
@@ -54,4 +62,42 @@ def test_user():
         "password": "testpassword",
         "first_name": "Test",
         "last_name": "User"
-    }
\ No newline at end of file
+    }
+
+
+@pytest.fixture
+def db_session():
+    """In-memory database with all model tables, configured like SessionLocal."""
+    model_engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    ModelBase.metadata.create_all(bind=model_engine)
+    session = sessionmaker(
+        autocommit=False, autoflush=False, expire_on_commit=False, bind=model_engine
+    )()
+    session.statements = []
+
+    @event.listens_for(model_engine, "before_cursor_execute")
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        session.statements.append(statement)
+
+    yield session
+    session.close()
+    model_engine.dispose()
+
+
+def make_user(db, name: str = "owner") -> User:
+    """Insert a user to own test data."""
+    user = User(email=f"{name}@example.com", username=name, hashed_password="x")
+    db.add(user)
+    db.commit()
+    return user
+
+
+def song_in(**overrides) -> schemas.SongCreate:
+    """Build a song payload."""
+    data = {"title": "Song", "artist": "Artist", "lyrics_and_chords": "C G Am F"}
+    data.update(overrides)
+    return schemas.SongCreate(**data)
@@ -0,0 +1,156 @@
+"""
+Test SVG chord diagram rendering and resolution.
+"""
+import xml.dom.minidom
+
+import pytest
+from starlette.requests import Request
+
+from app import schemas
+from app.api.api_v1.endpoints.music.diagrams import IMMUTABLE, parse_positions, svg_response
+from app.models.chord import CustomChord
+from app.services.chord import custom_chord_service
+from app.services.maintenance import record_chord_usage
+from app.utils.chord_diagrams import (
+    make_spec,
+    render_diagram,
+    render_sprite_sheet,
+    spec_from_definition,
+    spec_from_voicing,
+)
+from app.utils.voicings import get_fretboard
+from tests.conftest import make_user
+
+
+def request_with(headers=None) -> Request:
+    raw = [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+def test_render_is_valid_and_content_addressed():
+    spec = make_spec([1, 3, 3, 2, 1, 1], [1, 3, 4, 2, 1, 1])
+    rendered = render_diagram(spec)
+    document = xml.dom.minidom.parseString(rendered.svg)
+
+    # The index finger barre is drawn once, across all six strings
+    barres = [rect for rect in document.getElementsByTagName("rect") if rect.getAttribute("rx")]
+    assert len(barres) == 1
+    assert render_diagram(make_spec([1, 3, 3, 2, 1, 1], [1, 3, 4, 2, 1, 1])) is rendered
+    assert render_diagram(make_spec([1, 3, 3, 2, 1, 1])).etag != rendered.etag
+    assert render_diagram(make_spec([1, 3, 3, 2, 1, 1], starting_fret=5)).etag != rendered.etag
+    assert render_diagram(make_spec([1, 3, 3, 2, 1, 1], tuning="drop_d")).etag != rendered.etag
+
+
+def test_high_voicings_move_up_the_neck():
+    voicing = next(v for v in get_fretboard().voicings("A", limit=40) if v.frets == (5, 7, 7, 6, 5, 5))
+    spec = spec_from_voicing(voicing)
+    assert spec.starting_fret == 5
+    assert spec.frets == (1, 3, 3, 2, 1, 1)
+    assert "5fr" in render_diagram(spec).svg
+
+
+def test_invalid_specs():
+    with pytest.raises(ValueError):
+        make_spec([0, 2, 2])
+    with pytest.raises(ValueError):
+        make_spec([200000, 0, 0, 0, 0, 0])
+    with pytest.raises(ValueError):
+        make_spec([1, 3, 3, 2, 1, 1], starting_fret=23)
+    with pytest.raises(ValueError):
+        make_spec([1, 3, 3, 2, 1, 1], [1, 3, 4, 2, 1, 9])
+    assert make_spec([1, 3, 3, 2, 1, 1], starting_fret=20).starting_fret == 20
+    assert spec_from_definition("x32010") is None
+    assert spec_from_definition([-1, 3, 2, 0, 1, 0]).frets == (-1, 3, 2, 0, 1, 0)
+    assert spec_from_definition({"fret_positions": [3, 2, 0, 0, 0, 3], "starting_fret": 2}).starting_fret == 2
+
+
+def test_sprite_sheet_shares_symbols():
+    diagrams = [(chord, spec_from_voicing(get_fretboard().voicings(chord, 1)[0])) for chord in ["C", "G"]]
+
+    sheet = render_sprite_sheet(diagrams + [("C again", diagrams[0][1])])
+    document = xml.dom.minidom.parseString(sheet.svg)
+    assert len(document.getElementsByTagName("symbol")) == 2
+    assert len(document.getElementsByTagName("use")) == 3
+    assert render_sprite_sheet(diagrams).etag != sheet.etag
+
+
+def test_svg_response_etags():
+    rendered = render_diagram(make_spec([-1, 3, 2, 0, 1, 0]))
+    response = svg_response(request_with(), rendered, IMMUTABLE)
+    assert response.status_code == 200
+    assert response.media_type == "image/svg+xml"
+    assert response.headers["etag"] == f'"{rendered.etag}"'
+    assert response.headers["cache-control"] == IMMUTABLE
+
+    cached = svg_response(request_with({"If-None-Match": f'"{rendered.etag}"'}), rendered, IMMUTABLE)
+    assert cached.status_code == 304
+    assert cached.body == b""
+
+
+def test_parse_positions():
+    assert parse_positions("x32010") == [-1, 3, 2, 0, 1, 0]
+    assert parse_positions("-1,10,12,12,11,10") == [-1, 10, 12, 12, 11, 10]
+
+
+class TestDiagramResolution:
+    """Test whole-song diagram resolution."""
+
+    def add_chord(self, db, user, name, frets, verified=False, usage=0):
+        chord = custom_chord_service.create_with_user(
+            db,
+            obj_in=schemas.CustomChordCreate(
+                name=name, root_note=name[0], chord_type="major", fret_positions=frets
+            ),
+            user_id=user.id,
+        )
+        chord.is_verified = verified
+        chord.usage_count = usage
+        db.commit()
+        return chord
+
+    def test_sources_in_priority_order(self, db_session):
+        owner = make_user(db_session)
+        other = make_user(db_session, "other")
+        self.add_chord(db_session, other, "Am", [5, 7, 7, 5, 5, 5], verified=True)
+        self.add_chord(db_session, other, "Dm", [-1, 5, 7, 7, 6, 5], verified=True, usage=1)
+        popular_dm = self.add_chord(db_session, other, "Dm", [-1, -1, 0, 2, 3, 1], verified=True, usage=9)
+        self.add_chord(db_session, other, "Em", [0, 2, 2, 0, 0, 0])  # private
+        own_am = self.add_chord(db_session, owner, "Am", [-1, 0, 2, 2, 1, 0])
+        db_session.statements.clear()
+
+        resolved = custom_chord_service.resolve_diagrams(
+            db_session,
+            chords=["G", "Am", "Dm", "G", "Em", "Gb", "Xyz"],
+            user_id=owner.id,
+            definitions={"G": {"fret_positions": [3, 2, 0, 0, 3, 3]}},
+        )
+
+        assert len(db_session.statements) == 1
+        assert [(item.chord, item.source) for item in resolved] == [
+            ("G", "song"), ("Am", "custom"), ("Dm", "verified"), ("Em", "generated"),
+            ("Gb", "generated"), ("Xyz", None),
+        ]
+        assert resolved[0].spec.frets == (3, 2, 0, 0, 3, 3)
+        assert resolved[1].chord_id == own_am.id
+        assert resolved[2].chord_id == popular_dm.id
+        assert resolved[5].spec is None
+
+    def test_enharmonic_names_resolve(self, db_session):
+        user = make_user(db_session)
+        chord = self.add_chord(db_session, user, "C#m", [-1, 4, 6, 6, 5, 4])
+        (item,) = custom_chord_service.resolve_diagrams(db_session, chords=["Dbm"], user_id=user.id)
+        assert item.chord_id == chord.id
+
+    def test_usage_recorded_in_one_statement(self, db_session):
+        user = make_user(db_session)
+        chords = [
+            self.add_chord(db_session, user, "A", [-1, 0, 2, 2, 2, 0], verified=True),
+            self.add_chord(db_session, user, "B", [-1, 2, 4, 4, 4, 2], verified=True),
+        ]
+        db_session.statements.clear()
+
+        record_chord_usage([chord.id for chord in chords], session_factory=lambda: db_session)
+
+        assert len(db_session.statements) == 1
+        counts = db_session.query(CustomChord.usage_count).order_by(CustomChord.id).all()
+        assert [count for (count,) in counts] == [1, 1]
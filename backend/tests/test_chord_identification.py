@@ -0,0 +1,306 @@
+"""
+Test chord identification from fret positions.
+"""
+import pytest
+from sqlalchemy import select
+
+from app import schemas
+from app.models.chord import CustomChord, chord_names
+from app.services.chord import custom_chord_service
+from app.utils.chord_identification import (
+    identify_chord,
+    identify_chord_name,
+    shape_fingerprint,
+    to_absolute,
+)
+from app.utils.music_theory import chord_lookup_key
+from tests.conftest import make_user
+
+
+@pytest.mark.parametrize(
+    "frets, starting_fret, name",
+    [
+        ([-1, 3, 2, 0, 1, 0], 1, "C"),
+        ([3, 2, 0, 0, 0, 3], 1, "G"),
+        ([-1, 0, 2, 2, 1, 0], 1, "Am"),
+        ([-1, 0, 2, 0, 2, 0], 1, "A7"),
+        ([-1, -1, 0, 2, 1, 1], 1, "Dm7"),
+        ([1, 3, 3, 2, 1, 1], 5, "A"),
+        ([-1, 1, 3, 1, 2, 1], 3, "Cm7"),
+        ([0, 3, 2, 0, 1, 0], 1, "C/E"),
+        ([-1, 5, 2, 0, 1, 0], 1, "Cadd9/D"),
+    ],
+)
+def test_identify_chord(frets, starting_fret, name):
+    assert identify_chord_name(frets, starting_fret) == name
+
+
+def test_candidates_are_ranked():
+    """Alternative readings follow the root-position name."""
+    matches = identify_chord([-1, 0, 2, 2, 1, 0])
+    assert [match.name for match in matches] == ["Am", "C6/A"]
+    assert matches[0].score > matches[1].score
+
+
+def test_alternate_tuning():
+    """The same shape names differently in drop D."""
+    assert identify_chord_name([0, 0, 0, 2, 3, 2], tuning=["D", "A", "D", "G", "B", "E"]) == "D"
+
+
+def test_unknown_shapes():
+    assert identify_chord([-1, -1, -1, -1, -1, -1]) == []
+    assert identify_chord_name([0, 1, 2, 3, 4, 5]) is None
+
+
+def test_relative_frets():
+    assert to_absolute([-1, 0, 1, 3], starting_fret=5) == (-1, 0, 5, 7)
+
+
+def chord_in(**overrides) -> schemas.CustomChordCreate:
+    data = {"name": "My C", "root_note": "C", "chord_type": "major", "fret_positions": [-1, 3, 2, 0, 1, 0]}
+    data.update(overrides)
+    return schemas.CustomChordCreate(**data)
+
+
+class TestCustomChordIdentification:
+    """Test custom chords are named from their shapes."""
+
+    def test_create_and_update(self, db_session):
+        user = make_user(db_session)
+        chord = custom_chord_service.create_with_user(
+            db_session, obj_in=chord_in(fret_positions=[1, 3, 3, 2, 1, 1]), user_id=user.id
+        )
+        assert chord.identified_name == "F"
+
+        chord = custom_chord_service.update(
+            db_session, db_obj=chord, obj_in=schemas.CustomChordUpdate(starting_fret=3)
+        )
+        assert chord.identified_name == "G"
+
+    def test_bulk_create(self, db_session):
+        user = make_user(db_session)
+        custom_chord_service.create_many(
+            db_session,
+            objs_in=[chord_in(name="a", fret_positions=[-1, 0, 2, 2, 1, 0])],
+            extra={"user_id": user.id},
+        )
+        assert db_session.query(CustomChord.identified_name).scalar() == "Am"
+
+    def test_backfill_in_batches(self, db_session):
+        user = make_user(db_session)
+        shapes = [[-1, 3, 2, 0, 1, 0], [3, 2, 0, 0, 0, 3], [0, 1, 2, 3, 4, 5]]
+        db_session.add_all(
+            CustomChord(
+                name=str(index), root_note="C", chord_type="major",
+                fret_positions=frets, user_id=user.id,
+            )
+            for index, frets in enumerate(shapes)
+        )
+        db_session.commit()
+        db_session.statements.clear()
+
+        updated = custom_chord_service.backfill_shape_columns(db_session, batch_size=2)
+
+        assert updated == 3
+        names = db_session.query(CustomChord.identified_name).order_by(CustomChord.id).all()
+        assert [name for (name,) in names] == ["C", "G", None]
+        assert db_session.query(CustomChord.shape_fingerprint).filter(
+            CustomChord.shape_fingerprint.is_(None)
+        ).count() == 0
+        # One executemany per batch
+        updates = [sql for sql in db_session.statements if sql.startswith("UPDATE")]
+        assert len(updates) == 2
+        assert custom_chord_service.backfill_shape_columns(db_session) == 0
+
+
+class TestChordNameIndex:
+    """Test chord search through the name lookup index."""
+
+    def make_chords(self, db, *specs):
+        user = make_user(db)
+        chords = []
+        for index, (name, alternatives) in enumerate(specs):
+            # Distinct shapes, so the chords are not merged; the first is x32010
+            frets = [-1, 3, 2, 0, 1, index]
+            chord = custom_chord_service.create_with_user(
+                db,
+                obj_in=chord_in(name=name, alternative_names=alternatives, fret_positions=frets),
+                user_id=user.id,
+            )
+            chord.is_verified = True
+            chords.append(chord)
+        db.commit()
+        return chords
+
+    def test_lookup_keys(self):
+        assert chord_lookup_key("Db7") == chord_lookup_key("C#7") == "c#7"
+        assert chord_lookup_key("C#min7") == chord_lookup_key("dbm7") == "c#m7"
+        assert chord_lookup_key("CM7") == chord_lookup_key("Cmaj7")
+        assert chord_lookup_key("Gb/Bb") == "f#/a#"
+        assert chord_lookup_key(" My chord ") == "my chord"
+
+    def test_search_matches_equivalent_spellings(self, db_session):
+        c_sharp_7, _, unverified = self.make_chords(
+            db_session, ("C#7", None), ("Db7sus4", ["C#sus47"]), ("Db7", None)
+        )
+        unverified.is_verified = False
+        db_session.commit()
+
+        found = custom_chord_service.search_by_name(db_session, name="Db7")
+        assert {chord.name for chord in found} == {"C#7", "Db7sus4"}
+        found = custom_chord_service.search_by_name(db_session, name="C#7s")
+        assert [chord.name for chord in found] == ["Db7sus4"]
+
+    def test_search_matches_alternative_and_identified_names(self, db_session):
+        self.make_chords(db_session, ("Shape one", ["Eb add9"]))
+        assert [c.name for c in custom_chord_service.search_by_name(db_session, name="D# add")] == ["Shape one"]
+        # Identified from x32010
+        assert [c.name for c in custom_chord_service.search_by_name(db_session, name="C")] == ["Shape one"]
+
+    def test_index_follows_updates_and_deletes(self, db_session):
+        (chord,) = self.make_chords(db_session, ("Old", None))
+        custom_chord_service.update(
+            db_session, db_obj=chord, obj_in=schemas.CustomChordUpdate(name="New")
+        )
+        keys = {key for (key,) in db_session.execute(select(chord_names.c.name_key))}
+        assert keys == {"new", "c"}
+
+        custom_chord_service.remove_many(db_session, ids=[chord.id])
+        assert db_session.execute(select(chord_names)).all() == []
+
+
+class TestShapeDeduplication:
+    """Test identical shapes are stored once."""
+
+    def test_fingerprint_is_absolute(self):
+        assert shape_fingerprint([1, 3, 3, 2, 1, 1], 5) == shape_fingerprint([5, 7, 7, 6, 5, 5])
+        assert shape_fingerprint([0, 2, 2, 1, 0, 0]) == "E-A-D-G-B-E:0,2,2,1,0,0"
+        assert shape_fingerprint([0, 2, 2, 1, 0, 0], tuning="drop_d").startswith("D-A-D")
+
+    def test_own_duplicate_gains_a_name(self, db_session):
+        user = make_user(db_session)
+        first = custom_chord_service.create_with_user(db_session, obj_in=chord_in(), user_id=user.id)
+        again = custom_chord_service.create_with_user(
+            db_session, obj_in=chord_in(name="C major", alternative_names=["My C"]), user_id=user.id
+        )
+
+        assert again.id == first.id
+        assert again.alternative_names == ["C major"]
+        assert db_session.query(CustomChord).count() == 1
+        keys = {key for (key,) in db_session.execute(select(chord_names.c.name_key))}
+        assert "c major" in keys
+
+    def test_copy_of_verified_shape_is_linked(self, db_session):
+        owner = make_user(db_session)
+        verified = custom_chord_service.create_with_user(db_session, obj_in=chord_in(), user_id=owner.id)
+        verified.is_verified = True
+        db_session.commit()
+        other = make_user(db_session, "other")
+
+        copy = custom_chord_service.create_with_user(
+            db_session, obj_in=chord_in(name="Other C"), user_id=other.id
+        )
+        assert copy.canonical_id == verified.id
+        assert copy.user_id == other.id
+
+    def test_bulk_create_reuses_shapes(self, db_session):
+        owner = make_user(db_session)
+        verified = custom_chord_service.create_with_user(db_session, obj_in=chord_in(), user_id=owner.id)
+        verified.is_verified = True
+        db_session.commit()
+        user = make_user(db_session, "other")
+        mine = custom_chord_service.create_with_user(
+            db_session, obj_in=chord_in(name="Mine", fret_positions=[3, 2, 0, 0, 0, 3]), user_id=user.id
+        )
+
+        result = custom_chord_service.create_many(
+            db_session,
+            objs_in=[
+                chord_in(name="Their C"),
+                chord_in(name="G again", fret_positions=[3, 2, 0, 0, 0, 3]),
+                chord_in(name="E", fret_positions=[0, 2, 2, 1, 0, 0]),
+                chord_in(name="E again", fret_positions=[0, 2, 2, 1, 0, 0]),
+            ],
+            extra={"user_id": user.id},
+        )
+
+        copy_id, g_id, e_id, e_again_id = result.ids
+        assert result.errors == []
+        assert g_id == mine.id and e_again_id == e_id
+        db_session.expire_all()
+        chords = {chord.id: chord for chord in db_session.query(CustomChord)}
+        assert len(chords) == 4
+        assert chords[copy_id].canonical_id == verified.id
+        assert chords[mine.id].alternative_names == ["G again"]
+        assert chords[e_id].alternative_names == ["E again"]
+        keys = {key for (key,) in db_session.execute(select(chord_names.c.name_key))}
+        assert {"g again", "e again", "their c"} <= keys
+
+    def test_reshaped_copies_are_relinked(self, db_session):
+        owner = make_user(db_session)
+        verified = custom_chord_service.create_with_user(db_session, obj_in=chord_in(), user_id=owner.id)
+        verified.is_verified = True
+        e_major = custom_chord_service.create_with_user(
+            db_session, obj_in=chord_in(name="E", fret_positions=[0, 2, 2, 1, 0, 0]), user_id=owner.id
+        )
+        e_major.is_verified = True
+        db_session.commit()
+        other = make_user(db_session, "other")
+        third = make_user(db_session, "third")
+        copy = custom_chord_service.create_with_user(
+            db_session, obj_in=chord_in(name="Other C"), user_id=other.id
+        )
+        second_copy = custom_chord_service.create_with_user(
+            db_session, obj_in=chord_in(name="Third C"), user_id=third.id
+        )
+
+        # A copy edited to another verified shape follows it
+        copy = custom_chord_service.update(
+            db_session, db_obj=copy, obj_in={"fret_positions": [0, 2, 2, 1, 0, 0]}
+        )
+        assert copy.canonical_id == e_major.id
+
+        # Copies of a reshaped canonical chord fall back to one of themselves
+        custom_chord_service.update_many(
+            db_session, objs_in=[{"id": verified.id, "fret_positions": [3, 2, 0, 0, 0, 3]}]
+        )
+        db_session.refresh(second_copy)
+        assert second_copy.canonical_id is None
+        assert custom_chord_service.get_canonical_by_shape(
+            db_session, fingerprint=second_copy.shape_fingerprint, user_id=third.id
+        ).id == second_copy.id
+
+    def test_merge_duplicates(self, db_session):
+        user = make_user(db_session)
+        other = make_user(db_session, "other")
+        rows = [
+            (user, "C", 2, False, [-1, 3, 2, 0, 1, 0], 1),
+            (user, "C again", 3, False, [-1, 3, 2, 0, 1, 0], 1),
+            (other, "Their C", 5, True, [-1, 3, 2, 0, 1, 0], 1),
+            (other, "A", 1, False, [1, 3, 3, 2, 1, 1], 5),
+            (user, "A barre", 0, False, [5, 7, 7, 6, 5, 5], 1),
+            (user, "G", 0, False, [3, 2, 0, 0, 0, 3], 1),
+        ]
+        db_session.add_all(
+            CustomChord(
+                name=name, root_note="C", chord_type="major", user_id=owner.id,
+                usage_count=usage, is_verified=verified, fret_positions=frets, starting_fret=start,
+            )
+            for owner, name, usage, verified, frets, start in rows
+        )
+        db_session.commit()
+        custom_chord_service.backfill_shape_columns(db_session)
+
+        assert custom_chord_service.merge_duplicate_shapes(db_session) == {"merged": 1, "linked": 2}
+
+        chords = {chord.name: chord for chord in db_session.query(CustomChord)}
+        # The user's most used C is kept, named after both
+        assert set(chords) == {"C again", "Their C", "A", "A barre", "G"}
+        assert chords["Their C"].usage_count == 10
+        assert chords["C again"].canonical_id == chords["Their C"].id
+        assert chords["C again"].alternative_names == ["C"]
+        assert not chords["C again"].is_verified
+        assert chords["A barre"].canonical_id == chords["A"].id
+        assert chords["A"].usage_count == 1
+        assert chords["G"].canonical_id is None
+        assert custom_chord_service.merge_duplicate_shapes(db_session) == {"merged": 0, "linked": 0}
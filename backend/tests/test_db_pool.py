@@ -0,0 +1,45 @@
+"""
+Test connection pool instrumentation.
+"""
+from sqlalchemy import create_engine, text
+
+from app.db.pool import InstrumentedQueuePool, instrument_engine
+
+
+def test_pool_stats_track_checkouts(tmp_path):
+    """Test pool events update checkout and connect counters."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=2,
+        max_overflow=1,
+    )
+    stats = instrument_engine(engine, name="test")
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        assert stats.snapshot()["checked_out"] == 1
+
+    snapshot = stats.snapshot()
+    assert snapshot["name"] == "test"
+    assert snapshot["checked_out"] == 0
+    assert snapshot["checkouts"] == 1
+    assert snapshot["connections_opened"] == 1
+    assert snapshot["size"] == 2
+    assert snapshot["idle"] == 1
+    engine.dispose()
+
+
+def test_pool_stats_survive_dispose(tmp_path):
+    """Test stats stay attached after the pool is recreated."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}", poolclass=InstrumentedQueuePool
+    )
+    stats = instrument_engine(engine)
+    engine.dispose()
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+    assert stats.snapshot()["checkouts"] == 1
+    engine.dispose()
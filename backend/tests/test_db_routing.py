@@ -0,0 +1,63 @@
+"""
+Test read-replica session routing.
+"""
+import pytest
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, insert, select
+
+from app.db.routing import ReplicaStickiness, RoutingSession
+
+metadata = MetaData()
+items = Table("items", metadata, Column("id", Integer, primary_key=True))
+
+
+@pytest.fixture
+def routed_session(tmp_path):
+    """Session class routed between a primary and one replica SQLite file."""
+    primary = create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    metadata.create_all(primary)
+    metadata.create_all(replica)
+    with replica.begin() as conn:
+        conn.execute(insert(items).values(id=99))
+
+    class TestRoutingSession(RoutingSession):
+        primary_engine = primary
+        replica_engines = [replica]
+        stickiness = ReplicaStickiness(ttl=60)
+
+    yield TestRoutingSession
+    primary.dispose()
+    replica.dispose()
+
+
+def test_primary_is_default(routed_session):
+    """Test sessions read from the primary unless asked otherwise."""
+    with routed_session() as db:
+        assert db.execute(select(items.c.id)).scalars().all() == []
+
+
+def test_reads_go_to_replica(routed_session):
+    """Test read-only sessions are served by the replica."""
+    with routed_session() as db:
+        db.use_replica()
+        assert db.execute(select(items.c.id)).scalars().all() == [99]
+
+
+def test_writes_go_to_primary_and_stick(routed_session):
+    """Test a write pins the session and the client to the primary."""
+    with routed_session() as db:
+        db.sticky_key = "client-1"
+        db.use_replica()
+        db.execute(insert(items).values(id=1))
+        db.commit()
+        assert db.execute(select(items.c.id)).scalars().all() == [1]
+
+    with routed_session() as db:
+        db.sticky_key = "client-1"
+        db.use_replica()
+        assert db.execute(select(items.c.id)).scalars().all() == [1]
+
+    with routed_session() as db:
+        db.sticky_key = "client-2"
+        db.use_replica()
+        assert db.execute(select(items.c.id)).scalars().all() == [99]
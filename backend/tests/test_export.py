@@ -0,0 +1,57 @@
+"""
+Test streaming catalog export.
+"""
+import gzip
+import json
+
+from sqlalchemy.orm import sessionmaker
+
+from app.models.collection import Collection
+from app.models.rating import Rating
+from app.models.song import Song
+from app.models.user import User
+from app.services.export import stream_export
+
+
+def seed(db):
+    """Insert a small catalog."""
+    user = User(email="exporter@example.com", username="exporter", hashed_password="x")
+    song = Song(title="S", artist="A", lyrics_and_chords="C", owner=user)
+    collection = Collection(name="Set", user=user, songs=[song])
+    db.add_all([user, song, collection, Rating(score=5.0, user=user, song=song)])
+    db.commit()
+
+
+def test_export_ndjson(db_session):
+    """Test every requested table is streamed as typed NDJSON lines."""
+    seed(db_session)
+    factory = sessionmaker(bind=db_session.get_bind())
+
+    body = b"".join(
+        stream_export(["songs", "collections", "ratings"], session_factory=factory)
+    )
+    records = [json.loads(line) for line in body.decode().splitlines()]
+
+    assert [record["type"] for record in records] == [
+        "song", "collection", "collection_song", "rating"
+    ]
+    assert records[0]["title"] == "S"
+    assert records[2] == {
+        "type": "collection_song",
+        "collection_id": 1,
+        "song_id": 1,
+        "position": 0,
+        "transpose": 0,
+        "capo": None,
+    }
+
+
+def test_export_gzip(db_session):
+    """Test the gzip stream decompresses to the same NDJSON."""
+    seed(db_session)
+    factory = sessionmaker(bind=db_session.get_bind())
+
+    plain = b"".join(stream_export(["songs"], session_factory=factory))
+    packed = b"".join(stream_export(["songs"], gzip=True, session_factory=factory))
+
+    assert gzip.decompress(packed) == plain
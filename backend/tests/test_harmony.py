@@ -0,0 +1,140 @@
+"""
+Test Roman numeral analysis of chord progressions.
+"""
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import update
+
+from app.models.song import Song
+from app.services.maintenance import record_song_view
+from app.services.song import analysis_cache, analyze_sheet, song_service
+from app.utils.harmony import Cadence, analyze_progression, parse_key
+from tests.conftest import make_user, song_in
+
+
+def numerals(analysis):
+    return [chord.numeral for chord in analysis.chords]
+
+
+def test_major_progression():
+    analysis = analyze_progression(["C", "Am", "F", "G7", "C", "Bb", "F", "C"])
+    assert analysis.key == "C"
+    assert numerals(analysis) == ["I", "vi", "IV", "V7", "I", "bVII", "IV", "I"]
+    assert [chord.function for chord in analysis.chords[:4]] == [
+        "tonic", "tonic", "predominant", "dominant",
+    ]
+    assert analysis.borrowed == [5]
+    assert analysis.cadences == (Cadence(4, "authentic"), Cadence(7, "plagal"))
+
+
+def test_minor_key_and_qualities():
+    analysis = analyze_progression(["Am", "Bm7b5", "E7", "Am", "Fmaj7", "G", "C", "Edim7"], key="Am")
+    assert numerals(analysis) == ["i", "iiø7", "V7", "i", "VImaj7", "VII", "III", "v°7"]
+    assert all(chord.diatonic for chord in analysis.chords[:7])
+    assert analysis.cadences == (Cadence(3, "authentic"),)
+
+
+def test_secondary_dominants_and_deceptive_cadence():
+    analysis = analyze_progression(["C", "A7", "A7", "Dm", "G", "Am", "D", "G"], key="C")
+    assert numerals(analysis)[1:3] == ["V7/ii", "V7/ii"]
+    assert analysis.chords[6].numeral == "V/V"
+    assert analysis.chords[6].function == "secondary dominant"
+    assert Cadence(5, "deceptive") in analysis.cadences
+    assert analysis.cadences[-1] == Cadence(7, "half")
+
+
+def test_secondary_dominant_targets_drop_extensions():
+    analysis = analyze_progression(["C", "C7", "Fmaj7", "E7", "Am7", "G"], key="C")
+    assert numerals(analysis)[1:5] == ["V7/IV", "IVmaj7", "V7/vi", "vi7"]
+
+
+def test_unparseable_chords_are_kept():
+    analysis = analyze_progression(["C", "N.C.", "G", "C"], key="C")
+    assert analysis.chords[1].numeral is None
+    assert analysis.cadences == (Cadence(3, "authentic"),)
+    assert analyze_progression(["xyz"]).key is None
+
+
+def test_parse_key():
+    assert parse_key("Eb") == (3, "major")
+    assert parse_key("F#m") == (6, "minor")
+    with pytest.raises(ValueError):
+        parse_key("G7")
+
+
+def test_chord_lines_are_phrases():
+    analysis = analyze_sheet("C F G\nHello\nC F C G\nC\n[F]world[G]", key="C")
+    assert [cadence for cadence in analysis.cadences if cadence.kind == "half"] == [
+        Cadence(2, "half"), Cadence(6, "half"), Cadence(9, "half"),
+    ]
+
+
+class TestSongAnalysis:
+    """Test song analyses are memoized per song version."""
+
+    def test_memoized_until_updated(self, db_session):
+        analysis_cache.clear()
+        user = make_user(db_session)
+        song = song_service.create_with_owner(
+            db_session, obj_in=song_in(lyrics_and_chords="G C D G", key="G"), owner_id=user.id
+        )
+
+        first = song_service.get_analysis(song)
+        assert first.key == "G"
+        assert song_service.get_analysis(song) is first
+        assert song_service.get_analysis(song, key="Em").key == "Em"
+
+        song_service.increment_view_count(db_session, song_id=song.id)
+        song_service.update_rating_stats(
+            db_session, song_id=song.id, new_average=4.5, new_count=2
+        )
+        db_session.refresh(song)
+        assert (song.view_count, song.rating_count) == (1, 2)
+        assert song_service.get_analysis(song) is first
+
+        song = song_service.update(db_session, db_obj=song, obj_in={"lyrics_and_chords": "G D"})
+        assert song_service.get_analysis(song) is not first
+
+    def test_counters_keep_a_newer_edit(self, db_session):
+        user = make_user(db_session)
+        song = song_service.create_with_owner(db_session, obj_in=song_in(), owner_id=user.id)
+        edited_at = song.updated_at + timedelta(minutes=1)
+        # An edit the loaded object has not seen, e.g. from another worker
+        db_session.execute(
+            update(Song).where(Song.id == song.id).values(lyrics_and_chords="G D", updated_at=edited_at)
+        )
+        db_session.commit()
+
+        song_service.increment_view_count(db_session, song_id=song.id)
+        db_session.refresh(song)
+        assert song.updated_at == edited_at
+        assert song.view_count == 1
+
+    def test_view_recorded_in_one_statement(self, db_session):
+        user = make_user(db_session)
+        song = song_service.create_with_owner(db_session, obj_in=song_in(), owner_id=user.id)
+        db_session.statements.clear()
+
+        record_song_view(song.id, session_factory=lambda: db_session)
+
+        assert len(db_session.statements) == 1
+        assert db_session.query(Song.view_count).filter(Song.id == song.id).scalar() == 1
+
+    def test_batch_loads_text_only_for_misses(self, db_session):
+        analysis_cache.clear()
+        user = make_user(db_session)
+        songs = [
+            song_service.create_with_owner(db_session, obj_in=song_in(), owner_id=user.id)
+            for _ in range(3)
+        ]
+        song_service.get_analysis(songs[0])
+        db_session.statements.clear()
+
+        analyses = song_service.get_analyses(
+            db_session, ids=[song.id for song in songs] + [999], user_id=user.id
+        )
+
+        assert set(analyses) == {song.id for song in songs}
+        assert len(db_session.statements) == 2
+        assert analyses[songs[0].id] is song_service.get_analysis(songs[0])
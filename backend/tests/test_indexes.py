@@ -0,0 +1,74 @@
+"""
+Test hot service queries are served by an index (EXPLAIN QUERY PLAN on SQLite).
+"""
+import pytest
+from sqlalchemy import event
+
+from app.services.chord import custom_chord_service
+from app.services.collection import collection_service
+from app.services.rating import rating_service
+from app.services.song import song_service
+
+HOT_QUERIES = [
+    (lambda db: song_service.get_public_songs(db), "ix_songs_public"),
+    (lambda db: song_service.get_popular_songs(db), "ix_songs_public_popularity"),
+    (lambda db: song_service.get_multi_by_owner(db, owner_id=1), "ix_songs_owner_id"),
+    (
+        lambda db: song_service.get_playable_songs(db, chords=["C", "G", "Am", "F"], shifts=[0, -2]),
+        "ix_songs_public",
+    ),
+    (
+        lambda db: song_service.find_similar(db, chords=["C", "Am", "F", "G"], user_id=1),
+        # song_ngrams primary key (ngram, song_id)
+        "sqlite_autoindex_song_ngrams_1",
+    ),
+    (lambda db: rating_service.get_multi_by_song(db, song_id=1), "ix_ratings_song_verified"),
+    (lambda db: rating_service.get_song_rating_stats(db, song_id=1), "ix_ratings_song_verified"),
+    (lambda db: custom_chord_service.get_verified_chords(db), "ix_custom_chords_verified_usage"),
+    (
+        lambda db: custom_chord_service.get_by_name_and_user(db, name="Am", user_id=1),
+        "ix_custom_chords_user_name",
+    ),
+    (
+        lambda db: custom_chord_service.search_by_name(db, name="Db7"),
+        # chord_names primary key (name_key, chord_id)
+        "sqlite_autoindex_chord_names_1",
+    ),
+    (
+        lambda db: custom_chord_service.get_canonical_by_shape(
+            db, fingerprint="E-A-B-E-G#-B-E:0,2,2,1,0,0", user_id=1
+        ),
+        "ix_custom_chords_shape",
+    ),
+    (lambda db: collection_service.get_public_collections(db), "ix_collections_public"),
+    (
+        lambda db: collection_service.get_setlist_entries(db, collection_id=1),
+        "ix_collection_songs_collection_position",
+    ),
+]
+
+
+@pytest.mark.parametrize("run_query, index", HOT_QUERIES)
+def test_query_uses_index(db_session, run_query, index):
+    """Every SELECT a hot service method issues is planned with the expected index."""
+    engine = db_session.get_bind()
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        run_query(db_session)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    selects = [(sql, params) for sql, params in executed if sql.startswith("SELECT")]
+    assert selects
+    with engine.connect() as conn:
+        for sql, params in selects:
+            plan = [
+                row[3]
+                for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql, params)
+            ]
+            assert any(index in step for step in plan), plan
@@ -0,0 +1,49 @@
+"""
+Test logging utilities.
+"""
+import logging
+
+from app.utils.logger import DeferredFormattingQueueHandler, RequestLogSampler
+
+
+def make_record(request_id=None, level=logging.INFO, **extra):
+    """Build a log record with optional request extras."""
+    record = logging.LogRecord("app.middleware", level, __file__, 1, "Request completed", None, None)
+    if request_id is not None:
+        record.request_id = request_id
+    record.__dict__.update(extra)
+    return record
+
+
+def test_sampler_keeps_everything_below_threshold():
+    """Test request logs pass untouched under the threshold."""
+    sampler = RequestLogSampler(threshold=10, rate=5)
+    assert all(sampler.filter(make_record(str(i))) for i in range(10))
+
+
+def test_sampler_samples_above_threshold():
+    """Test only a fraction of requests is logged when busy."""
+    sampler = RequestLogSampler(threshold=0, rate=10)
+    kept = sum(sampler.filter(make_record(f"req-{i}")) for i in range(1000))
+    assert 50 < kept < 150
+
+
+def test_sampler_keeps_pairs_and_errors():
+    """Test sampling is stable per request and never drops errors."""
+    sampler = RequestLogSampler(threshold=0, rate=1000)
+    first = sampler.filter(make_record("same-request"))
+    assert sampler.filter(make_record("same-request")) == first
+    assert sampler.filter(make_record("x", level=logging.ERROR))
+    assert sampler.filter(make_record("x", status_code=503))
+    assert sampler.filter(make_record())
+
+
+def test_queue_handler_merges_args():
+    """Test queued records carry the final message and keep extras."""
+    record = logging.LogRecord("app", logging.INFO, __file__, 1, "Hello %s", ("world",), None)
+    record.request_id = "abc"
+    prepared = DeferredFormattingQueueHandler(None).prepare(record)
+    assert prepared.msg == "Hello world"
+    assert prepared.args is None
+    assert prepared.request_id == "abc"
+    assert record.args == ("world",)
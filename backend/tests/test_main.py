@@ -36,4 +36,43 @@ def test_openapi_json(client: TestClient):
     assert response.status_code == 200
     data = response.json()
     assert "openapi" in data
-    assert "info" in data
\ No newline at end of file
+    assert "info" in data
+
+
+def test_request_context_headers(client: TestClient):
+    """Test request ID, timing and security headers are added."""
+    response = client.get("/health")
+    assert response.headers["X-Request-ID"]
+    assert float(response.headers["X-Process-Time"]) >= 0
+    assert response.headers["X-Content-Type-Options"] == "nosniff"
+    assert response.headers["X-Frame-Options"] == "DENY"
+    assert "Strict-Transport-Security" not in response.headers
+
+
+def test_unhandled_errors_become_json():
+    """Test application errors are turned into JSON responses."""
+    from fastapi import FastAPI
+
+    from app.core.exceptions import NotFoundException
+    from app.core.middleware import RequestContextMiddleware
+
+    error_app = FastAPI()
+    error_app.add_middleware(RequestContextMiddleware)
+
+    @error_app.get("/missing")
+    def missing():
+        raise NotFoundException("Song not found")
+
+    @error_app.get("/boom")
+    def boom():
+        raise RuntimeError("boom")
+
+    with TestClient(error_app, raise_server_exceptions=False) as error_client:
+        response = error_client.get("/missing")
+        assert response.status_code == 404
+        assert response.json()["error"] == "Song not found"
+        assert response.headers["X-Request-ID"]
+
+        response = error_client.get("/boom")
+        assert response.status_code == 500
+        assert response.json()["error"] == "Internal server error"
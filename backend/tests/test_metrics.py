@@ -0,0 +1,71 @@
+"""
+Test Prometheus metrics export.
+"""
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.core.context import RequestContext, reset_request_context, set_request_context
+from app.core.metrics import REGISTRY, render_metrics
+from app.utils.music_theory import transpose_chord
+
+
+def sample(name: str, **labels) -> float:
+    """Current value of a metric sample (0 when absent)."""
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_metrics_endpoint(client: TestClient):
+    """Metrics are served in the Prometheus text format."""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "http_request_duration_seconds" in response.text
+    assert 'db_pool_checkouts_total{pool="primary"}' in response.text
+
+
+def test_multiprocess_metrics_keep_process_collectors(client: TestClient, tmp_path, monkeypatch):
+    """Per-process collectors are rendered alongside the aggregated worker files."""
+    client.get("/health")
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    rendered = render_metrics().decode()
+    assert "function_cache_requests_total" in rendered
+    assert 'db_pool_checkouts_total{pool="primary"}' in rendered
+
+
+def test_request_latency_labelled_by_route_template(client: TestClient):
+    """Latency is labelled with the route template, never the raw path."""
+    labels = {"method": "GET", "route": "/api/v1/songs/{song_id}", "status": "401"}
+    before = sample("http_request_duration_seconds_count", **labels)
+    client.get("/api/v1/songs/12345")
+    client.get("/api/v1/songs/67890")
+    assert sample("http_request_duration_seconds_count", **labels) == before + 2
+
+    unmatched = {"method": "GET", "route": "unmatched", "status": "404"}
+    before = sample("http_request_duration_seconds_count", **unmatched)
+    client.get("/no/such/path")
+    assert sample("http_request_duration_seconds_count", **unmatched) == before + 1
+    assert 'route="/no/such/path"' not in client.get("/metrics").text
+
+
+def test_queries_counted_per_request(db_session):
+    """Statements run during a request are added to its context."""
+    context = RequestContext(method="GET", path="/")
+    token = set_request_context(context)
+    try:
+        db_session.execute(text("SELECT 1"))
+        db_session.execute(text("SELECT 2"))
+    finally:
+        reset_request_context(token)
+    assert context.query_count == 2
+    assert context.query_time > 0
+
+
+def test_music_engine_counters():
+    """Parsing and transposing chords increments counters and the parse cache."""
+    parsed = sample("chords_parsed_total")
+    transposed = sample("chords_transposed_total")
+    transpose_chord("Am7", 2)
+    transpose_chord("Am7", 2)
+    assert sample("chords_transposed_total") == transposed + 2
+    assert sample("chords_parsed_total") == parsed + 2
+    assert sample("function_cache_requests_total", cache="parse_chord", result="hit") >= 1
@@ -5,12 +5,14 @@ import pytest
 
 from app.utils.music_theory import (
     calculate_capo_transposition,
+    detect_key,
     extract_chords_from_text,
     get_key_semitone_difference,
     parse_chord,
     suggest_capo_position,
     transpose_chord,
     transpose_chord_progression,
+    transpose_text,
     validate_chord_name,
 )
 
@@ -121,4 +123,37 @@ class TestChordExtraction:
         text = "Cmaj7 F#m7 Bb7 Am/F G7sus4"
         chords = extract_chords_from_text(text)
         expected = ["Cmaj7", "F#m7", "Bb7", "Am/F", "G7sus4"]
-        assert set(chords) == set(expected)
\ No newline at end of file
+        assert set(chords) == set(expected)
+
+
+class TestKeyDetection:
+    """Test key detection from chord sequences."""
+
+    def test_detect_major_key(self):
+        """Test detecting a major key."""
+        assert detect_key(["G", "C", "D", "G"]) == "G"
+        assert detect_key(["C", "Am", "F", "G"]) == "C"
+
+    def test_detect_minor_key(self):
+        """Test detecting a minor key from its tonic."""
+        assert detect_key(["Am", "F", "C", "G", "Am"]) == "Am"
+
+    def test_detect_key_without_chords(self):
+        """Test that no parsable chords gives no key."""
+        assert detect_key([]) is None
+        assert detect_key(["xyz"]) is None
+
+
+class TestTextTransposition:
+    """Test transposing whole lyrics-and-chords texts."""
+
+    def test_chord_lines_and_inline_chords(self):
+        """Test chord lines and [Chord] markers move; lyrics stay."""
+        text = "C       G   Am  F\nA line of lyrics\n[C]Inline [G/B]chords"
+        assert transpose_text(text, 2) == (
+            "D       A   Bm  G\nA line of lyrics\n[D]Inline [A/C#]chords"
+        )
+
+    def test_columns_kept_when_names_grow(self):
+        """Test chords stay separated when transposed names get longer."""
+        assert transpose_text("C D", 1) == "C# D#"
@@ -0,0 +1,77 @@
+"""
+Test key-invariant progression fingerprints and similarity search.
+"""
+from sqlalchemy import select
+
+from app.models.song import song_ngrams
+from app.services.song import song_service
+from app.utils.progressions import MAX_NGRAMS, progression_ngrams
+from tests.conftest import make_user, song_in
+
+
+def test_ngrams_are_key_invariant():
+    assert progression_ngrams(["C", "Am", "F", "G"]) == progression_ngrams(["Eb", "Cm", "Ab", "Bb"])
+    assert progression_ngrams(["C", "Am", "F", "G"]) == {"M9m8M2M"}
+    # Extensions keep their quality class; repeats and unparseable chords are dropped
+    assert progression_ngrams(["Cmaj7", "C", "Am7", "N.C.", "F", "G7"]) == {"M9m8M2M"}
+    assert progression_ngrams(["C", "Cm", "F", "G"]) != progression_ngrams(["C", "Am", "F", "G"])
+    assert progression_ngrams(["C", "G"]) == set()
+
+
+def test_ngrams_are_bounded():
+    chords = [note + quality for note in "CDEFGAB" for quality in ("", "m", "7", "dim", "sus4")] * 20
+    assert len(progression_ngrams(chords)) <= MAX_NGRAMS
+
+
+class TestSimilaritySearch:
+    """Test the song progression index."""
+
+    def make_songs(self, db, *sheets):
+        user = make_user(db)
+        return user, [
+            song_service.create_with_owner(
+                db, obj_in=song_in(title=str(index), lyrics_and_chords=sheet), owner_id=user.id
+            )
+            for index, sheet in enumerate(sheets)
+        ]
+
+    def test_ranked_by_overlap_in_any_key(self, db_session):
+        user, (pop, pop_in_d, partial, other) = self.make_songs(
+            db_session,
+            "C G Am F\nla la\nC G Am F C",
+            "D A Bm G D A Bm G D",
+            "C G Am F Dm",
+            "Em B7 Em B7 Am",
+        )
+        db_session.statements.clear()
+
+        found = song_service.find_similar(
+            db_session, chords=["E", "B", "C#m", "A", "E"], user_id=user.id, exclude_id=pop.id
+        )
+
+        assert len(db_session.statements) == 2
+        assert [(song.id, score) for song, score in found] == [(pop_in_d.id, 1.0), (partial.id, 0.5)]
+
+    def test_index_follows_updates_and_deletes(self, db_session):
+        user, (song,) = self.make_songs(db_session, "C G Am F")
+        song_service.update(db_session, db_obj=song, obj_in={"lyrics_and_chords": "Am F C G"})
+        ngrams = {ngram for (ngram,) in db_session.execute(select(song_ngrams.c.ngram))}
+        assert ngrams == progression_ngrams(["Am", "F", "C", "G"])
+
+        song_service.remove_many(db_session, ids=[song.id])
+        assert db_session.execute(select(song_ngrams)).all() == []
+
+    def test_bulk_create_and_rebuild(self, db_session):
+        user = make_user(db_session)
+        result = song_service.create_many(
+            db_session,
+            objs_in=[song_in(lyrics_and_chords="G D Em C"), song_in(lyrics_and_chords="G")],
+            extra={"owner_id": user.id},
+        )
+        rows = db_session.execute(select(song_ngrams.c.song_id)).all()
+        assert [song_id for (song_id,) in rows] == [result.ids[0]]
+
+        db_session.execute(song_ngrams.delete())
+        db_session.commit()
+        assert song_service.rebuild_progression_index(db_session, batch_size=1) == 2
+        assert len(db_session.execute(select(song_ngrams)).all()) == 1
@@ -0,0 +1,77 @@
+"""
+Test per-request query counting, N+1 detection and query budgets.
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from app.core.config import settings
+from app.core.exceptions import QueryBudgetExceeded
+from app.core.middleware import RequestContextMiddleware
+from app.db.queries import query_budget, repeated_statements
+
+
+@pytest.fixture
+def budget_client():
+    """App whose routes run a given number of identical statements."""
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    app = FastAPI()
+    app.add_middleware(RequestContextMiddleware)
+
+    def run(times: int) -> dict:
+        with engine.connect() as conn:
+            for _ in range(times):
+                conn.execute(text("SELECT 1"))
+        return {"ok": True}
+
+    @app.get("/within/{times}")
+    @query_budget(3)
+    def within(times: int):
+        return run(times)
+
+    @app.get("/unbudgeted/{times}")
+    def unbudgeted(times: int):
+        return run(times)
+
+    with TestClient(app) as client:
+        yield client
+    engine.dispose()
+
+
+def test_budget_respected(budget_client):
+    """Routes within their budget respond normally."""
+    assert budget_client.get("/within/3").status_code == 200
+
+
+def test_budget_exceeded_fails(budget_client, monkeypatch):
+    """Exceeding a declared budget raises when enforcement is on."""
+    monkeypatch.setattr(settings, "QUERY_BUDGET_ENFORCE", True)
+    with pytest.raises(QueryBudgetExceeded) as exc_info:
+        budget_client.get("/within/4")
+    assert exc_info.value.details == {"route": "/within/{times}", "queries": 4, "budget": 3}
+
+
+def test_budget_exceeded_warns(budget_client, monkeypatch):
+    """Without enforcement an exceeded budget is only logged."""
+    monkeypatch.setattr(settings, "QUERY_BUDGET_ENFORCE", False)
+    assert budget_client.get("/within/4").status_code == 200
+
+
+def test_debug_headers(budget_client, monkeypatch):
+    """Debug mode reports query counts and repeated statement shapes."""
+    monkeypatch.setattr(settings, "DEBUG", True)
+    monkeypatch.setattr(settings, "QUERY_REPEAT_THRESHOLD", 5)
+    response = budget_client.get("/unbudgeted/6")
+    assert response.headers["X-DB-Query-Count"] == "6"
+    assert response.headers["X-DB-Repeated-Statements"] == "1"
+
+    monkeypatch.setattr(settings, "DEBUG", False)
+    assert "X-DB-Query-Count" not in budget_client.get("/unbudgeted/1").headers
+
+
+def test_repeated_statements():
+    """Only shapes at or above the threshold are reported, most frequent first."""
+    statements = {"SELECT a": 2, "SELECT b": 7, "SELECT c": 5}
+    assert repeated_statements(statements, 5) == [("SELECT b", 7), ("SELECT c", 5)]
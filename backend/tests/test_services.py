@@ -0,0 +1,378 @@
+"""
+Test service layer database behaviour.
+"""
+import pytest
+
+from app import schemas
+from app.services.song import song_service
+from tests.conftest import make_user, song_in
+
+
+class TestCRUDWrites:
+    """Test write paths issue a single statement."""
+
+    def test_create_is_one_round_trip(self, db_session):
+        """Test create does not re-select the new row."""
+        user = make_user(db_session)
+        db_session.statements.clear()
+
+        song = song_service.create_with_owner(
+            db_session, obj_in=song_in(), owner_id=user.id
+        )
+        created = list(db_session.statements)
+        db_session.statements.clear()
+
+        assert created[0].startswith("INSERT INTO songs")
+        assert not [
+            statement for statement in created
+            if statement.startswith("SELECT") and "FROM songs" in statement
+        ]
+        assert song.id is not None
+        assert song.created_at is not None
+        assert song.view_count == 0
+        assert db_session.statements == []
+
+    def test_update_is_one_round_trip(self, db_session):
+        """Test update issues only the UPDATE statement."""
+        user = make_user(db_session)
+        song = song_service.create_with_owner(
+            db_session, obj_in=song_in(), owner_id=user.id
+        )
+        db_session.statements.clear()
+
+        song = song_service.update(
+            db_session, db_obj=song, obj_in=schemas.SongUpdate(title="New title")
+        )
+
+        assert song.title == "New title"
+        assert len(db_session.statements) == 1
+        assert db_session.statements[0].startswith("UPDATE songs")
+
+    def test_update_ignores_unknown_fields(self, db_session):
+        """Test update only sets mapped columns."""
+        user = make_user(db_session)
+        song = song_service.create_with_owner(
+            db_session, obj_in=song_in(), owner_id=user.id
+        )
+
+        song = song_service.update(
+            db_session, db_obj=song, obj_in={"title": "T", "not_a_column": 1}
+        )
+
+        assert song.title == "T"
+        assert not hasattr(song, "not_a_column")
+
+
+class TestBulkOperations:
+    """Test chunked bulk create/update/delete."""
+
+    def test_create_many_in_chunks(self, db_session):
+        """Test bulk insert commits per chunk and returns ids in order."""
+        user = make_user(db_session)
+        songs = [song_in(title=f"Song {i}") for i in range(5)]
+
+        result = song_service.create_many(
+            db_session, objs_in=songs, extra={"owner_id": user.id}, chunk_size=2
+        )
+
+        assert len(result.ids) == 5
+        assert result.errors == []
+        titles = [song_service.get(db_session, id=id).title for id in result.ids]
+        assert titles == [f"Song {i}" for i in range(5)]
+
+    def test_create_many_reports_failing_rows(self, db_session):
+        """Test a bad row only fails itself, not its chunk."""
+        user = make_user(db_session)
+        rows = [
+            {"title": "Good", "artist": "A", "lyrics_and_chords": "C"},
+            {"title": "Bad", "artist": None, "lyrics_and_chords": "C"},
+            {"title": "Also good", "artist": "A", "lyrics_and_chords": "C"},
+        ]
+
+        result = song_service.create_many(
+            db_session, objs_in=rows, extra={"owner_id": user.id}, chunk_size=3
+        )
+
+        assert len(result.ids) == 2
+        assert [error.index for error in result.errors] == [1]
+
+    def test_update_many_respects_scope(self, db_session):
+        """Test rows outside the scope are reported as not found."""
+        user = make_user(db_session)
+        result = song_service.create_many(
+            db_session, objs_in=[song_in(), song_in()], extra={"owner_id": user.id}
+        )
+        first, second = result.ids
+
+        result = song_service.update_many(
+            db_session,
+            objs_in=[{"id": first, "title": "Renamed"}, {"id": second + 100, "title": "X"}],
+            scope={"owner_id": user.id},
+        )
+
+        assert result.ids == [first]
+        assert [error.index for error in result.errors] == [1]
+        db_session.expire_all()
+        assert song_service.get(db_session, id=first).title == "Renamed"
+
+    def test_remove_many(self, db_session):
+        """Test bulk delete removes songs and their ratings."""
+        from app.models.rating import Rating
+
+        user = make_user(db_session)
+        result = song_service.create_many(
+            db_session, objs_in=[song_in(), song_in()], extra={"owner_id": user.id}
+        )
+        db_session.add(Rating(score=4.0, user_id=user.id, song_id=result.ids[0]))
+        db_session.commit()
+
+        result = song_service.remove_many(
+            db_session, ids=result.ids, scope={"owner_id": user.id}
+        )
+
+        assert len(result.ids) == 2
+        assert db_session.query(Rating).count() == 0
+        assert song_service.get_multi(db_session) == []
+
+
+def make_collection(db, user, song_count: int):
+    """Insert a collection holding ``song_count`` new songs."""
+    from app.models.collection import Collection
+    from app.models.song import collection_songs
+
+    collection = Collection(name="Setlist", user_id=user.id, song_count=song_count)
+    db.add(collection)
+    db.commit()
+    result = song_service.create_many(
+        db,
+        objs_in=[song_in(title=f"Song {i}") for i in range(song_count)],
+        extra={"owner_id": user.id},
+    )
+    db.execute(
+        collection_songs.insert(),
+        [{"collection_id": collection.id, "song_id": id} for id in result.ids],
+    )
+    db.commit()
+    db.expunge_all()
+    return collection
+
+
+class TestCollectionLoading:
+    """Test collections with songs load in a constant number of queries."""
+
+    def test_page_of_songs_in_two_queries(self, db_session):
+        """Test a page of songs serializes without further queries."""
+        from app.services.collection import collection_service
+
+        user = make_user(db_session)
+        collection = make_collection(db_session, user, song_count=30)
+        db_session.statements.clear()
+
+        loaded, songs = collection_service.get_collection_with_songs(
+            db_session, collection_id=collection.id, skip=10, limit=5
+        )
+        data = [schemas.SongSummary.model_validate(song).model_dump() for song in songs]
+
+        assert len(db_session.statements) == 2
+        assert [song["title"] for song in data] == [f"Song {i}" for i in range(10, 15)]
+        assert "lyrics_and_chords" not in data[0]
+        # The page is not passed off as the whole collection
+        assert len(loaded.songs) == 30
+
+    def test_all_songs_selectin_loaded(self, db_session):
+        """Test loading every song uses one extra query regardless of size."""
+        from app.services.collection import collection_service
+
+        user = make_user(db_session)
+        collection = make_collection(db_session, user, song_count=500)
+        db_session.statements.clear()
+
+        loaded, songs = collection_service.get_collection_with_songs(
+            db_session, collection_id=collection.id, limit=None
+        )
+        data = schemas.CollectionWithSongs.model_validate(loaded)
+
+        assert len(songs) == len(data.songs) == 500
+        assert len(db_session.statements) == 2
+
+
+class TestCollectionMembership:
+    """Test membership changes work on the association table directly."""
+
+    def test_add_songs_skips_existing(self, db_session):
+        """Test songs already in the collection are not added or counted twice."""
+        from app.services.collection import collection_service
+
+        user = make_user(db_session)
+        collection = make_collection(db_session, user, song_count=2)
+        collection = collection_service.get(db_session, id=collection.id)
+        existing = [song.id for song in song_service.get_multi(db_session)]
+        new = song_service.create_with_owner(db_session, obj_in=song_in(), owner_id=user.id)
+        db_session.statements.clear()
+
+        added = collection_service.add_songs(
+            db_session, collection=collection, song_ids=existing + [new.id, new.id]
+        )
+
+        assert added == [new.id]
+        assert collection.song_count == 3
+        assert len(db_session.statements) == 2
+        assert "ON CONFLICT DO NOTHING" in db_session.statements[0]
+
+    def test_conflict_insert_needs_a_supported_database(self):
+        """Test other databases get a clear error rather than a bad statement."""
+        from sqlalchemy import create_mock_engine
+        from sqlalchemy.orm import Session
+
+        from app.models.song import collection_songs
+        from app.services.base import insert_ignoring_conflicts
+
+        engine = create_mock_engine("mysql://", executor=None)
+        with pytest.raises(RuntimeError, match="collection_songs"):
+            insert_ignoring_conflicts(Session(bind=engine), collection_songs)
+
+    def test_remove_and_membership_check(self, db_session):
+        """Test removal and existence checks never load the song list."""
+        from app.services.collection import collection_service
+
+        user = make_user(db_session)
+        collection = make_collection(db_session, user, song_count=3)
+        song_ids = [song.id for song in song_service.get_multi(db_session)]
+        db_session.statements.clear()
+
+        assert collection_service.is_song_in_collection(
+            db_session, collection_id=collection.id, song_id=song_ids[0]
+        )
+        loaded = collection_service.remove_song_from_collection(
+            db_session, collection_id=collection.id, song_id=song_ids[0]
+        )
+        removed = collection_service.remove_songs(
+            db_session, collection=loaded, song_ids=[song_ids[0], song_ids[1]]
+        )
+
+        assert removed == [song_ids[1]]
+        assert loaded.song_count == 1
+        assert not collection_service.is_song_in_collection(
+            db_session, collection_id=collection.id, song_id=song_ids[0]
+        )
+        assert not any("JOIN collection_songs" in sql for sql in db_session.statements)
+
+
+class TestSetlists:
+    """Test ordered setlists stored on collection_songs."""
+
+    def make_setlist(self, db, titles):
+        """Collection with songs appended in the given order."""
+        from app.models.collection import Collection
+        from app.services.collection import collection_service
+
+        user = make_user(db)
+        collection = collection_service.save(db, db_obj=Collection(name="Gig", user_id=user.id))
+        ids = [
+            song_service.create_with_owner(db, obj_in=song_in(title=title), owner_id=user.id).id
+            for title in titles
+        ]
+        collection_service.add_songs(db, collection=collection, song_ids=ids)
+        return collection, ids
+
+    def test_move_updates_one_row(self, db_session):
+        """Test moving a song writes only its own position."""
+        from app.services.collection import collection_service
+
+        collection, (a, b, c) = self.make_setlist(db_session, ["A", "B", "C"])
+        db_session.statements.clear()
+
+        collection_service.move_song(
+            db_session, collection_id=collection.id, song_id=c, after_song_id=a
+        )
+
+        updates = [sql for sql in db_session.statements if sql.startswith("UPDATE")]
+        assert len(updates) == 1
+        assert collection_service._song_order(db_session, collection_id=collection.id) == [a, c, b]
+
+        collection_service.move_song(
+            db_session, collection_id=collection.id, song_id=b, after_song_id=None
+        )
+        assert collection_service._song_order(db_session, collection_id=collection.id) == [b, a, c]
+
+    def test_move_renumbers_when_out_of_room(self, db_session):
+        """Test repeated moves into the same gap eventually respace the list."""
+        from app.services.collection import collection_service
+
+        collection, (a, b, c) = self.make_setlist(db_session, ["A", "B", "C"])
+        for _ in range(12):
+            collection_service.move_song(
+                db_session, collection_id=collection.id, song_id=c, after_song_id=a
+            )
+            collection_service.move_song(
+                db_session, collection_id=collection.id, song_id=b, after_song_id=a
+            )
+
+        assert collection_service._song_order(db_session, collection_id=collection.id) == [a, b, c]
+
+    def test_reorder_and_setlist_transposed(self, db_session):
+        """Test bulk reorder and the transposed setlist read in one query."""
+        from app.services.collection import collection_service, setlist_entry
+
+        collection, (a, b, c) = self.make_setlist(db_session, ["A", "B", "C"])
+        order = collection_service.reorder_songs(
+            db_session, collection_id=collection.id, song_ids=[c, a, 999]
+        )
+        assert order == [c, a, b]
+        collection_service.update_entry(
+            db_session, collection_id=collection.id, song_id=a, values={"transpose": 2, "capo": 3}
+        )
+        db_session.expunge_all()
+        db_session.statements.clear()
+
+        rows = collection_service.get_setlist_entries(db_session, collection_id=collection.id)
+        entries = [schemas.SetlistEntry.model_validate(setlist_entry(row)) for row in rows]
+
+        assert len(db_session.statements) == 1
+        assert [entry.song.id for entry in entries] == [c, a, b]
+        assert entries[1].lyrics_and_chords == "D A Bm G"
+        assert entries[1].capo == 3
+        assert entries[0].lyrics_and_chords == "C G Am F"
+
+
+class TestSongCounts:
+    """Test collection song counts stay in step with collection_songs."""
+
+    def test_removing_song_decrements_counts(self, db_session):
+        """Test deleting a song updates the counts of its collections."""
+        from app.models.collection import Collection
+
+        user = make_user(db_session)
+        collection = make_collection(db_session, user, song_count=2)
+        song = song_service.get_multi(db_session)[0]
+
+        song_service.remove(db_session, id=song.id)
+
+        db_session.expire_all()
+        assert db_session.get(Collection, collection.id).song_count == 1
+
+    def test_reconcile_fixes_drift_with_one_query(self, db_session):
+        """Test drifted counts are found with one grouped query and repaired."""
+        from app.models.collection import Collection
+        from app.services.collection import collection_service
+
+        user = make_user(db_session)
+        drifted = make_collection(db_session, user, song_count=3)
+        correct = make_collection(db_session, user, song_count=1)
+        empty = Collection(name="Empty", user_id=user.id, song_count=4)
+        db_session.add(empty)
+        db_session.execute(
+            Collection.__table__.update()
+            .where(Collection.id == drifted.id)
+            .values(song_count=7)
+        )
+        db_session.commit()
+        db_session.statements.clear()
+
+        assert collection_service.reconcile_song_counts(db_session) == 2
+
+        selects = [sql for sql in db_session.statements if sql.startswith("SELECT")]
+        assert len(selects) == 1 and "GROUP BY" in selects[0]
+        db_session.expire_all()
+        counts = {c.id: c.song_count for c in db_session.query(Collection)}
+        assert counts == {drifted.id: 3, correct.id: 1, empty.id: 0}
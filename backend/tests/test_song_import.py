@@ -0,0 +1,114 @@
+"""
+Test streaming song import.
+"""
+import json
+import zipfile
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.models.song import Song
+from app.models.user import User
+from app.services.song_import import (
+    ImportJob,
+    get_executor,
+    iter_records,
+    parse_chord_sheet,
+    run_import,
+    shutdown_executor,
+)
+
+
+def test_parse_chordpro_sheet():
+    """Test ChordPro directives become song fields."""
+    data = parse_chord_sheet(
+        "{title: Wonderwall}\n{artist: Oasis}\n{capo: 2}\n[Em7]Today is [G]gonna be",
+        "ignored.cho",
+    )
+    assert data["title"] == "Wonderwall"
+    assert data["artist"] == "Oasis"
+    assert data["capo"] == "2"
+    assert data["lyrics_and_chords"] == "[Em7]Today is [G]gonna be"
+
+
+def test_parse_plain_sheet_uses_filename():
+    """Test plain sheets take artist and title from the file name."""
+    data = parse_chord_sheet("G D Em C", "songs/Artist Name - Song Title.txt")
+    assert data["artist"] == "Artist Name"
+    assert data["title"] == "Song Title"
+
+
+def test_iter_archive_records(tmp_path):
+    """Test zip members are read as records in order."""
+    path = tmp_path / "catalog.zip"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("a.json", json.dumps({"title": "A"}))
+        archive.writestr("b.ndjson", '{"title": "B"}\n\nnot json\n')
+        archive.writestr("Band - C.txt", "C G")
+        archive.writestr("cover.png", b"\x89PNG")
+
+    records = list(iter_records(path, "catalog.zip"))
+
+    assert [number for number, _, _ in records] == [0, 1, 2, 3]
+    assert records[1][1] == {"title": "B"}
+    assert records[2][2].startswith("Invalid JSON")
+    assert records[3][1]["title"] == "C"
+
+
+def test_run_import_reports_progress(db_session, tmp_path, monkeypatch):
+    """Test an NDJSON import writes valid songs and reports bad records."""
+    monkeypatch.setattr(settings, "IMPORT_WORKERS", 0)
+    monkeypatch.setattr(settings, "BULK_CHUNK_SIZE", 2)
+    user = User(email="importer@example.com", username="importer", hashed_password="x")
+    db_session.add(user)
+    db_session.commit()
+
+    lines = [
+        {"title": "One", "artist": "A", "lyrics_and_chords": "G C D G"},
+        {"title": "", "artist": "A", "lyrics_and_chords": "C"},
+        {"title": "Two", "artist": "A", "key": "E", "lyrics_and_chords": "E A B"},
+        {"title": "Three", "artist": "A", "lyrics_and_chords": "Em C G D Em"},
+    ]
+    path = tmp_path / "songs.ndjson"
+    path.write_text("\n".join(json.dumps(line) for line in lines))
+    job = ImportJob(filename="songs.ndjson", owner_id=user.id)
+
+    run_import(job, path, session_factory=sessionmaker(bind=db_session.get_bind()))
+
+    assert job.status == "completed"
+    assert (job.processed, job.created, job.failed) == (4, 3, 1)
+    assert job.errors[0].index == 1
+    assert not path.exists()
+    keys = {song.title: song.key for song in db_session.query(Song)}
+    assert keys == {"One": "G", "Two": "E", "Three": "Em"}
+
+
+def test_import_worker_pool_is_shut_down(db_session, tmp_path, monkeypatch):
+    """Test keys are detected in the worker pool, which shutdown releases."""
+    monkeypatch.setattr(settings, "IMPORT_WORKERS", 1)
+    user = User(email="importer@example.com", username="importer", hashed_password="x")
+    db_session.add(user)
+    db_session.commit()
+
+    lines = [
+        {"title": "One", "artist": "A", "lyrics_and_chords": "G C D G"},
+        {"title": "Two", "artist": "A", "lyrics_and_chords": "Em C G D Em"},
+    ]
+    path = tmp_path / "songs.ndjson"
+    path.write_text("\n".join(json.dumps(line) for line in lines))
+    job = ImportJob(filename="songs.ndjson", owner_id=user.id)
+
+    try:
+        run_import(job, path, session_factory=sessionmaker(bind=db_session.get_bind()))
+        executor = get_executor()
+    finally:
+        shutdown_executor()
+
+    assert job.created == 2
+    keys = {song.title: song.key for song in db_session.query(Song)}
+    assert keys == {"One": "G", "Two": "Em"}
+    with pytest.raises(RuntimeError):
+        executor.submit(abs, -1)
+    assert get_executor() is not executor
+    shutdown_executor()
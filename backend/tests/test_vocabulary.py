@@ -0,0 +1,98 @@
+"""
+Test song chord vocabularies and playable-song search.
+"""
+from sqlalchemy import update
+
+from app.api.api_v1.endpoints.music.vocabulary import search_shifts
+from app.models.song import Song
+from app.services.song import song_service
+from app.utils.vocabulary import (
+    UNREPRESENTABLE,
+    transpose_vocabulary,
+    vocabulary_chords,
+    vocabulary_mask,
+)
+from tests.conftest import make_user, song_in
+
+
+def test_vocabulary_mask():
+    assert vocabulary_chords(vocabulary_mask(["Cmaj7", "G/B", "Am7", "Am", "D9", "Bm7b5", "H"])) == [
+        "C", "G", "Am", "D7", "Am7", "Bdim",
+    ]
+    assert vocabulary_mask(["Db", "C#"]) == vocabulary_mask(["C#"])
+    assert vocabulary_mask(["C", "E7#9"]) == vocabulary_mask(["C"]) | UNREPRESENTABLE
+
+
+def test_transpose_vocabulary():
+    mask = vocabulary_mask(["C", "Am", "G7", "Bdim"])
+    assert transpose_vocabulary(mask, 2) == vocabulary_mask(["D", "Bm", "A7", "C#dim"])
+    assert transpose_vocabulary(mask, -12) == mask
+
+
+def test_search_shifts():
+    assert search_shifts(0, False) == [0]
+    assert search_shifts(2, False) == [0, -1, -2]
+    assert search_shifts(2, True) == [0, -1, -2, 1, 2, 3, -3, 4, -4, 5, -5, 6]
+
+
+class TestPlayableSongs:
+    """Test searching songs by chord vocabulary."""
+
+    def test_vocabulary_is_stored(self, db_session):
+        user = make_user(db_session)
+        song = song_service.create_with_owner(db_session, obj_in=song_in(), owner_id=user.id)
+        assert song.chord_vocabulary == vocabulary_mask(["C", "G", "Am", "F"])
+
+        song = song_service.update(db_session, db_obj=song, obj_in={"lyrics_and_chords": "Em D"})
+        assert song.chord_vocabulary == vocabulary_mask(["Em", "D"])
+
+        song_service.update_many(db_session, objs_in=[{"id": song.id, "lyrics_and_chords": "A"}])
+        db_session.refresh(song)
+        assert song.chord_vocabulary == vocabulary_mask(["A"])
+
+    def test_subset_with_capo_and_transposition(self, db_session):
+        user = make_user(db_session)
+        sheets = ["G C D\nEm", "A D E", "F Bb C", "Bb Eb F", "G C D B7", "no chords here"]
+        songs = [
+            song_service.create_with_owner(db_session, obj_in=song_in(lyrics_and_chords=sheet), owner_id=user.id)
+            for sheet in sheets
+        ]
+        known = ["G", "C", "D", "Em"]
+        db_session.statements.clear()
+
+        found = song_service.get_playable_songs(db_session, chords=known)
+        assert len(db_session.statements) == 2
+        assert [(song.id, shift) for song, shift in found] == [(songs[0].id, 0)]
+
+        found = song_service.get_playable_songs(db_session, chords=known, shifts=search_shifts(3, True))
+        assert [(song.id, shift) for song, shift in found] == [
+            (songs[0].id, 0),
+            (songs[1].id, -2),  # capo 2: G C D shapes
+            (songs[2].id, 2),  # F Bb C up a tone
+            (songs[3].id, -3),  # capo 3
+        ]
+
+    def test_unrepresentable_chords_never_match(self, db_session):
+        user = make_user(db_session)
+        songs = [
+            song_service.create_with_owner(
+                db_session, obj_in=song_in(lyrics_and_chords=sheet), owner_id=user.id
+            )
+            for sheet in ["C G", "C G\nE7#9 Cadd11 F13"]
+        ]
+
+        found = song_service.get_playable_songs(
+            db_session, chords=["C", "G", "E7#9"], shifts=search_shifts(11, True)
+        )
+        assert [song.id for song, _ in found] == [songs[0].id]
+
+    def test_backfill(self, db_session):
+        user = make_user(db_session)
+        song = song_service.create_with_owner(db_session, obj_in=song_in(), owner_id=user.id)
+        db_session.execute(update(Song).values(chord_vocabulary=None))
+        db_session.commit()
+
+        assert song_service.backfill_chord_vocabularies(db_session, only_missing=True) == 1
+        assert song_service.backfill_chord_vocabularies(db_session) == 0
+        db_session.refresh(song)
+        assert song.chord_vocabulary == vocabulary_mask(["C", "G", "Am", "F"])
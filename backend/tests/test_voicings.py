@@ -0,0 +1,106 @@
+"""
+Test guitar voicing generation.
+"""
+import pytest
+
+from app.utils.music_theory import chord_pitch_classes, extract_sheet_chords
+from app.utils.voicings import MUTED, get_fretboard, rank_capo_positions, rotate_mask
+
+
+@pytest.fixture(scope="module")
+def fretboard():
+    return get_fretboard()
+
+
+def sounding_pitch_classes(fretboard, frets):
+    return [
+        fretboard.pitch_classes[string][fret]
+        for string, fret in enumerate(frets)
+        if fret != MUTED
+    ]
+
+
+def test_open_shapes_are_easiest(fretboard):
+    """Common open chords come out as their textbook shapes."""
+    assert fretboard.voicings("C")[0].frets == (-1, 3, 2, 0, 1, 0)
+    assert fretboard.voicings("Am")[0].frets == (-1, 0, 2, 2, 1, 0)
+    assert fretboard.voicings("E")[0].frets == (0, 2, 2, 1, 0, 0)
+    assert fretboard.voicings("G")[0].frets == (3, 2, 0, 0, 0, 3)
+
+
+@pytest.mark.parametrize("chord", ["C", "F#m", "Bb7", "Ebmaj7", "Dsus4", "Gm7b5", "A5", "Cadd9"])
+def test_voicings_sound_the_chord(fretboard, chord):
+    """Every voicing plays only chord tones, over the root, sorted by difficulty."""
+    root, mask, _ = chord_pitch_classes(chord)
+    voicings = fretboard.voicings(chord, limit=10)
+    assert voicings
+    for voicing in voicings:
+        played = sounding_pitch_classes(fretboard, voicing.frets)
+        assert played[0] == root
+        assert all(mask & (1 << pc) for pc in played)
+        fretted = [fret for fret in voicing.frets if fret > 0]
+        assert not fretted or max(fretted) - min(fretted) <= 3
+        assert voicing.fingers <= 4
+    difficulties = [voicing.difficulty for voicing in voicings]
+    assert difficulties == sorted(difficulties)
+
+
+def test_slash_chord_uses_bass(fretboard):
+    """Slash chords put the named bass note lowest."""
+    for voicing in fretboard.voicings("C/G"):
+        assert sounding_pitch_classes(fretboard, voicing.frets)[0] == 7
+
+
+def test_barre_shape(fretboard):
+    """Full barres are recognised and counted as one finger."""
+    barre = next(v for v in fretboard.voicings("F", limit=10) if v.frets == (1, 3, 3, 2, 1, 1))
+    assert barre.barre == 1
+    assert barre.fingers == 4
+    assert barre.base_fret == 1
+
+
+def test_unknown_chord(fretboard):
+    assert fretboard.voicings("H") == []
+
+
+def test_fretboard_is_memoized():
+    assert get_fretboard() is get_fretboard(("E", "A", "D", "G", "B", "E"))
+
+
+def test_alternate_tunings_share_fretboards():
+    drop_d = get_fretboard("drop_d")
+    assert drop_d.tuning == ("D", "A", "D", "G", "B", "E")
+    assert get_fretboard(["D", "A", "D", "G", "B", "E"]) is drop_d
+    assert drop_d.voicings("D")[0].frets == (0, 0, 0, 2, 3, 2)
+    with pytest.raises(ValueError):
+        get_fretboard("no_such_tuning")
+
+
+@pytest.mark.parametrize("tuning", [["E", "A", "D"], ["E"] * 9, ["E"] * 10_000])
+def test_custom_tunings_are_capped(tuning):
+    with pytest.raises(ValueError, match="strings"):
+        get_fretboard(tuning)
+
+
+def test_capo_ranking_prefers_open_shapes():
+    """Eb-Bb-Cm-Ab plays as C-G-Am-F with a capo at 3 or D-A-Bm-G at 1."""
+    options = rank_capo_positions(["Eb", "Bb", "Cm", "Ab", "Eb"], max_capo=5)
+    assert sorted(option.capo for option in options) == list(range(6))
+    best = options[0]
+    assert best.capo in (1, 3)
+    assert best.total_chords == 5
+    by_capo = {option.capo: option for option in options}
+    assert by_capo[3].shapes == {"Eb": "C", "Bb": "G", "Cm": "Am", "Ab": "F"}
+    assert by_capo[0].open_chords == 0
+    # Everything but F (capo 3) or Bm (capo 1)
+    assert by_capo[1].open_chords == by_capo[3].open_chords == 4 == best.open_chords
+
+
+def test_rotate_mask():
+    assert rotate_mask(0b1, -1) == 1 << 11
+    assert rotate_mask(0b10010001, 12) == 0b10010001
+
+
+def test_extract_sheet_chords():
+    text = "G   D\nHello [Em]world\nC"
+    assert extract_sheet_chords(text) == ["G", "D", "Em", "C"]